@@ -1,21 +1,38 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
+import os
 import json
 import numpy as np  
 
 
 # 1. Funções do LLM (Agente Inteligente)
-from src.llm_api import generate_final_prompt, get_llm_response
+from src.llm_api import (
+    generate_final_prompt,
+    gerar_relatorio,
+    get_llm_response_por_variavel,
+    stream_llm_response,
+)
+from src.prompt_compacto import ORCAMENTO_TOKENS_PADRAO
 
 # 2. Funções do Pipeline de Análise e Desejabilidade
 from src.analysis_pipeline import (
-    load_and_clean_data, 
-    plot_pareto, 
-    selecionar_features_significativas, 
-    ajustar_modelo, 
-    avaliar_modelo_anova, 
-    run_global_desejabilidade_if_applicable,
+    gerar_termos_modelo,
+    run_desejabilidade_multirresposta,
+)
+
+# 3. Artefatos dos modelos reduzidos (pontuação sem reajuste)
+from src.artefatos import conteudo_artefatos
+
+# 4. Tempos por etapa e perfil (cProfile) da execução
+from src.cronometro import Cronometro, iniciar_perfil, salvar_perfil, resumo_perfil
+
+# 5. Cache por hash do conteúdo do arquivo (dataset, modelos e ANOVAs)
+from src.cache import (
+    carregar_dados,
+    ajustar_lote_em_cache,
+    analisar_variaveis_em_cache,
+    pareto_png,
+    pareto_multiplo_png,
 )
 
 # -------------------------------------------------------
@@ -29,6 +46,27 @@ st.markdown("---")
 # -------------------------------------------------------
 with st.sidebar:
     st.header("Parâmetros do Processo")
+    n_independentes = st.number_input(
+        "Número de variáveis independentes",
+        min_value=1, max_value=20, value=3, step=1,
+        help="Quantas colunas após 'Ensaio' são fatores; as demais são respostas."
+    )
+    ordem_interacao = st.number_input(
+        "Ordem máxima das interações",
+        min_value=2, max_value=4, value=2, step=1,
+        help="2: apenas interações entre pares (a:b); 3 inclui a:b:c, e assim por diante."
+    )
+    selecao_termos = st.selectbox(
+        "Seleção de termos do modelo reduzido",
+        options=["pvalor", "backward", "hierarquico", "forward"],
+        format_func=lambda m: {
+            "pvalor": "Corte único por p-valor (p ≤ 0,10)",
+            "backward": "Stepwise backward",
+            "hierarquico": "Stepwise backward hierárquico",
+            "forward": "Stepwise forward",
+        }[m],
+        help="Os modos stepwise incluem/removem um termo por vez; o hierárquico mantém termos contidos em interações ou quadráticos do modelo."
+    )
     r2_min_percent = st.number_input(
         "R² mínimo (%) para rodar desejabilidade",
         min_value=0, max_value=100, value=50, step=1
@@ -41,6 +79,64 @@ with st.sidebar:
         "Pontos por variável-base (linspace)",
         min_value=5, max_value=50, value=15, step=1
     )
+    direcao = st.selectbox(
+        "Direção da desejabilidade",
+        options=["higher", "lower", "target"],
+        format_func=lambda d: {
+            "higher": "Maximizar resposta",
+            "lower": "Minimizar resposta",
+            "target": "Atingir alvo",
+        }[d],
+        help="Em \"Atingir alvo\", o valor ideal de cada resposta é definido após carregar os dados "
+             "(padrão: ponto médio da faixa observada)."
+    )
+    metodo_busca = st.selectbox(
+        "Método de busca da desejabilidade",
+        options=["grade", "adaptativa", "otimizador"],
+        format_func=lambda m: {
+            "grade": "Grade uniforme (linspace)",
+            "adaptativa": "Grade adaptativa (refina em torno dos melhores pontos)",
+            "otimizador": "Otimizador contínuo (multistart)",
+        }[m],
+        help="A grade adaptativa começa com os pontos por variável acima e subdivide as melhores células, "
+             "chegando a uma resolução muito maior com uma fração das avaliações (no máximo 200 mil). "
+             "Compensa a partir de 4–5 fatores, quando a grade uniforme passa de centenas de milhares de "
+             "pontos, ou quando se quer um ótimo mais preciso; com 2–3 fatores a grade uniforme já é instantânea."
+    )
+    usar_desej_global = st.checkbox(
+        "Desejabilidade global (todas as respostas)", value=True,
+        help="Combina as respostas com R² acima do mínimo por média geométrica das desejabilidades."
+    )
+    n_processos = st.number_input(
+        "Processos paralelos (análise por variável)",
+        min_value=1, max_value=max(1, os.cpu_count() or 1), value=1, step=1,
+        help="Com mais de 1 processo, cada variável resposta é analisada em paralelo."
+    )
+    relatorio_por_variavel = st.checkbox(
+        "Relatório por variável (seções geradas em paralelo)", value=False,
+        help="Gera uma seção por variável resposta com chamadas concorrentes à IA e as une em ordem."
+    )
+    relatorio_em_streaming = st.checkbox(
+        "Exibir o relatório enquanto é gerado (streaming)", value=True,
+        help="Mostra o texto da IA à medida que chega, em vez de aguardar o relatório completo."
+    )
+    usar_cache_llm = st.checkbox(
+        "Reutilizar relatórios já gerados (cache)", value=True,
+        help="Se a análise e as configurações do modelo forem idênticas, reaproveita a resposta salva em disco sem chamar a IA."
+    )
+    orcamento_tokens = st.number_input(
+        "Orçamento de tokens das análises no prompt",
+        min_value=1000, value=ORCAMENTO_TOKENS_PADRAO, step=1000,
+        help="Se o JSON compacto das análises passar deste tamanho estimado, o conteúdo menos relevante é cortado."
+    )
+    verificar_exportacao = st.checkbox(
+        "Conferir o modelo exportado (NumPy) com modelo.predict", value=False,
+        help="Executa os códigos exportados em pontos aleatórios e compara com o statsmodels (deixa a análise mais lenta)."
+    )
+    gerar_perfil = st.checkbox(
+        "Gerar perfil de desempenho (cProfile)", value=False,
+        help="Grava um arquivo .pstats com o perfil de toda a análise, para investigar lentidão."
+    )
     st.caption("O agente usará esses parâmetros na etapa de desejabilidade.")
 
 # -------------------------------------------------------
@@ -50,8 +146,13 @@ st.header("1. Carregamento e Preparação dos Dados")
 uploaded_file = st.file_uploader("Escolha um arquivo Excel/CSV", type=["csv", "xlsx"])
 
 if uploaded_file:
-    # CHAMADA ATUALIZADA: load_and_clean_data vem de src.analysis_pipeline
-    df, independent_vars, dependent_vars = load_and_clean_data(uploaded_file)
+    # Tempos de cada etapa desta execução (exibidos ao final da análise)
+    cronometro = Cronometro()
+
+    # Leitura memoizada pelo hash do conteúdo (reruns não reprocessam o arquivo)
+    with cronometro.medir("carregamento") as registro:
+        df, independent_vars, dependent_vars, hash_arquivo = carregar_dados(uploaded_file, int(n_independentes))
+        registro["n_linhas"] = 0 if df is None else len(df)
 
     if df is not None and len(df):
         st.success("Dados carregados e limpos com sucesso!")
@@ -62,90 +163,98 @@ if uploaded_file:
         st.write("Variáveis Independentes:", independent_vars) 
         st.write("Variáveis Dependentes:", dependent_vars)
 
+        # Alvo de cada resposta (direção "target"), dentro da faixa observada
+        alvos = {}
+        if direcao == "target":
+            with st.expander("Alvos da desejabilidade (atingir alvo)", expanded=True):
+                for t in dependent_vars:
+                    vmin, vmax = float(df[t].min()), float(df[t].max())
+                    if not (np.isfinite(vmin) and np.isfinite(vmax)):
+                        continue
+                    alvos[t] = float(st.number_input(
+                        f"Alvo de {t}", min_value=vmin, max_value=vmax, value=(vmin + vmax) / 2.0,
+                        format="%.4g", key=f"alvo_{t}",
+                        help=f"Valor ideal de {t}; a desejabilidade cai a zero nos extremos observados "
+                             f"[{vmin:.4g}, {vmax:.4g}].",
+                    ))
+
         st.markdown("---")
         st.header("2. Orquestração e Análise Automatizada")
         st.info("O agente irá agora executar as análises para todas as variáveis dependentes.")
 
         if st.button("Iniciar Análise Completa e Gerar Relatório"):
+            perfil = iniciar_perfil() if gerar_perfil else None
             resultados_analises = []
+            modelos_desejabilidade = {}
+
+            # Features completas: termos lineares, interações e quadráticos
+            # (gerados para qualquer número de independentes)
+            features_completas = gerar_termos_modelo(
+                independent_vars, ordem_interacao=int(ordem_interacao)
+            )
+
+            # Modelo completo de todas as respostas em lote (uma única fatoração)
+            with cronometro.medir("ajuste_lote", n_linhas=len(df), n_termos=len(features_completas) + 1,
+                                  n_respostas=len(dependent_vars)):
+                lote_completo = ajustar_lote_em_cache(
+                    hash_arquivo, tuple(dependent_vars), tuple(features_completas), df
+                )
+
+            # Parâmetros da desejabilidade (também compõem a chave do cache)
+            parametros_desejabilidade = (
+                ("d_interval", (d_min, d_max)),
+                ("n_points", int(n_points)),
+                ("s", 1.0),
+                ("top_k", 50),
+                ("r2_threshold", float(r2_min_percent) / 100.0),
+                ("direction", direcao),
+                ("alvos", tuple(alvos.items())),
+                ("desej_col_name", "desejabilidade"),
+                ("metodo", metodo_busca),
+                ("verificar_exportacao", bool(verificar_exportacao)),
+            )
+
+            # Cálculo puro por variável (em sequência ou em pool de processos)
+            with st.spinner("Ajustando modelos e executando a desejabilidade..."), \
+                    cronometro.medir("analise_variaveis", n_respostas=len(dependent_vars)):
+                analises = analisar_variaveis_em_cache(
+                    hash_arquivo, tuple(dependent_vars), tuple(features_completas), parametros_desejabilidade,
+                    df, lote_completo, _n_processos=int(n_processos), selecao=selecao_termos,
+                )
 
-            # Loop por variável alvo
-            for target_var in dependent_vars:
+            # Exibição dos resultados, na ordem original das variáveis
+            for analise in analises:
+                target_var = analise.target
                 st.subheader(f"Analisando: {target_var}")
+                # Etapas do target (seleção, modelo reduzido, LoF, desejabilidade)
+                cronometro.incorporar(analise.resultado.get("tempos"))
 
-                # Features completas: termos lineares, quadráticos e interações
-                # (assumindo exatamente 3 independentes)
-                features_completas = [
-                    independent_vars[0], f"I({independent_vars[0]}**2)",
-                    independent_vars[1], f"I({independent_vars[1]}**2)",
-                    independent_vars[2], f"I({independent_vars[2]}**2)",
-                    f"{independent_vars[0]}:{independent_vars[1]}",
-                    f"{independent_vars[0]}:{independent_vars[2]}",
-                    f"{independent_vars[1]}:{independent_vars[2]}",
-                ]
-                
-                # --- Inicialização de Variáveis ---
-                # Garante que essas variáveis existam antes do bloco if/else
-                summary = "Não foram encontradas features significativas para a variável. Nenhum modelo foi gerado."
-                metricas = {}
-                desejabilidade_block = {}
-                
-                # --- Pareto (modelo completo) ---
-                modelo_completo, anova_sorted = ajustar_modelo(df, target_var, features_completas)
-                
-                # Gera e exibe o gráfico (plot_pareto usa o modelo para criar o gráfico)
+                # Exibe o gráfico (PNG em cache, gerado a partir da ANOVA do ajuste)
                 try:
-                    plot_pareto(df, target_var, features_completas)
-                    st.pyplot(plt.gcf())
-                    plt.close() # Limpa o buffer
+                    with cronometro.medir("pareto", target_var):
+                        st.image(pareto_png(analise.anova_completa, target_var))
                 except Exception as e:
                     st.warning(f"Não foi possível gerar o Gráfico de Pareto para {target_var}. Erro: {e}")
 
+                # Caminho da seleção stepwise (termos incluídos/removidos e p-valores)
+                selecao = analise.resultado.get("selecao") or {}
+                if selecao.get("mensagem"):
+                    st.warning(f"Seleção stepwise indisponível; usado o corte por p-valor. {selecao['mensagem']}")
+                elif selecao.get("caminho"):
+                    with st.expander(f"Caminho da seleção stepwise ({selecao['metodo']})"):
+                        st.dataframe(pd.DataFrame(selecao["caminho"]))
 
-                # --- Seleção de features significativas ---
-                significantes, nao_significantes, anova_df_temp = selecionar_features_significativas(modelo_completo)
-
-                # --- Serialização da ANOVA (Modelo Completo/Pareto) ---
-                # Esta serialização é feita incondicionalmente, usando o anova_df_temp
-                anova_resultados_serializaveis = (
-                    anova_df_temp.reset_index()
-                    .rename(columns={"index": "term"})
-                    # CORREÇÃO DE NAMEERROR: np.nan agora está definido
-                    .replace({pd.NA: None, np.nan: None}) 
-                    .to_dict("records")
-                )
-
-
-                # Caso NÃO haja features significativas: (usa os valores padrao/inicializados)
-                if not significantes:
+                # Caso NÃO haja features significativas
+                if not analise.significantes:
                     st.warning(f"Não foram encontradas features significativas para '{target_var}'. A análise se encerra aqui.")
-                    # O 'summary' e 'desejabilidade_block' usam os valores iniciais (de "Não foram encontradas...")
-                
-                # Caso HAJA features significativas: (sobrescreve os valores)
-                else:
-                    # --- Modelo reduzido com as significantes ---
-                    st.success(f"Features significativas encontradas: {', '.join(significantes)}")
-                    modelo_reduzido, _ = ajustar_modelo(df, target_var, significantes)
 
-                    # Summary textual do statsmodels
-                    summary = modelo_reduzido.summary().as_text()
+                # Caso HAJA features significativas
+                else:
+                    st.success(f"Features significativas encontradas: {', '.join(analise.significantes)}")
+                    des_out = analise.desejabilidade
 
-                    # --- Métricas ANOVA do modelo reduzido ---
-                    metricas, anova_completa_final, params_summary = avaliar_modelo_anova(modelo_reduzido, df, target_var)
-
-                    # --- Desejabilidade (dinâmica) ---
-                    des_out = run_global_desejabilidade_if_applicable(
-                        modelo_reduzido=modelo_reduzido,
-                        df=df,
-                        target=target_var,
-                        d_interval=(d_min, d_max),
-                        n_points=int(n_points),
-                        s=1.0,
-                        top_k=50,
-                        r2_threshold=float(r2_min_percent) / 100.0,
-                        direction="higher",
-                        desej_col_name="desejabilidade"
-                    )
+                    if des_out["aplica_desejabilidade"]:
+                        modelos_desejabilidade[target_var] = analise.modelo_reduzido
 
                     # Exibe mensagem de desejabilidade na UI
                     st.info(des_out["mensagem"])
@@ -154,30 +263,77 @@ if uploaded_file:
                         # O resultado_df é uma lista de dicts (serializável), converte para DF para exibição na UI
                         st.dataframe(pd.DataFrame(des_out["resultado_df"])) 
 
-                    # Monta bloco de Desejabilidade
-                    desejabilidade_block = {
-                        "aplica": des_out["aplica_desejabilidade"],
-                        "r2": des_out["r2"],
-                        "mensagem": des_out["mensagem"],
-                        "search_spaces": des_out["search_spaces"],
-                        "modelo_funcao_py": des_out["model_function_code"],
-                        "desejabilidade_funcao_py": des_out["desirability_function_code"],
-                        "resultados": des_out["resultado_df"] # Já é serializável/lista
-                    }
+                    # Exportação vetorizada (NumPy) do modelo reduzido (conferida com modelo.predict, se pedido)
+                    if des_out.get("model_function_code_numpy"):
+                        with st.expander(f"Exportar modelo de {target_var} (Python/NumPy)"):
+                            verificacao = des_out.get("model_export_check")
+                            erro = max((v for k, v in (verificacao or {}).items() if k.startswith("erro_max")), default=0.0)
+                            if verificacao is None:
+                                st.caption("Não conferido (ative a conferência do modelo exportado no menu lateral).")
+                            elif verificacao.get("equivalente"):
+                                st.caption(
+                                    f"Conferido com modelo.predict em {verificacao['n_pontos']} pontos aleatórios "
+                                    f"(erro relativo máximo {erro:.1e})."
+                                )
+                            else:
+                                st.warning(f"O código exportado diverge de modelo.predict (erro relativo {erro:.1e}).")
+                            st.code(des_out["model_function_code_numpy"], language="python")
+                            st.download_button(
+                                "Baixar modelo (.py)",
+                                data=des_out["model_function_code_numpy"] + "\n",
+                                file_name=f"modelo_{target_var}.py",
+                                mime="text/x-python",
+                                key=f"exportar_modelo_{target_var}",
+                            )
 
                 # --- Agrega resultado desta variável ao JSON final ---
-                # Todas as variáveis agora estão garantidas
-                resultados_analises.append({
-                    "variavel": target_var,
-                    "pareto": {
-                        "significativo": significantes,
-                        "nao_significativo": nao_significantes
-                    },
-                    "anova_completa": anova_resultados_serializaveis,
-                    "modelo_reduzido_summary": summary,
-                    "metricas": metricas,
-                    "desejabilidade": desejabilidade_block
-                })
+                resultados_analises.append(analise.resultado)
+
+            # --- Artefatos dos modelos reduzidos (pontuação posterior com src.pontuacao) ---
+            artefatos = [a.artefato for a in analises if a.artefato]
+            if artefatos:
+                nome_base = os.path.splitext(uploaded_file.name)[0]
+                st.download_button(
+                    "Baixar modelos reduzidos (JSON para pontuação)",
+                    data=json.dumps(
+                        conteudo_artefatos(artefatos, uploaded_file.name, hash_arquivo), ensure_ascii=False, indent=2
+                    ),
+                    file_name=f"{nome_base}.modelos.json",
+                    mime="application/json",
+                    help="Pontue novas condições depois, sem reenviar a planilha: python -m src.pontuacao <arquivo> condicoes.csv --saida pontuadas.csv",
+                )
+
+            # --- Pareto comparativo (small multiples) ---
+            if len(analises) > 1:
+                with st.expander("Gráficos de Pareto de todas as respostas"):
+                    try:
+                        with cronometro.medir("pareto_multiplo", n_respostas=len(analises)):
+                            st.image(pareto_multiplo_png({a.target: a.anova_completa for a in analises}))
+                    except Exception as e:
+                        st.warning(f"Não foi possível gerar o Pareto comparativo. Erro: {e}")
+
+            # --- Desejabilidade global (multirresposta) ---
+            if usar_desej_global and len(modelos_desejabilidade) >= 2:
+                st.subheader("Desejabilidade Global (todas as respostas)")
+                with cronometro.medir("desejabilidade_global", n_respostas=len(modelos_desejabilidade)) as registro:
+                    global_out = run_desejabilidade_multirresposta(
+                        modelos_desejabilidade,
+                        df,
+                        d_interval=(d_min, d_max),
+                        n_points=int(n_points),
+                        s=1.0,
+                        top_k=50,
+                        direcoes={t: direcao for t in modelos_desejabilidade},
+                        alvos=alvos,
+                        # O otimizador contínuo é por resposta; a global usa a grade uniforme
+                        metodo="adaptativa" if metodo_busca == "adaptativa" else "grade",
+                    )
+                    registro["n_pontos_avaliados"] = global_out.get("n_avaliacoes")
+                st.info(global_out["mensagem"])
+                if global_out["resultado_df"]:
+                    st.dataframe(pd.DataFrame(global_out["resultado_df"]))
+                else:
+                    st.warning("Nenhuma condição de compromisso encontrada no intervalo de desejabilidade.")
 
             # ---------------------------------------------------
             # Etapa 3 — Geração do relatório (LLM)
@@ -187,24 +343,79 @@ if uploaded_file:
             st.info("As análises foram concluídas. O agente está construindo o relatório final.")
 
             # generate_final_prompt e get_llm_response de src.llm_api
-            prompt_template = generate_final_prompt(resultados_analises)
+            with cronometro.medir("prompt"):
+                prompt_template = generate_final_prompt(resultados_analises, orcamento_tokens=int(orcamento_tokens))
 
-            # Garante que o spinner e a mensagem de sucesso sejam controlados
-            with st.spinner("Aguarde. O Agente LYRA está processando e escrevendo o relatório com alta complexidade..."):
-                response_text = get_llm_response(prompt_template, resultados_analises)
+            if relatorio_por_variavel or not relatorio_em_streaming:
+                # Garante que o spinner e a mensagem de sucesso sejam controlados
+                with st.spinner("Aguarde. O Agente LYRA está processando e escrevendo o relatório com alta complexidade..."), \
+                        cronometro.medir("relatorio_llm", modo="por_variavel" if relatorio_por_variavel else "completo"):
+                    if relatorio_por_variavel:
+                        # Seções que falharem viram notas no texto; as demais são mantidas
+                        response_text, erros_relatorio = get_llm_response_por_variavel(
+                            resultados_analises, usar_cache=usar_cache_llm, orcamento_tokens=int(orcamento_tokens)
+                        )
+                    else:
+                        response_text, erro_relatorio = gerar_relatorio(prompt_template, usar_cache=usar_cache_llm)
+                        erros_relatorio = [erro_relatorio] if erro_relatorio else []
 
-            # A MENSAGEM FINAL É EXIBIDA APÓS O SPINNER
-            if response_text and not response_text.startswith("Erro:") and not response_text.startswith("AVISO:"):
-                st.success("Relatório Concluído!")
-            else:
-                # Exibe a mensagem de erro ou aviso (retornado pelo llm_api.py)
-                st.error(response_text)
+                # A MENSAGEM FINAL É EXIBIDA APÓS O SPINNER
+                if response_text is None:
+                    # Exibe a mensagem de erro ou aviso (retornado pelo llm_api.py)
+                    st.error("\n\n".join(erros_relatorio))
+                else:
+                    if erros_relatorio:
+                        st.warning(
+                            f"Relatório gerado parcialmente: {len(erros_relatorio)} seção(ões) falharam.\n\n"
+                            + "\n\n".join(erros_relatorio)
+                        )
+                    else:
+                        st.success("Relatório Concluído!")
+                    st.subheader("Relatório Final Gerado")
+                    st.markdown(response_text)
 
+            else:
+                # Streaming: o relatório é exibido à medida que os trechos chegam
+                st.subheader("Relatório Final Gerado")
+                relatorio_stream = stream_llm_response(prompt_template, resultados_analises, usar_cache=usar_cache_llm)
+                with cronometro.medir("relatorio_llm", modo="streaming"):
+                    st.write_stream(relatorio_stream)
 
-            st.subheader("Relatório Final Gerado")
-            # O Agente LLM retorna a mensagem de erro/aviso se a API falhar
-            st.markdown(response_text) 
+                # A mensagem final é exibida ao término do stream
+                if relatorio_stream.erro is None:
+                    st.success("Relatório Concluído!")
+                else:
+                    st.error("A geração do relatório falhou. Veja a mensagem de erro acima.")
 
             st.subheader("Prompt Gerado (Para Verificação)")
-            prompt_final = prompt_template.format(json_analises=json.dumps(resultados_analises, indent=2))
+            prompt_final = prompt_template.format()
             st.text_area("Prompt", prompt_final, height=300)
+
+            # ---------------------------------------------------
+            # Tempos por etapa e perfil da execução
+            # ---------------------------------------------------
+            with st.expander("Tempos de execução por etapa"):
+                st.caption(
+                    "Etapas por variável vêm do cálculo da análise; com o cache, "
+                    "refletem a execução em que os resultados foram calculados."
+                )
+                totais = cronometro.totais()
+                st.dataframe(pd.DataFrame({"etapa": list(totais), "total_s": list(totais.values())}))
+                st.dataframe(pd.DataFrame(cronometro.registros))
+                st.download_button(
+                    "Baixar tempos (JSON)",
+                    data=json.dumps(cronometro.registros, ensure_ascii=False, indent=2, default=str),
+                    file_name="lyra_tempos.json",
+                    mime="application/json",
+                )
+
+            if perfil is not None:
+                caminho_perfil = salvar_perfil(perfil)
+                with st.expander("Perfil de desempenho (cProfile)"):
+                    st.caption(f"Arquivo gravado em `{caminho_perfil}` (abra com pstats ou snakeviz).")
+                    st.code(resumo_perfil(caminho_perfil), language="text")
+                    with open(caminho_perfil, "rb") as fp:
+                        st.download_button(
+                            "Baixar perfil (.pstats)", data=fp.read(),
+                            file_name=os.path.basename(caminho_perfil),
+                        )
@@ -0,0 +1,211 @@
+# benchmarks/pipeline.py
+"""
+Tempo de cada etapa do pipeline em planejamentos sintéticos de vários tamanhos.
+
+Para cada cenário (tipo de planejamento e número de fatores) são medidas as
+etapas carregamento, ajuste (statsmodels), ANOVA, ajuste em lote, falta de
+ajuste, busca em grade da desejabilidade (uniforme e adaptativa), pipeline
+completo e montagem do prompt; cada etapa roda uma vez para aquecer e depois algumas vezes, e o
+relatório guarda a mediana.
+
+Uso:
+    python benchmarks/pipeline.py --escalas ccd:3,bbd:4,ccd:6 --saida benchmarks/resultados/pipeline.json
+    python benchmarks/pipeline.py --comparar benchmarks/resultados/pipeline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import warnings
+
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+from benchmarks.planejamentos import gerar_planejamento  # noqa: E402
+
+# Cenários padrão: "tipo:fatores"
+ESCALAS_PADRAO = "ccd:3,bbd:3,fatorial:3,ccd:5,bbd:5,ccd:7"
+
+# Razão de tempo (atual / anterior) a partir da qual uma etapa é sinalizada
+LIMIAR_REGRESSAO = 1.25
+
+
+def _cronometrar(funcao, repeticoes):
+    """
+    Executa `funcao` uma vez sem medir (importações tardias e caches frios não
+    entram na medida) e depois `repeticoes` vezes; retorna (tempos em
+    segundos, último resultado).
+    """
+    funcao()
+    tempos = []
+    resultado = None
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - t0)
+    return tempos, resultado
+
+
+def medir_cenario(tipo, n_fatores, replicas=1, n_respostas=2, ruido=0.1, n_pontos=15, repeticoes=3):
+    """Mede as etapas do pipeline para um planejamento sintético."""
+    from statsmodels.formula.api import ols
+    import statsmodels.api as sm
+
+    from src.analysis_pipeline import (
+        avaliar_modelo_anova,
+        gerar_termos_modelo,
+        load_and_clean_data,
+        run_analysis_pipeline,
+        run_global_desejabilidade_if_applicable,
+    )
+    from src.ingestao import _ArquivoEmMemoria
+    from src.llm_api import generate_final_prompt
+    from src.ols_lote import ajustar_ols_em_lote
+
+    gerado = gerar_planejamento(tipo, n_fatores, replicas, n_respostas, ruido)
+    conteudo = ("Planejamento sintético\n" + gerado.to_csv(index=False)).encode("utf-8")
+
+    etapas = {}
+
+    def etapa(nome, funcao):
+        tempos, resultado = _cronometrar(funcao, repeticoes)
+        etapas[nome] = {
+            "mediana_s": statistics.median(tempos),
+            "min_s": min(tempos),
+            "max_s": max(tempos),
+        }
+        return resultado
+
+    df, independentes, dependentes = etapa(
+        "carregamento",
+        lambda: load_and_clean_data(_ArquivoEmMemoria(conteudo, "sintetico.csv"), n_fatores),
+    )
+    features = gerar_termos_modelo(independentes)
+    formula = " + ".join(features)
+
+    modelos = etapa("ajuste", lambda: {t: ols(f"{t} ~ {formula}", data=df).fit() for t in dependentes})
+    anovas = etapa("anova", lambda: {t: sm.stats.anova_lm(m, typ=2) for t, m in modelos.items()})
+    etapa("ajuste_lote", lambda: ajustar_ols_em_lote(df, dependentes, features))
+    etapa(
+        "falta_de_ajuste",
+        lambda: [avaliar_modelo_anova(modelos[t], df, t, anova=anovas[t]) for t in dependentes],
+    )
+    desejabilidade = etapa(
+        "desejabilidade_grade",
+        lambda: [
+            run_global_desejabilidade_if_applicable(modelos[t], df, t, n_points=n_pontos, r2_threshold=0.0)
+            for t in dependentes
+        ],
+    )
+    adaptativa = etapa(
+        "desejabilidade_adaptativa",
+        lambda: [
+            run_global_desejabilidade_if_applicable(
+                modelos[t], df, t, n_points=n_pontos, r2_threshold=0.0, metodo="adaptativa"
+            )
+            for t in dependentes
+        ],
+    )
+    resultados = etapa(
+        "pipeline_completo",
+        lambda: run_analysis_pipeline(df, independentes, dependentes, True, True),
+    )
+    etapa("prompt", lambda: generate_final_prompt(resultados))
+
+    return {
+        "tipo": tipo,
+        "fatores": int(n_fatores),
+        "replicas": int(replicas),
+        "respostas": int(n_respostas),
+        "ruido": float(ruido),
+        "n_linhas": int(len(df)),
+        "n_termos": len(features) + 1,
+        "pontos_grade": [d.get("n_avaliacoes") for d in desejabilidade],
+        "pontos_adaptativa": [d.get("n_avaliacoes") for d in adaptativa],
+        "etapas": etapas,
+    }
+
+
+def _chave(cenario):
+    return f"{cenario['tipo']}:{cenario['fatores']}x{cenario['replicas']}"
+
+
+def comparar(atual, anterior, limiar=LIMIAR_REGRESSAO):
+    """
+    Compara dois registros (mesmos cenários e etapas) pela mediana.
+    Retorna a lista de regressões (cenário, etapa, razão) acima de `limiar`.
+    """
+    anteriores = {_chave(c): c for c in anterior.get("cenarios", [])}
+    regressoes = []
+    for cenario in atual.get("cenarios", []):
+        base = anteriores.get(_chave(cenario))
+        if base is None:
+            continue
+        for nome, medida in cenario["etapas"].items():
+            medida_base = base["etapas"].get(nome)
+            if not medida_base or medida_base["mediana_s"] <= 0:
+                continue
+            razao = medida["mediana_s"] / medida_base["mediana_s"]
+            marca = "  REGRESSÃO" if razao > limiar else ""
+            print(f"{_chave(cenario):<16} {nome:<26} {razao:6.2f}x{marca}")
+            if razao > limiar:
+                regressoes.append((_chave(cenario), nome, razao))
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mede o tempo das etapas do pipeline em planejamentos sintéticos.")
+    parser.add_argument("--escalas", default=ESCALAS_PADRAO,
+                        help=f"Cenários 'tipo:fatores' separados por vírgula (padrão: {ESCALAS_PADRAO}).")
+    parser.add_argument("--replicas", type=int, default=1, help="Repetições do planejamento completo (padrão: 1).")
+    parser.add_argument("--respostas", type=int, default=2, help="Respostas por planejamento (padrão: 2).")
+    parser.add_argument("--ruido", type=float, default=0.1, help="Ruído relativo à amplitude (padrão: 0.1).")
+    parser.add_argument("--pontos", type=int, default=15, help="Pontos por variável na grade (padrão: 15).")
+    parser.add_argument("--repeticoes", type=int, default=3, help="Execuções por etapa (padrão: 3).")
+    parser.add_argument("--saida", default=None, help="Arquivo JSON para registrar a execução.")
+    parser.add_argument("--comparar", default=None, help="Registro JSON anterior para comparar as medianas.")
+    parser.add_argument("--limiar", type=float, default=LIMIAR_REGRESSAO,
+                        help=f"Razão atual/anterior sinalizada como regressão (padrão: {LIMIAR_REGRESSAO}).")
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings("ignore")
+    cenarios = []
+    for escala in args.escalas.split(","):
+        tipo, fatores = escala.strip().split(":")
+        cenario = medir_cenario(
+            tipo, int(fatores), args.replicas, args.respostas, args.ruido, args.pontos, args.repeticoes
+        )
+        cenarios.append(cenario)
+        print(f"{_chave(cenario)} ({cenario['n_linhas']} ensaios, {cenario['n_termos']} termos)")
+        for nome, medida in cenario["etapas"].items():
+            print(f"    {nome:<26} {medida['mediana_s'] * 1000:10.1f} ms")
+
+    registro = {
+        "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "repeticoes": args.repeticoes,
+        "pontos": args.pontos,
+        "cenarios": cenarios,
+    }
+    if args.saida:
+        os.makedirs(os.path.dirname(os.path.abspath(args.saida)), exist_ok=True)
+        with open(args.saida, "w", encoding="utf-8") as fp:
+            json.dump(registro, fp, indent=2, ensure_ascii=False)
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as fp:
+            anterior = json.load(fp)
+        if comparar(registro, anterior, args.limiar):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
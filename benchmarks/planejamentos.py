@@ -0,0 +1,138 @@
+# benchmarks/planejamentos.py
+"""
+Gerador de planejamentos experimentais sintéticos para os benchmarks.
+
+Produz composto central (CCD), Box–Behnken (BBD) e fatorial completo com
+número de fatores, réplicas, respostas e ruído escolhidos, no mesmo formato
+dos arquivos lidos pelo app (linha de título, coluna `Ensaio`, fatores e
+respostas).
+
+Uso:
+    python benchmarks/planejamentos.py ccd --fatores 5 --respostas 3 --saida data/sintetico_ccd5.csv
+"""
+
+import argparse
+import itertools
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+
+TIPOS = ("ccd", "bbd", "fatorial")
+
+
+def pontos_codificados(tipo, n_fatores, pontos_centrais=3, niveis=3, alfa=None):
+    """
+    Matriz (n_ensaios, n_fatores) do planejamento em unidades codificadas.
+
+    ccd: fatorial 2^k (±1) + pontos axiais (±alfa; padrão rotacionável
+        alfa = (2^k)^(1/4)) + pontos centrais;
+    bbd: para cada par de fatores, o fatorial 2² com os demais no centro
+        + pontos centrais (requer k >= 3);
+    fatorial: fatorial completo com `niveis` níveis por fator + pontos centrais.
+    """
+    k = int(n_fatores)
+    if k < 1:
+        raise ValueError("O planejamento precisa de pelo menos 1 fator.")
+
+    if tipo == "ccd":
+        fatorial = np.array(list(itertools.product((-1.0, 1.0), repeat=k)))
+        alfa = (2.0 ** k) ** 0.25 if alfa is None else float(alfa)
+        axiais = np.zeros((2 * k, k))
+        for j in range(k):
+            axiais[2 * j, j] = -alfa
+            axiais[2 * j + 1, j] = alfa
+        blocos = [fatorial, axiais]
+    elif tipo == "bbd":
+        if k < 3:
+            raise ValueError("O Box–Behnken requer pelo menos 3 fatores.")
+        linhas = []
+        for i, j in itertools.combinations(range(k), 2):
+            for a, b in itertools.product((-1.0, 1.0), repeat=2):
+                linha = np.zeros(k)
+                linha[i], linha[j] = a, b
+                linhas.append(linha)
+        blocos = [np.array(linhas)]
+    elif tipo == "fatorial":
+        eixo = np.linspace(-1.0, 1.0, int(niveis))
+        blocos = [np.array(list(itertools.product(eixo, repeat=k)))]
+    else:
+        raise ValueError(f"Tipo de planejamento inválido: '{tipo}'. Use um de {TIPOS}.")
+
+    blocos.append(np.zeros((int(pontos_centrais), k)))
+    return np.vstack(blocos)
+
+
+def gerar_planejamento(tipo="ccd", n_fatores=3, replicas=1, n_respostas=2, ruido=0.1,
+                       pontos_centrais=3, niveis=3, semente=0):
+    """
+    DataFrame com `Ensaio`, os fatores (`Fator_1`, ... em unidades naturais) e
+    as respostas (`Resposta_1`, ...).
+
+    Cada resposta é um polinômio de segunda ordem com coeficientes sorteados
+    (metade das interações nulas) mais ruído normal com desvio `ruido` vezes
+    a amplitude do sinal. O planejamento inteiro é repetido `replicas` vezes.
+    """
+    rng = np.random.default_rng(semente)
+    X = pontos_codificados(tipo, n_fatores, pontos_centrais, niveis)
+    X = np.tile(X, (int(replicas), 1))
+    n, k = X.shape
+
+    pares = list(itertools.combinations(range(k), 2))
+    respostas = {}
+    for r in range(int(n_respostas)):
+        lineares = rng.normal(0.0, 2.0, k)
+        quadraticos = rng.normal(0.0, 1.0, k)
+        interacoes = rng.normal(0.0, 1.0, len(pares)) * (rng.random(len(pares)) < 0.5)
+        y = 10.0 * (r + 1) + X @ lineares + (X ** 2) @ quadraticos
+        for c, (i, j) in zip(interacoes, pares):
+            y += c * X[:, i] * X[:, j]
+        amplitude = float(np.ptp(y)) or 1.0
+        respostas[f"Resposta_{r + 1}"] = y + rng.normal(0.0, ruido * amplitude, n)
+
+    # Unidades naturais: cada fator com centro e passo próprios
+    fatores = {f"Fator_{j + 1}": 10.0 * (j + 2) + 5.0 * (j + 1) * X[:, j] for j in range(k)}
+    return pd.DataFrame({"Ensaio": np.arange(1, n + 1), **fatores, **respostas})
+
+
+def salvar_planejamento(df, caminho, titulo="Planejamento sintético"):
+    """
+    Grava o planejamento como .csv ou .xlsx com uma linha de título antes do
+    cabeçalho (o carregador do app lê com header=1).
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+    if caminho.lower().endswith(".xlsx"):
+        with pd.ExcelWriter(caminho) as escritor:
+            pd.DataFrame([[titulo]]).to_excel(escritor, index=False, header=False)
+            df.to_excel(escritor, index=False, startrow=1)
+    else:
+        with open(caminho, "w", encoding="utf-8", newline="") as fp:
+            fp.write(titulo + "\n")
+            df.to_csv(fp, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera um planejamento experimental sintético.")
+    parser.add_argument("tipo", choices=TIPOS, help="Tipo de planejamento.")
+    parser.add_argument("--fatores", type=int, default=3, help="Número de fatores (padrão: 3).")
+    parser.add_argument("--replicas", type=int, default=1, help="Repetições do planejamento completo (padrão: 1).")
+    parser.add_argument("--respostas", type=int, default=2, help="Número de respostas (padrão: 2).")
+    parser.add_argument("--ruido", type=float, default=0.1, help="Desvio do ruído relativo à amplitude (padrão: 0.1).")
+    parser.add_argument("--centrais", type=int, default=3, help="Pontos centrais (padrão: 3).")
+    parser.add_argument("--semente", type=int, default=0, help="Semente aleatória (padrão: 0).")
+    parser.add_argument("--saida", required=True, help="Arquivo .csv ou .xlsx de saída.")
+    args = parser.parse_args(argv)
+
+    df = gerar_planejamento(
+        args.tipo, args.fatores, args.replicas, args.respostas, args.ruido,
+        pontos_centrais=args.centrais, semente=args.semente,
+    )
+    salvar_planejamento(df, args.saida)
+    print(f"{args.saida}: {len(df)} ensaios, {args.fatores} fatores, {args.respostas} respostas")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
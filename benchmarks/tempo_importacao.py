@@ -0,0 +1,99 @@
+# benchmarks/tempo_importacao.py
+"""
+Tempo de importação a frio dos módulos do LYRA.
+
+Cada medição roda em um processo Python novo (sem módulos em cache na
+memória), repetida algumas vezes; o relatório mostra a mediana por módulo.
+
+Uso:
+    python benchmarks/tempo_importacao.py --repeticoes 5 --saida benchmarks/resultados/importacao.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Módulos medidos (o app importa quase todos na inicialização; src.pontuacao é a CLI de pontuação)
+MODULOS = (
+    "src.desejabilidade",
+    "src.busca",
+    "src.modelo_compilado",
+    "src.ols_lote",
+    "src.analysis_pipeline",
+    "src.llm_api",
+    "src.cache",
+    "src.lote",
+    "src.pontuacao",
+)
+
+# Bibliotecas pesadas que não devem ser carregadas só pela importação
+PESADAS = ("statsmodels", "scipy", "matplotlib", "langchain_google_genai", "langchain_core", "google.genai")
+
+_CODIGO_MEDICAO = """
+import sys, time, json
+t0 = time.perf_counter()
+import {modulo}
+dt = time.perf_counter() - t0
+print(json.dumps({{"segundos": dt, "pesadas": [m for m in {pesadas!r} if m in sys.modules]}}))
+"""
+
+
+def medir_modulo(modulo, repeticoes=5):
+    """Mede a importação de `modulo` em `repeticoes` processos novos."""
+    tempos = []
+    pesadas = []
+    env = dict(os.environ, PYTHONPATH=RAIZ)
+    codigo = _CODIGO_MEDICAO.format(modulo=modulo, pesadas=PESADAS)
+    for _ in range(repeticoes):
+        saida = subprocess.run(
+            [sys.executable, "-c", codigo],
+            cwd=RAIZ, env=env, capture_output=True, text=True, check=True,
+        )
+        resultado = json.loads(saida.stdout.strip().splitlines()[-1])
+        tempos.append(resultado["segundos"])
+        pesadas = resultado["pesadas"]
+    return {
+        "mediana_s": statistics.median(tempos),
+        "min_s": min(tempos),
+        "max_s": max(tempos),
+        "bibliotecas_pesadas_carregadas": pesadas,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mede o tempo de importação a frio dos módulos do LYRA.")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Processos novos por módulo (padrão: 5).")
+    parser.add_argument("--saida", default=None, help="Arquivo JSON para registrar a execução.")
+    args = parser.parse_args(argv)
+
+    resultados = {}
+    for modulo in MODULOS:
+        resultados[modulo] = medir_modulo(modulo, args.repeticoes)
+        r = resultados[modulo]
+        pesadas = ", ".join(r["bibliotecas_pesadas_carregadas"]) or "-"
+        print(f"{modulo:<24} {r['mediana_s'] * 1000:8.1f} ms   pesadas: {pesadas}")
+
+    if args.saida:
+        registro = {
+            "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "repeticoes": args.repeticoes,
+            "modulos": resultados,
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(args.saida)), exist_ok=True)
+        with open(args.saida, "w", encoding="utf-8") as fp:
+            json.dump(registro, fp, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
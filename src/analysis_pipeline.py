@@ -1,14 +1,37 @@
 # src/analysis_pipeline.py
 
-import itertools
+import re
+from dataclasses import dataclass
+from itertools import combinations
+
 import numpy as np
 import pandas as pd
-import streamlit as st
-import statsmodels.api as sm
-from statsmodels.formula.api import ols
-from scipy.stats import f
-from matplotlib.patches import Patch
-import matplotlib.pyplot as plt
+
+from src.desejabilidade import (
+    desejabilidade_array,
+    desejabilidade_global,
+    alvo_padrao,
+    respostas_com_desejabilidade,
+)
+from src.artefatos import criar_artefato
+from src.cronometro import Cronometro, medir
+from src.busca import (
+    buscar_em_grade,
+    buscar_em_grade_adaptativa,
+    buscar_por_otimizacao,
+    pontos_por_variavel,
+    TAMANHO_BLOCO_PADRAO,
+    N_INICIOS_PADRAO,
+    MAX_PONTOS_GRADE,
+    MAX_AVALIACOES_ADAPTATIVA,
+)
+from src.modelo_compilado import ModeloCompilado, analisar_termo
+from src.ols_lote import ajustar_ols_em_lote
+from src.replicas import indice_de_replicas, somas_erro_puro_e_falta_de_ajuste
+from src.stepwise import selecionar_termos_stepwise
+
+# statsmodels, scipy, matplotlib e streamlit são importados dentro das funções
+# que os usam: importar este módulo não paga o custo de carregá-los.
 
 
 # ==============================================================================
@@ -21,13 +44,28 @@ def clean_name(name):
     name = name.replace(' (min)', '_min').replace(' ºC', '_C').replace(' (mg GAE/g)', '_mg_GAE_g').replace(' ( mg QE/g)', '_mg_QE_g').replace(' (µmol TE/g)', '_umol_TE_g').replace(' ', '_').replace('.', '').replace('(', '').replace(')', '').replace('º', '')
     return name
 
-def load_and_clean_data(file):
+def separar_variaveis(df, n_independentes=3):
+    """
+    Separa as colunas após 'Ensaio' em independentes (as `n_independentes`
+    primeiras) e dependentes (as restantes).
+    """
+    n_independentes = int(n_independentes)
+    if n_independentes < 1:
+        raise ValueError("O número de variáveis independentes deve ser pelo menos 1.")
+    ensaio_col_index = df.columns.get_loc('Ensaio')
+    inicio = ensaio_col_index + 1
+    independent_cols = df.columns[inicio : inicio + n_independentes].tolist()
+    dependent_cols = df.columns[inicio + n_independentes:].tolist()
+    return independent_cols, dependent_cols
+
+def load_and_clean_data(file, n_independentes=3):
     """
     Lê um arquivo de dados, limpa nomes de colunas e identifica
     dinamicamente variáveis independentes e dependentes.
+    n_independentes: quantas colunas após 'Ensaio' são fatores (padrão: 3).
     """
     try:
-        if file.name.endswith('.xlsx'):
+        if file.name.lower().endswith('.xlsx'):
             df = pd.read_excel(file, header=1)
         else:
             df = pd.read_csv(file, header=1)
@@ -41,17 +79,14 @@ def load_and_clean_data(file):
         # Converte o DataFrame para tipo numérico, tratando erros e removendo NaN
         df = df.apply(pd.to_numeric, errors='coerce').dropna()
         
-        ensaio_col_index = df.columns.get_loc('Ensaio')
-        
-        # Variáveis independentes (assume-se 3 após 'Ensaio')
-        independent_cols = df.columns[ensaio_col_index + 1 : ensaio_col_index + 4].tolist()
-        
-        # Variáveis dependentes (restantes)
-        dependent_cols = df.columns[ensaio_col_index + 4:].tolist()
+        # Variáveis independentes (n após 'Ensaio') e dependentes (restantes)
+        independent_cols, dependent_cols = separar_variaveis(df, n_independentes)
         
         return df, independent_cols, dependent_cols
     
     except Exception as e:
+        import streamlit as st
+
         st.error(f"Erro ao carregar o arquivo: {e}")
         st.info("Verifique se o arquivo possui a estrutura esperada (linha de cabeçalho correta e dados numéricos).")
         return None, None, None
@@ -61,42 +96,183 @@ def load_and_clean_data(file):
 # 2. FUNÇÕES DE ANÁLISE ESTATÍSTICA
 # ==============================================================================
 
-def plot_pareto(df, target: str, features: list, alpha=0.1):
-    """Gera o gráfico de Pareto e retorna a tabela ANOVA (função de UI/Visualização)."""
+def gerar_termos_modelo(fatores, interacoes=True, quadraticos=True, ordem_interacao=2, potencia_maxima=2):
+    """
+    Gera os termos do modelo polinomial completo para qualquer número de fatores:
+    lineares, interações (de ordem 2 até `ordem_interacao`, ex.: "a:b", "a:b:c")
+    e potências puras (de 2 até `potencia_maxima`, ex.: "I(a**2)").
+    """
+    fatores = list(fatores)
+    termos = fatores.copy()
+
+    # Interações entre fatores distintos
+    if interacoes:
+        for ordem in range(2, int(ordem_interacao) + 1):
+            termos.extend(":".join(c) for c in combinations(fatores, ordem))
+
+    # Termos quadráticos (e potências superiores, se pedidas)
+    if quadraticos:
+        for potencia in range(2, int(potencia_maxima) + 1):
+            termos.extend(f"I({col}**{potencia})" for col in fatores)
+
+    return termos
+
+@dataclass
+class AjusteAlvo:
+    """
+    Resultado do ajuste de um target: modelo OLS e ANOVA Tipo 2, calculados
+    uma única vez e reaproveitados por Pareto, seleção de features e métricas.
+    """
+    target: str
+    features: list
+    modelo: object
+    anova: pd.DataFrame
+
+def ajustar_alvo(df, target, features):
+    """Ajusta o modelo OLS e a ANOVA Tipo 2 de um target; retorna AjusteAlvo ou None."""
+    import statsmodels.api as sm
+    from statsmodels.formula.api import ols
+
+    features = [f for f in features if f != 'Intercept']
+
+    if not features:
+        return None
+
     formula = target + " ~ " + " + ".join(features)
     modelo = ols(formula, data=df).fit()
-    anova_df = sm.stats.anova_lm(modelo, typ=2).dropna()
+    anova_df = sm.stats.anova_lm(modelo, typ=2)
+    return AjusteAlvo(target=target, features=features, modelo=modelo, anova=anova_df)
+
+def _anova_para_pareto(anova, alpha):
+    """ANOVA sem a linha de resíduo, com a coluna "significativo", ordenada por sum_sq."""
+    anova_df = anova.dropna().copy()
     anova_df["significativo"] = anova_df["PR(>F)"] <= alpha
-    anova_sorted = anova_df.sort_values("sum_sq", ascending=False)
-    
-    # Lógica de plotagem
+    return anova_df.sort_values("sum_sq", ascending=False)
+
+def desenhar_pareto(ax, anova, target, alpha=0.1, titulo=None, legenda=True):
+    """
+    Desenha o gráfico de Pareto de uma ANOVA Tipo 2 já calculada em um Axes
+    (API orientada a objetos, sem estado global do pyplot).
+    Retorna a tabela ANOVA ordenada.
+    """
+    from matplotlib.patches import Patch
+
+    anova_sorted = _anova_para_pareto(anova, alpha)
     num_significativas = anova_sorted["significativo"].sum()
     cores = ["tab:blue" if sig else "lightgray" for sig in anova_sorted["significativo"]]
-    
-    plt.figure(figsize=(10, 6))
-    plt.barh(anova_sorted.index, anova_sorted["sum_sq"], color=cores)
-    plt.xlabel("Soma dos Quadrados (sum_sq)")
-    plt.title(f"Gráfico de Pareto - Variável Resposta: {target.upper()}")
-    plt.gca().invert_yaxis()
-    plt.grid(False)
-    
+
+    ax.barh(anova_sorted.index, anova_sorted["sum_sq"], color=cores)
+    ax.set_xlabel("Soma dos Quadrados (sum_sq)")
+    ax.set_title(titulo or f"Gráfico de Pareto - Variável Resposta: {target.upper()}")
+    ax.invert_yaxis()
+    ax.grid(False)
+
     if num_significativas < len(anova_sorted):
-        plt.axhline(
+        ax.axhline(
             y=len(anova_sorted) - num_significativas + 0.5,
             color='red', linestyle='--', linewidth=2, label='Corte de Significância'
         )
-        plt.legend(handles=[
-            Patch(color='tab:blue', label='Significativo', alpha=0.7),
-            Patch(color='lightgray', label='Não Significativo'),
-            Patch(color='red', linestyle='--', label='Corte de Significância')
-        ])
+        if legenda:
+            ax.legend(handles=[
+                Patch(color='tab:blue', label='Significativo', alpha=0.7),
+                Patch(color='lightgray', label='Não Significativo'),
+                Patch(color='red', linestyle='--', label='Corte de Significância')
+            ])
+    return anova_sorted
+
+def figura_pareto(anova, target, alpha=0.1):
+    """Figure (matplotlib.figure.Figure, fora do pyplot) com o Pareto de um target."""
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(10, 6))
+    desenhar_pareto(fig.subplots(), anova, target, alpha)
+    fig.tight_layout()
+    return fig
+
+def figura_pareto_multipla(anovas, alpha=0.1, n_colunas=2):
+    """
+    Small multiples: um painel de Pareto por target em uma única Figure.
+    anovas: dict {target: ANOVA Tipo 2}.
+    """
+    from matplotlib.figure import Figure
+
+    n = len(anovas)
+    n_colunas = max(1, min(int(n_colunas), n))
+    n_linhas = -(-n // n_colunas)
+    fig = Figure(figsize=(6 * n_colunas, 4 * n_linhas))
+    axes = fig.subplots(n_linhas, n_colunas, squeeze=False).ravel()
+    for k, (ax, (target, anova)) in enumerate(zip(axes, anovas.items())):
+        desenhar_pareto(ax, anova, target, alpha, titulo=target, legenda=(k == 0))
+    for ax in axes[n:]:
+        ax.set_visible(False)
+    fig.tight_layout()
+    return fig
+
+def figura_para_png(fig, dpi=200):
+    """Rasteriza uma Figure em bytes PNG."""
+    import io
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=dpi, bbox_inches="tight")
+    return buffer.getvalue()
+
+def plot_pareto(df, target: str, features: list, alpha=0.1, anova=None):
+    """
+    Gera o gráfico de Pareto e retorna a tabela ANOVA (função de UI/Visualização).
+    Se `anova` (ANOVA Tipo 2 já calculada) for informada, o modelo não é reajustado.
+    Desenha na figura corrente do pyplot; para imagens em cache, ver `figura_pareto`.
+    """
+    import matplotlib.pyplot as plt
+
+    if anova is None:
+        import statsmodels.api as sm
+        from statsmodels.formula.api import ols
+
+        formula = target + " ~ " + " + ".join(features)
+        modelo = ols(formula, data=df).fit()
+        anova = sm.stats.anova_lm(modelo, typ=2)
+
+    plt.figure(figsize=(10, 6))
+    anova_sorted = desenhar_pareto(plt.gca(), anova, target, alpha)
     plt.tight_layout()
     
     return anova_sorted 
 
-def selecionar_features_significativas(modelo, p_thresh=0.1):
+def selecionar_termos(df, target, anova, p_thresh=0.10, selecao="pvalor"):
+    """
+    Seleciona os termos do modelo reduzido a partir da ANOVA do modelo completo.
+
+    selecao: "pvalor" (todos os termos com p <= p_thresh de uma vez) ou um modo
+    stepwise ("backward", "forward", "hierarquico"; ver src/stepwise.py).
+    Retorna (significantes, nao_significantes, anova sem NaN, bloco da seleção);
+    o bloco traz o método, o caminho de inclusões/remoções e os p-valores finais
+    (vazio no modo "pvalor"). Se o stepwise não for possível, usa "pvalor".
+    """
+    significantes, nao_significantes, anova_df = selecionar_features_significativas(
+        None, p_thresh=p_thresh, anova=anova
+    )
+    if selecao == "pvalor":
+        return significantes, nao_significantes, anova_df, {}
+
+    termos = anova_df.index.tolist()
+    try:
+        passo = selecionar_termos_stepwise(df, target, termos, modo=selecao, alpha=p_thresh)
+    except ValueError as e:
+        return significantes, nao_significantes, anova_df, {"metodo": "pvalor", "mensagem": str(e)}
+
+    selecionados = set(passo.termos)
+    significantes = [t for t in termos if t in selecionados]
+    nao_significantes = [t for t in termos if t not in selecionados]
+    bloco = {"metodo": selecao, "caminho": passo.caminho, "p_valores": passo.p_valores}
+    return significantes, nao_significantes, anova_df, bloco
+
+def selecionar_features_significativas(modelo, p_thresh=0.1, anova=None):
     """Seleciona as features significativas e não significativas com base nos p-valores."""
-    anova = sm.stats.anova_lm(modelo, typ=2).dropna()
+    if anova is None:
+        import statsmodels.api as sm
+
+        anova = sm.stats.anova_lm(modelo, typ=2)
+    anova = anova.dropna()
     # Termos significativos
     significantes = anova[anova['PR(>F)'] <= p_thresh].index.tolist()
     # Termos não significativos
@@ -105,15 +281,10 @@ def selecionar_features_significativas(modelo, p_thresh=0.1):
 
 def ajustar_modelo(df, target, features):
     """Ajusta um modelo de regressão OLS e retorna o modelo e a ANOVA completa (ANOVA Typ 2)."""
-    features = [f for f in features if f != 'Intercept']
-    
-    if not features:
+    ajuste = ajustar_alvo(df, target, features)
+    if ajuste is None:
         return None, None
-        
-    formula = target + " ~ " + " + ".join(features)
-    modelo = ols(formula, data=df).fit()
-    anova_df = sm.stats.anova_lm(modelo, typ=2)
-    return modelo, anova_df
+    return ajuste.modelo, ajuste.anova
 
 def extrair_variaveis_originais(modelo):
     """
@@ -134,17 +305,19 @@ def extrair_variaveis_originais(modelo):
             variaveis.add(nome)
     return sorted(variaveis)
 
-def avaliar_modelo_anova(modelo, df, target, alpha=0.10):
+def avaliar_modelo_anova(modelo, df, target, alpha=0.10, anova=None):
     """
     Calcula e retorna as métricas de qualidade do modelo em um dicionário,
     incluindo Falta de Ajuste (Lack-of-Fit - LoF).
+    `anova`: ANOVA Tipo 2 já calculada para o modelo (evita recalcular).
     """
-    df = df.copy()
+    from scipy.stats import f
+
     variaveis_originais = extrair_variaveis_originais(modelo)
     
-    # 1. Agrupamento e Cálculo de Média
+    # 1. Grupos de réplicas (índice compartilhado por todas as respostas do dataset)
     try:
-        grupos = df.groupby(variaveis_originais)
+        indice = indice_de_replicas(df, variaveis_originais)
     except Exception:
         # Se LoF não for aplicável
         return {
@@ -153,23 +326,20 @@ def avaliar_modelo_anova(modelo, df, target, alpha=0.10):
             "Predicao Ajustada": "Não Aplicável (dados contínuos)"
         }, None, None
 
-
-    df["y_medio"] = grupos[target].transform("mean")
-    df["y_predito"] = modelo.fittedvalues
+    y = df[target].to_numpy(dtype=float)
+    y_predito = modelo.fittedvalues.reindex(df.index).to_numpy(dtype=float)
 
     # 2. Cálculo das Somas dos Quadrados (SS)
-    SSPE = np.sum((df[target] - df["y_medio"])**2) # Pure Error
-    SSLoF = np.sum((df["y_medio"] - df["y_predito"])**2) # Lack of Fit
+    SSPE, SSLoF = somas_erro_puro_e_falta_de_ajuste(indice, y, y_predito) # Pure Error e Lack of Fit
     SSE = SSPE + SSLoF # Soma dos Quadrados do Erro (Residuo)
-    SSR = np.sum((df["y_predito"] - df[target].mean())**2) # Soma dos Quadrados da Regressão
+    SSR = np.sum((y_predito - y.mean())**2) # Soma dos Quadrados da Regressão
     SST = SSR + SSE # Soma dos Quadrados Total
 
     # 3. Graus de Liberdade (gl)
-    N = len(df)
-    r = grupos.ngroups # Número de grupos/níveis únicos
+    N = indice.n
     p = len(modelo.params) # Número de parâmetros no modelo
-    gl_PE = N - r # gl do Erro Puro
-    gl_LoF = r - p # gl da Falta de Ajuste
+    gl_PE = indice.gl_erro_puro # gl do Erro Puro
+    gl_LoF = indice.gl_falta_de_ajuste(p) # gl da Falta de Ajuste
     gl_Res = gl_PE + gl_LoF # gl do Resíduo (Erro)
     gl_Reg = p - 1 # gl da Regressão
     gl_Total = N - 1
@@ -200,7 +370,11 @@ def avaliar_modelo_anova(modelo, df, target, alpha=0.10):
     }
     
     # A tabela ANOVA completa (Tipo 2)
-    anova_completa = sm.stats.anova_lm(modelo, typ=2).fillna(np.nan).to_dict("index")
+    if anova is None:
+        import statsmodels.api as sm
+
+        anova = sm.stats.anova_lm(modelo, typ=2)
+    anova_completa = anova.fillna(np.nan).to_dict("index")
     
     # Resumo de Parâmetros (Coeficientes)
     params_summary = modelo.params.to_dict()
@@ -219,71 +393,88 @@ def avaliar_modelo_anova(modelo, df, target, alpha=0.10):
 def _base_vars_from_model(modelo):
     """
     Extrai variáveis-base (originais) a partir de exog_names,
-    tratando I(x**2) e interações a:b.
+    tratando I(x**2) e interações de qualquer ordem (a:b, a:b:c, ...).
     """
     base = set()
     for name in modelo.model.exog_names:
         if name == "Intercept":
             continue
-        if name.startswith("I("):
-            inner = name[2:-1] 
-            var = inner.replace("**", " ").split()[0]
-            base.add(var)
-        elif ":" in name:
-            a, b = name.split(":")
-            base.add(a); base.add(b)
-        else:
-            base.add(name)
+        for parte in name.split(":"):
+            parte = parte.strip()
+            if parte.startswith("I("):
+                var = parte[2:-1].replace("**", " ").split()[0]
+                base.add(var)
+            else:
+                base.add(parte)
     return sorted(base)
 
 def _prepare_design_df_from_base(grid_df, modelo, df_ref):
     """
     A partir de um DF com variáveis-base, cria as colunas exigidas pelo modelo
     (I(x**2), interações, etc.), preservando nomes idênticos aos do modelo.
+    As colunas são calculadas em um dicionário e o DataFrame é montado uma
+    única vez (sem inserir coluna a coluna).
     """
-    X = grid_df.copy()
+    colunas = {c: grid_df[c] for c in grid_df.columns}
+
+    def coluna(nome):
+        # Variável ausente da grade: fixada na média do dataset (ou 0)
+        if nome not in colunas:
+            valor = df_ref[nome].mean() if nome in df_ref.columns else 0.0
+            colunas[nome] = pd.Series(valor, index=grid_df.index, dtype=float)
+        return colunas[nome]
 
     # Garante que todas as variáveis-base existam
     for b in _base_vars_from_model(modelo):
-        if b not in X.columns:
-            if b in df_ref.columns:
-                X[b] = df_ref[b].mean()
-            else:
-                X[b] = 0.0 
+        coluna(b)
 
     # Cria termos do modelo
+    termos = {}
     for name in modelo.model.exog_names:
-        if name == "Intercept":
-            continue
-        if name in X.columns:
+        if name == "Intercept" or name in colunas:
             continue
 
         if name.startswith("I("):
             expr = name[2:-1]
             # Eval permite calcular termos como x**2 diretamente
-            X[name] = eval(expr, {}, {col: X[col] for col in X.columns})
+            termos[name] = eval(expr, {}, dict(colunas))
         elif ":" in name:
-            a, b = name.split(":")
-            if a not in X.columns and a in df_ref.columns:
-                X[a] = df_ref[a].mean()
-            if b not in X.columns and b in df_ref.columns:
-                X[b] = df_ref[b].mean()
-            X[name] = X[a] * X[b]
+            produto = None
+            for parte in name.split(":"):
+                fator = coluna(parte.strip())
+                produto = fator if produto is None else produto * fator
+            termos[name] = produto
         else:
-            if name not in X.columns:
-                if name in df_ref.columns:
-                    X[name] = df_ref[name].mean()
-                else:
-                    X[name] = 0.0
+            coluna(name)
+    colunas.update(termos)
 
+    X = pd.DataFrame(colunas, index=grid_df.index)
     needed = [c for c in modelo.model.exog_names if c != "Intercept"]
     cols = [c for c in needed if c in X.columns] + [c for c in X.columns if c not in needed]
     return X[cols]
 
-def _predict_from_base_grid(modelo, base_grid_df, df_ref):
+def _compilar_modelo(modelo):
+    """
+    Compila o modelo para predição vetorizada; retorna None se algum termo
+    não for suportado (nesse caso usa-se o caminho via patsy).
+    """
+    try:
+        return ModeloCompilado.de_modelo(modelo)
+    except ValueError:
+        return None
+
+def _predict_from_base_grid(modelo, base_grid_df, df_ref, compilado=None):
     """
     Recebe DF com variáveis-base e retorna predições após construir termos.
     """
+    if compilado is None:
+        compilado = _compilar_modelo(modelo)
+    if compilado is not None:
+        padroes = {b: df_ref[b].mean() for b in compilado.base_vars if b in df_ref.columns}
+        colunas = {c: base_grid_df[c].to_numpy(dtype=float) for c in base_grid_df.columns}
+        yhat = compilado.predict(compilado.montar_base(colunas, padroes, n=len(base_grid_df)))
+        return pd.Series(yhat, index=base_grid_df.index)
+
     design = _prepare_design_df_from_base(base_grid_df, modelo, df_ref)
     return modelo.predict(design)
 
@@ -291,74 +482,209 @@ def _predict_from_base_grid(modelo, base_grid_df, df_ref):
 # Funções de desejabilidade
 # ---------------------------
 
-def _desejabilidade_scaler(y, L, T, s=1.0, direction="higher"):
+def _desejabilidade_scaler(y, L, T, s=1.0, direction="higher", alvo=None, t=1.0):
     """
-    Desejabilidade unidirecional (0..1).
+    Desejabilidade (0..1) de um único valor. Para arrays, use `desejabilidade_array`.
     """
-    y = float(y)
-    if T == L:
-        return 0.0
-    
-    if y < L:
-        return 0.0
-    if y > T:
-        return 1.0
-    return ((y - L) / (T - L)) ** s
+    return float(desejabilidade_array(float(y), L, T, s, direction=direction, alvo=alvo, t=t))
 
 def _make_model_function_code(target, modelo):
     """
-    Gera código Python de uma função do modelo.
+    Gera código Python de uma função do modelo (coeficientes com precisão
+    completa, para reproduzir `modelo.predict`).
     """
     lines = []
     fname = f"modelo_{target}".replace(" ", "_")
     lines.append(f"def {fname}(x):")
-    lines.append("    \"\"\"")
-    lines.append("    x: dict com variáveis-base (ex.: {'tempo_shaker': ..., 'tempo_ultrassom': ..., 'temperatura': ...})")
-    lines.append("    Retorna a predição do modelo para os valores em x.")
-    lines.append("    \"\"\"")
+    lines.append("    \"\"\"")
+    lines.append("    x: dict com variáveis-base (ex.: {'tempo_shaker': ..., 'tempo_ultrassom': ..., 'temperatura': ...})")
+    lines.append("    Retorna a predição do modelo para os valores em x.")
+    lines.append("    \"\"\"")
     intercept = float(modelo.params.get("Intercept", 0.0))
-    lines.append(f"    y = {intercept:.10f}")
+    lines.append(f"    y = {intercept!r}")
+
+    base_vars = set(_base_vars_from_model(modelo))
+
+    def ler_variavel(m):
+        # Troca apenas nomes completos (Fator_1 não casa dentro de Fator_10)
+        nome = m.group(0)
+        return f"x['{nome}']" if nome in base_vars else nome
 
-    base_vars = _base_vars_from_model(modelo)
     for name, coef in modelo.params.items():
         if name == "Intercept":
             continue
         coef = float(coef)
         if name.startswith("I("):
-            inner = name[2:-1] 
-            expr = inner
-            for b in base_vars:
-                expr = expr.replace(b, f"x['{b}']") 
-            lines.append(f"    y += ({coef:.10f}) * ({expr})")
+            expr = re.sub(r"[A-Za-z_]\w*", ler_variavel, name[2:-1])
+            lines.append(f"    y += ({coef!r}) * ({expr})")
         elif ":" in name:
-            a, b = name.split(":")
-            lines.append(f"    y += ({coef:.10f}) * (x['{a}'] * x['{b}'])")
+            produto = " * ".join(f"x['{parte.strip()}']" for parte in name.split(":"))
+            lines.append(f"    y += ({coef!r}) * ({produto})")
         else:
-            lines.append(f"    y += ({coef:.10f}) * (x['{name}'])")
+            lines.append(f"    y += ({coef!r}) * (x['{name}'])")
 
-    lines.append("    return y")
+    lines.append("    return y")
     return "\n".join(lines)
 
-def _make_desirability_function_code(target, L, T):
+def _expressao_produto(fatores):
+    """Expressão NumPy de Π v[var] ** pot (ou "1.0" para o termo constante)."""
+    partes = [f"v['{var}']" if pot == 1 else f"v['{var}'] ** {pot}" for var, pot in fatores.items() if pot > 0]
+    return " * ".join(partes) or "1.0"
+
+def _make_model_function_code_vetorizado(target, modelo):
+    """
+    Gera código Python/NumPy vetorizado do modelo e do seu gradiente.
+
+    As funções recebem um mapeamento {variável-base: array} (dict de arrays
+    ou DataFrame) e avaliam todos os pontos de uma vez. Retorna None se algum
+    termo não for um produto de potências das variáveis-base.
+    """
+    try:
+        termos = [(nome, analisar_termo(nome), float(coef)) for nome, coef in modelo.params.items()]
+    except ValueError:
+        return None
+
+    sufixo = f"{target}".replace(" ", "_")
+    base_vars = sorted({var for _, fatores, _ in termos for var in fatores})
+    leitura = f"    v = {{b: np.asarray(x[b], dtype=float) for b in {tuple(base_vars)!r}}}"
+
+    lines = ["import numpy as np", "", ""]
+    lines.append(f"def modelo_{sufixo}_vetorizado(x):")
+    lines.append("    \"\"\"")
+    lines.append("    x: mapeamento {variável-base: array} (dict de arrays NumPy ou DataFrame).")
+    lines.append("    Retorna um array com a predição do modelo em cada ponto.")
+    lines.append("    \"\"\"")
+    lines.append(leitura)
+    intercept = sum(coef for _, fatores, coef in termos if not fatores)
+    lines.append(f"    y = np.full(np.broadcast(*v.values()).shape, {intercept!r})")
+    for nome, fatores, coef in termos:
+        if fatores:
+            lines.append(f"    y += ({coef!r}) * ({_expressao_produto(fatores)})")
+    lines.append("    return y")
+
+    lines += ["", ""]
+    lines.append(f"def gradiente_modelo_{sufixo}(x):")
+    lines.append("    \"\"\"")
+    lines.append("    x: mapeamento {variável-base: array} (dict de arrays NumPy ou DataFrame).")
+    lines.append("    Retorna {variável-base: array} com a derivada parcial da predição em cada ponto.")
+    lines.append("    \"\"\"")
+    lines.append(leitura)
+    lines.append("    forma = np.broadcast(*v.values()).shape")
+    lines.append("    g = {b: np.zeros(forma) for b in v}")
+    for nome, fatores, coef in termos:
+        for var, pot in fatores.items():
+            # d/dvar (var^pot · resto) = pot · var^(pot-1) · resto
+            restantes = dict(fatores)
+            restantes[var] = pot - 1
+            lines.append(f"    g['{var}'] += ({coef * pot!r}) * ({_expressao_produto(restantes)})")
+    lines.append("    return g")
+    return "\n".join(lines)
+
+def verificar_modelo_exportado(modelo, target, df_ref, codigo_escalar, codigo_vetorizado,
+                               n_pontos=200, semente=0, tolerancia=1e-8):
+    """
+    Confere os códigos exportados contra `modelo.predict` em pontos aleatórios
+    (uniformes entre o mínimo e o máximo de cada variável-base no dataset).
+
+    O gradiente exportado é comparado ao gradiente analítico do modelo
+    compilado. Os erros são relativos à maior predição (ou derivada) em
+    valor absoluto; `equivalente` é True se todos ficarem abaixo de `tolerancia`.
+    """
+    base_vars = _base_vars_from_model(modelo)
+    rng = np.random.default_rng(semente)
+    pontos = {}
+    for b in base_vars:
+        if b in df_ref.columns:
+            lo, hi = float(df_ref[b].min()), float(df_ref[b].max())
+        else:
+            lo, hi = 0.0, 1.0
+        pontos[b] = rng.uniform(lo, hi, n_pontos)
+    pontos_df = pd.DataFrame(pontos)
+    referencia = np.asarray(modelo.predict(_prepare_design_df_from_base(pontos_df, modelo, df_ref)), dtype=float)
+
+    def erro_relativo(obtido, esperado):
+        escala = max(float(np.max(np.abs(esperado))), np.finfo(float).tiny)
+        return float(np.max(np.abs(np.asarray(obtido, dtype=float) - esperado)) / escala)
+
+    sufixo = f"{target}".replace(" ", "_")
+    verificacao = {"n_pontos": int(n_pontos), "tolerancia": tolerancia}
+
+    escopo = {}
+    exec(codigo_escalar, escopo)
+    funcao = escopo[f"modelo_{sufixo}"]
+    escalar = [funcao({b: pontos[b][i] for b in base_vars}) for i in range(n_pontos)]
+    verificacao["erro_max_escalar"] = erro_relativo(escalar, referencia)
+
+    if codigo_vetorizado is not None:
+        escopo = {}
+        exec(codigo_vetorizado, escopo)
+        verificacao["erro_max_vetorizado"] = erro_relativo(
+            escopo[f"modelo_{sufixo}_vetorizado"](pontos), referencia
+        )
+        compilado = ModeloCompilado.de_modelo(modelo)
+        gradiente = escopo[f"gradiente_modelo_{sufixo}"](pontos)
+        obtido = np.column_stack([gradiente[b] for b in compilado.base_vars])
+        esperado = compilado.gradiente(compilado.montar_base(pontos, n=n_pontos))
+        verificacao["erro_max_gradiente"] = erro_relativo(obtido, esperado)
+
+    erros = [v for k, v in verificacao.items() if k.startswith("erro_max")]
+    verificacao["equivalente"] = bool(all(e <= tolerancia for e in erros))
+    return verificacao
+
+def _make_desirability_function_code(target, L, T, direction="higher", alvo=None, t=1.0):
     """
     Gera código Python da função de desejabilidade.
     """
     fname = f"desejabilidade_{target}".replace(" ", "_")
+    if direction == "lower":
+        return f"""def {fname}(y, L={L:.10f}, T={T:.10f}, s=1):
+    \"\"\"
+    Desejabilidade unidirecional (minimizar) para {target} (0..1).
+    L: limite inferior (min observado no dataset)
+    T: limite superior (max observado no dataset)
+    s: parâmetro de forma (default=1)
+    \"\"\"
+    y = float(y)
+    if T == L:
+        return 0.0
+    if y > T:
+        return 0.0
+    if y < L:
+        return 1.0
+    return ((T - y) / (T - L)) ** s
+"""
+    if direction == "target":
+        alvo = alvo_padrao(L, T, alvo)
+        return f"""def {fname}(y, L={L:.10f}, T={T:.10f}, alvo={alvo:.10f}, s=1, t={t}):
+    \"\"\"
+    Desejabilidade bilateral (alvo) para {target} (0..1).
+    L: limite inferior (min observado no dataset)
+    T: limite superior (max observado no dataset)
+    alvo: valor ideal da resposta
+    s, t: parâmetros de forma à esquerda e à direita do alvo
+    \"\"\"
+    y = float(y)
+    if T == L or y < L or y > T:
+        return 0.0
+    if y <= alvo:
+        return ((y - L) / (alvo - L)) ** s if alvo > L else 1.0
+    return ((T - y) / (T - alvo)) ** t if T > alvo else 1.0
+"""
     return f"""def {fname}(y, L={L:.10f}, T={T:.10f}, s=1):
-    \"\"\"
-    Desejabilidade unidirecional para {target} (0..1).
-    L: limite inferior (min observado no dataset)
-    T: limite superior (max observado no dataset)
-    s: parâmetro de forma (default=1)
-    \"\"\"
-    y = float(y)
-    if T == L:
-        return 0.0
-    if y < L:
-        return 0.0
-    if y > T:
-        return 1.0
-    return ((y - L) / (T - L)) ** s
+    \"\"\"
+    Desejabilidade unidirecional para {target} (0..1).
+    L: limite inferior (min observado no dataset)
+    T: limite superior (max observado no dataset)
+    s: parâmetro de forma (default=1)
+    \"\"\"
+    y = float(y)
+    if T == L:
+        return 0.0
+    if y < L:
+        return 0.0
+    if y > T:
+        return 1.0
+    return ((y - L) / (T - L)) ** s
 """
 
 def to_serializable(df_or_none):
@@ -375,6 +701,62 @@ def to_serializable(df_or_none):
 # Pipeline dinâmico para desejabilidade
 # ----------------------------------------
 
+def _espacos_de_busca(df, base_vars, n_points):
+    """
+    Espaços de busca {var: (min, max, n_points)} a partir do dataset.
+    """
+    search_spaces = {}
+    for v in base_vars:
+        if v in df.columns:
+            vmin = float(df[v].min())
+            vmax = float(df[v].max())
+            if not np.isfinite(vmin) or not np.isfinite(vmax):
+                continue
+            if np.isclose(vmin, vmax):
+                vmin -= 1e-6
+                vmax += 1e-6
+            search_spaces[v] = (vmin, vmax, int(n_points))
+    return search_spaces
+
+def _limitar_grade(search_spaces, n_points, max_pontos=MAX_PONTOS_GRADE):
+    """
+    Reduz os pontos por variável para que a grade completa caiba em
+    `max_pontos`. Retorna (search_spaces, n_points efetivo, nota para a mensagem).
+    """
+    n_grade = pontos_por_variavel(n_points, len(search_spaces), max_pontos)
+    if n_grade >= int(n_points):
+        return search_spaces, int(n_points), ""
+    espacos = {v: (vmin, vmax, n_grade) for v, (vmin, vmax, _) in search_spaces.items()}
+    limite = f"{max_pontos:,}".replace(",", ".")
+    nota = (
+        f" ({int(n_points)} pontos por variável excederiam {limite} pontos "
+        f"com {len(search_spaces)} variáveis; grade reduzida)"
+    )
+    return espacos, n_grade, nota
+
+def _limites_desejabilidade(df, target):
+    """
+    Limites L/T da desejabilidade (mínimo e máximo observados do target).
+    """
+    L = float(df[target].min())
+    T = float(df[target].max())
+    if not np.isfinite(L) or not np.isfinite(T):
+        L, T = 0.0, 1.0
+    if np.isclose(L, T):
+        L -= 1e-6
+        T += 1e-6
+    return L, T
+
+def artefato_do_modelo(modelo, df, target, direction="higher", alvo=None, s=1.0, t=1.0):
+    """
+    Artefato JSON do modelo reduzido (ver src/artefatos.py), com os limites
+    L/T da desejabilidade e a faixa observada das variáveis-base, para
+    pontuar novas condições sem reajustar (src/pontuacao.py).
+    """
+    L, T = _limites_desejabilidade(df, target)
+    espacos = _espacos_de_busca(df, _base_vars_from_model(modelo), 2)
+    return criar_artefato(modelo, target, L, T, direcao=direction, alvo=alvo, s=s, t=t, search_spaces=espacos)
+
 def run_global_desejabilidade_if_applicable(
     modelo_reduzido,
     df,
@@ -385,10 +767,33 @@ def run_global_desejabilidade_if_applicable(
     top_k=50,
     r2_threshold=0.50,
     direction="higher",
-    desej_col_name="desejabilidade"
+    desej_col_name="desejabilidade",
+    alvo=None,
+    t=1.0,
+    tamanho_bloco=TAMANHO_BLOCO_PADRAO,
+    metodo="grade",
+    n_inicios=N_INICIOS_PADRAO,
+    semente=0,
+    max_pontos_grade=MAX_PONTOS_GRADE,
+    max_avaliacoes=MAX_AVALIACOES_ADAPTATIVA,
+    verificar_exportacao=False,
 ):
     """
     Executa a desejabilidade para um target APENAS se R² >= r2_threshold.
+
+    direction: "higher" (maximizar), "lower" (minimizar) ou "target" (bilateral,
+    com valor ideal `alvo` e expoentes de forma `s` à esquerda e `t` à direita).
+    tamanho_bloco: número de pontos da grade avaliados por vez; a memória de pico
+    não depende do tamanho total da grade (n_points ** n_variaveis).
+    metodo: "grade" (linspace com n_points por variável), "otimizador"
+    (L-BFGS-B multistart com `n_inicios` partidas e gradiente analítico do modelo)
+    ou "adaptativa" (grade grossa com n_points por variável refinada em torno
+    dos melhores pontos, até `max_avaliacoes` avaliações do modelo).
+    max_pontos_grade: limite da grade completa; com muitos fatores os pontos
+    por variável são reduzidos até caber.
+    verificar_exportacao: confere os códigos exportados com `modelo.predict`
+    (ver `verificar_modelo_exportado`); fica fora do caminho padrão por custar
+    uma predição via patsy e a execução dos códigos gerados.
     """
     if modelo_reduzido is None:
         return {
@@ -408,6 +813,7 @@ def run_global_desejabilidade_if_applicable(
                 "O processo de desejabilidade não será executado."
             ),
             "model_function_code": None,
+            "model_function_code_numpy": None,
             "desirability_function_code": None,
             "search_spaces": {},
             "resultado_df": None,
@@ -417,36 +823,21 @@ def run_global_desejabilidade_if_applicable(
     base_vars = _base_vars_from_model(modelo_reduzido)
 
     # Espaços de busca a partir do dataset
-    search_spaces = {}
-    for v in base_vars:
-        if v in df.columns:
-            vmin = float(df[v].min())
-            vmax = float(df[v].max())
-            if not np.isfinite(vmin) or not np.isfinite(vmax):
-                continue
-            if np.isclose(vmin, vmax):
-                vmin -= 1e-6
-                vmax += 1e-6
-            search_spaces[v] = (vmin, vmax, int(n_points))
-
-    # Combinações
-    grids = [np.linspace(vmin, vmax, n) for (vmin, vmax, n) in search_spaces.values()]
-    combos = list(itertools.product(*grids)) if grids else []
+    search_spaces = _espacos_de_busca(df, base_vars, n_points)
 
     # Limites L/T do target
-    L = float(df[target].min())
-    T = float(df[target].max())
-    if not np.isfinite(L) or not np.isfinite(T):
-        L, T = 0.0, 1.0
-    if np.isclose(L, T):
-        L -= 1e-6
-        T += 1e-6
+    L, T = _limites_desejabilidade(df, target)
 
     # Mensagens & códigos
     model_code = _make_model_function_code(target, modelo_reduzido)
-    desir_code = _make_desirability_function_code(target, L, T)
+    model_code_np = _make_model_function_code_vetorizado(target, modelo_reduzido)
+    verificacao_exportacao = (
+        verificar_modelo_exportado(modelo_reduzido, target, df, model_code, model_code_np)
+        if verificar_exportacao else None
+    )
+    desir_code = _make_desirability_function_code(target, L, T, direction=direction, alvo=alvo, t=t)
 
-    if not combos:
+    if not search_spaces:
         return {
             "aplica_desejabilidade": True,
             "r2": r2,
@@ -455,37 +846,79 @@ def run_global_desejabilidade_if_applicable(
                 "mas não foi possível gerar espaço de busca das variáveis-base."
             ),
             "model_function_code": model_code,
+            "model_function_code_numpy": model_code_np,
+            "model_export_check": verificacao_exportacao,
             "desirability_function_code": desir_code,
             "search_spaces": search_spaces,
             "resultado_df": None,
         }
 
-    base_grid_df = pd.DataFrame(combos, columns=base_vars)
+    grid_vars = list(search_spaces)
+
+    # Modelo compilado uma única vez (sem eval/patsy por bloco)
+    compilado = _compilar_modelo(modelo_reduzido)
+    if compilado is not None:
+        padroes = {b: df[b].mean() for b in compilado.base_vars if b in df.columns}
 
-    # Predição
-    yhat = _predict_from_base_grid(modelo_reduzido, base_grid_df, df)
+    def completar_base(X):
+        # Monta a matriz de variáveis-base do modelo a partir das variáveis da grade
+        colunas = {v: X[:, j] for j, v in enumerate(grid_vars)}
+        return compilado.montar_base(colunas, padroes, n=len(X))
 
-    # Desejabilidade
-    d_vals = yhat.apply(lambda yy: _desejabilidade_scaler(yy, L, T, s, direction=direction))
+    def pontuar(yhat):
+        return desejabilidade_array(yhat, L, T, s, direction=direction, alvo=alvo, t=t)
+
+    def avaliar_bloco(X):
+        # Predição e desejabilidade de um bloco da grade
+        if compilado is not None:
+            yhat = compilado.predict(completar_base(X))
+        else:
+            bloco_df = pd.DataFrame(X, columns=grid_vars)
+            yhat = np.asarray(_predict_from_base_grid(modelo_reduzido, bloco_df, df), dtype=float)
+        return pontuar(yhat), yhat
 
-    # Filtragem por intervalo
     d_low, d_high = d_interval
-    mask = (d_vals >= d_low) & (d_vals <= d_high)
 
-    out = base_grid_df.copy()
-    out[f"{target}_previsto"] = yhat.values
-    out[desej_col_name] = d_vals.values
-    out = out.loc[mask].sort_values(desej_col_name, ascending=False).reset_index(drop=True)
+    # O otimizador depende do gradiente analítico do modelo compilado
+    if metodo == "otimizador" and compilado is not None:
+        pos_grade = [compilado.base_vars.index(v) for v in grid_vars]
+        busca = buscar_por_otimizacao(
+            search_spaces,
+            prever=lambda X: compilado.predict(completar_base(X)),
+            gradiente=lambda X: compilado.gradiente(completar_base(X))[:, pos_grade],
+            pontuar=pontuar,
+            alvos_y=respostas_com_desejabilidade(d_high, L, T, s, direction=direction, alvo=alvo, t=t),
+            escala=T - L,
+            d_interval=d_interval,
+            top_k=top_k,
+            n_inicios=n_inicios,
+            semente=semente,
+        )
+        descricao_busca = f"usando otimização multistart ({n_inicios} partidas, {busca['n_avaliacoes']} avaliações do modelo)."
+    elif metodo == "adaptativa":
+        busca = buscar_em_grade_adaptativa(
+            search_spaces, avaliar_bloco, d_interval, top_k=top_k,
+            max_avaliacoes=max_avaliacoes, tamanho_bloco=tamanho_bloco,
+        )
+        descricao_busca = _descricao_adaptativa(busca)
+    elif metodo in ("grade", "otimizador"):
+        # Varredura da grade em blocos, mantendo apenas os top-k no intervalo
+        search_spaces, n_grade, nota = _limitar_grade(search_spaces, n_points, max_pontos_grade)
+        busca = buscar_em_grade(search_spaces, avaliar_bloco, d_interval, top_k=top_k, tamanho_bloco=tamanho_bloco)
+        descricao_busca = f"usando {n_grade} pontos por variável-base{nota}."
+    else:
+        raise ValueError(f"Método de busca inválido: '{metodo}'. Use 'grade', 'otimizador' ou 'adaptativa'.")
+
+    out = pd.DataFrame(busca["X"], columns=grid_vars)
+    out[f"{target}_previsto"] = busca["extras"][:, 0]
+    out[desej_col_name] = busca["desejabilidade"]
 
     msg = (
         f"A variável '{target}' possui R² = {r2:.2%} (≥ {r2_threshold:.0%}). "
         f"Desejabilidade executada com intervalo [{d_low:.2f}, {d_high:.2f}] "
-        f"usando {n_points} pontos por variável-base."
+        f"{descricao_busca}"
     )
 
-    if top_k is not None and len(out) > top_k:
-        out = out.head(top_k)
-
     # Converte o DataFrame de resultados para um formato serializável (JSON)
     resultado_serializavel = to_serializable(out)
 
@@ -494,95 +927,323 @@ def run_global_desejabilidade_if_applicable(
         "r2": r2,
         "mensagem": msg,
         "model_function_code": model_code,
+        "model_function_code_numpy": model_code_np,
+        "model_export_check": verificacao_exportacao,
         "desirability_function_code": desir_code,
         "search_spaces": search_spaces,
+        "n_avaliacoes": busca["n_avaliacoes"],
+        "n_no_intervalo": busca["n_no_intervalo"],
         "resultado_df": resultado_serializavel,
     }
 
+def _descricao_adaptativa(busca):
+    """Trecho da mensagem da desejabilidade para a busca adaptativa."""
+    def milhares(n):
+        return f"{int(n):,}".replace(",", ".")
+
+    equivalente = int(round(1.0 / busca["resolucao"])) + 1
+    return (
+        f"usando grade adaptativa ({busca['n_inicial']} pontos iniciais por variável-base e "
+        f"{busca['n_niveis']} refinamentos, passo final de {busca['resolucao']:.1e} da faixa, "
+        f"equivalente a uma grade uniforme com {milhares(equivalente)} pontos por variável, "
+        f"em {milhares(busca['n_avaliacoes'])} avaliações do modelo)."
+    )
+
+def run_desejabilidade_multirresposta(
+    modelos,
+    df,
+    d_interval=(0.65, 0.85),
+    n_points=15,
+    s=1.0,
+    top_k=50,
+    direcoes=None,
+    alvos=None,
+    pesos=None,
+    desej_col_name="desejabilidade_global",
+    tamanho_bloco=TAMANHO_BLOCO_PADRAO,
+    max_pontos_grade=MAX_PONTOS_GRADE,
+    metodo="grade",
+    max_avaliacoes=MAX_AVALIACOES_ADAPTATIVA,
+):
+    """
+    Desejabilidade global de várias respostas em uma única varredura da grade.
+
+    modelos: dict {target: modelo_reduzido}. Todos os modelos são avaliados na
+    mesma grade (união das variáveis-base) e as desejabilidades individuais são
+    combinadas por média geométrica ponderada.
+    direcoes: dict {target: "higher" | "lower" | "target"} (default: "higher").
+    alvos: dict {target: alvo} das respostas com direção "target" (default: ponto médio de [L, T]).
+    pesos: dict {target: peso} (default: pesos iguais).
+    max_pontos_grade: limite da grade completa (pontos por variável reduzidos se preciso).
+    metodo: "grade" ou "adaptativa" (refinamento em torno dos melhores pontos,
+    até `max_avaliacoes` avaliações; ver `buscar_em_grade_adaptativa`).
+    """
+    if metodo not in ("grade", "adaptativa"):
+        raise ValueError(f"Método de busca inválido para a desejabilidade global: '{metodo}'. Use 'grade' ou 'adaptativa'.")
+    modelos = {t: m for t, m in modelos.items() if m is not None}
+    targets = list(modelos)
+    direcoes = direcoes or {}
+    alvos = alvos or {}
+    pesos = pesos or {}
+
+    if len(targets) < 2:
+        return {
+            "aplica_desejabilidade": False,
+            "mensagem": "A desejabilidade global requer ao menos duas respostas com modelo ajustado.",
+            "respostas": targets,
+            "search_spaces": {},
+            "resultado_df": None,
+        }
+
+    base_vars = sorted({b for m in modelos.values() for b in _base_vars_from_model(m)})
+    search_spaces = _espacos_de_busca(df, base_vars, n_points)
+    if not search_spaces:
+        return {
+            "aplica_desejabilidade": False,
+            "mensagem": "Não foi possível gerar espaço de busca das variáveis-base.",
+            "respostas": targets,
+            "search_spaces": search_spaces,
+            "resultado_df": None,
+        }
+    grid_vars = list(search_spaces)
+
+    limites = {t: _limites_desejabilidade(df, t) for t in targets}
+    compilados = {t: _compilar_modelo(m) for t, m in modelos.items()}
+    w = np.array([float(pesos.get(t, 1.0)) for t in targets])
+
+    def avaliar_bloco(X):
+        # Predições de todas as respostas na mesma grade e desejabilidade global
+        bloco_df = pd.DataFrame(X, columns=grid_vars)
+        Y = np.empty((len(X), len(targets)))
+        D = np.empty((len(X), len(targets)))
+        for j, t in enumerate(targets):
+            Y[:, j] = _predict_from_base_grid(modelos[t], bloco_df, df, compilado=compilados[t]).to_numpy()
+            L, T = limites[t]
+            D[:, j] = desejabilidade_array(Y[:, j], L, T, s, direction=direcoes.get(t, "higher"), alvo=alvos.get(t))
+        return desejabilidade_global(D, w), np.hstack([Y, D])
+
+    if metodo == "adaptativa":
+        busca = buscar_em_grade_adaptativa(
+            search_spaces, avaliar_bloco, d_interval, top_k=top_k,
+            max_avaliacoes=max_avaliacoes, tamanho_bloco=tamanho_bloco,
+        )
+        descricao_busca = _descricao_adaptativa(busca)
+    else:
+        search_spaces, n_grade, nota = _limitar_grade(search_spaces, n_points, max_pontos_grade)
+        busca = buscar_em_grade(search_spaces, avaliar_bloco, d_interval, top_k=top_k, tamanho_bloco=tamanho_bloco)
+        descricao_busca = f"usando {n_grade} pontos por variável-base{nota}."
+    d_low, d_high = d_interval
+
+    out = pd.DataFrame(busca["X"], columns=grid_vars)
+    for j, t in enumerate(targets):
+        out[f"{t}_previsto"] = busca["extras"][:, j]
+    for j, t in enumerate(targets):
+        out[f"d_{t}"] = busca["extras"][:, len(targets) + j]
+    out[desej_col_name] = busca["desejabilidade"]
+
+    msg = (
+        f"Desejabilidade global de {len(targets)} respostas ({', '.join(targets)}) "
+        f"executada com intervalo [{d_low:.2f}, {d_high:.2f}] "
+        f"{descricao_busca}"
+    )
+
+    return {
+        "aplica_desejabilidade": True,
+        "mensagem": msg,
+        "respostas": targets,
+        "pesos": dict(zip(targets, (w / w.sum()).tolist())),
+        "search_spaces": search_spaces,
+        "n_avaliacoes": busca["n_avaliacoes"],
+        "n_no_intervalo": busca["n_no_intervalo"],
+        "resultado_df": to_serializable(out),
+    }
+
 
 # ==============================================================================
 # 4. FUNÇÃO DE ORQUESTRAÇÃO PRINCIPAL DO PIPELINE
 # ==============================================================================
 
-def run_analysis_pipeline(df, independent_cols, dependent_cols, termos_interacao, termos_quadraticos):
+@dataclass
+class AnaliseVariavel:
+    """
+    Resultado puro (sem Streamlit) da análise de uma variável resposta, usado
+    pelo app e por `run_analysis_pipeline`: dados para exibição e o bloco JSON
+    para o LLM.
+    """
+    target: str
+    anova_completa: pd.DataFrame
+    significantes: list
+    nao_significantes: list
+    modelo_reduzido: object
+    desejabilidade: dict
+    resultado: dict
+    artefato: dict = None
+
+def analisar_variavel(df, target, anova_completa, parametros_desejabilidade=None, p_thresh=0.10, selecao="pvalor"):
+    """
+    Executa seleção de features, modelo reduzido, métricas e desejabilidade de
+    um target a partir da ANOVA do modelo completo. Não faz chamadas `st.*`,
+    podendo rodar em processos de trabalho.
+    selecao: "pvalor" ou um modo stepwise (ver `selecionar_termos`).
+    O tempo de cada etapa fica em `resultado["tempos"]` (ver src/cronometro.py).
+    """
+    parametros_desejabilidade = parametros_desejabilidade or {}
+    cronometro = Cronometro()
+
+    # Seleção de features significativas (corte único por p-valor ou stepwise)
+    with cronometro.medir("selecao", target, metodo=selecao):
+        significantes, nao_significantes, anova_df, selecao_block = selecionar_termos(
+            df, target, anova_completa, p_thresh=p_thresh, selecao=selecao
+        )
+
+    # Serialização da ANOVA (Modelo Completo/Pareto)
+    anova_serializada = (
+        anova_df.reset_index()
+        .rename(columns={"index": "term"})
+        .replace({pd.NA: None, np.nan: None})
+        .to_dict("records")
+    )
+
+    summary = "Não foram encontradas features significativas para a variável. Nenhum modelo foi gerado."
+    coeficientes = {}
+    metricas = {}
+    desejabilidade_block = {}
+    des_out = None
+    modelo_reduzido = None
+    artefato = None
+
+    if significantes:
+        # Modelo reduzido com as significantes
+        with cronometro.medir("modelo_reduzido", target, n_linhas=len(df), n_termos=len(significantes) + 1):
+            ajuste_reduzido = ajustar_alvo(df, target, significantes)
+            modelo_reduzido = ajuste_reduzido.modelo
+            summary = modelo_reduzido.summary().as_text()
+            coeficientes = {termo: float(valor) for termo, valor in modelo_reduzido.params.items()}
+            artefato = artefato_do_modelo(
+                modelo_reduzido, df, target,
+                **{k: parametros_desejabilidade[k] for k in ("direction", "alvo", "s", "t") if k in parametros_desejabilidade},
+            )
+
+        # Métricas ANOVA do modelo reduzido
+        with cronometro.medir("falta_de_ajuste", target):
+            metricas, _, _ = avaliar_modelo_anova(modelo_reduzido, df, target, anova=ajuste_reduzido.anova)
+
+        # Desejabilidade (dinâmica)
+        with cronometro.medir("desejabilidade", target) as registro:
+            des_out = run_global_desejabilidade_if_applicable(
+                modelo_reduzido=modelo_reduzido, df=df, target=target, **parametros_desejabilidade
+            )
+            registro["n_variaveis"] = len(des_out.get("search_spaces") or {})
+            registro["n_pontos_avaliados"] = des_out.get("n_avaliacoes")
+        desejabilidade_block = {
+            "aplica": des_out["aplica_desejabilidade"],
+            "r2": des_out["r2"],
+            "mensagem": des_out["mensagem"],
+            "search_spaces": des_out["search_spaces"],
+            "modelo_funcao_py": des_out["model_function_code"],
+            "modelo_funcao_numpy": des_out.get("model_function_code_numpy"),
+            "verificacao_exportacao": des_out.get("model_export_check"),
+            "desejabilidade_funcao_py": des_out["desirability_function_code"],
+            "resultados": des_out["resultado_df"]
+        }
+
+    resultado = {
+        "variavel": target,
+        "pareto": {
+            "significativo": significantes,
+            "nao_significativo": nao_significantes
+        },
+        "anova_completa": anova_serializada,
+        "modelo_reduzido_summary": summary,
+        "coeficientes": coeficientes,
+        "metricas": metricas,
+        "desejabilidade": desejabilidade_block
+    }
+    if selecao_block:
+        resultado["selecao"] = selecao_block
+    resultado["tempos"] = cronometro.registros
+
+    return AnaliseVariavel(
+        target=target,
+        anova_completa=anova_completa,
+        significantes=significantes,
+        nao_significantes=nao_significantes,
+        modelo_reduzido=modelo_reduzido,
+        desejabilidade=des_out,
+        resultado=resultado,
+        artefato=artefato,
+    )
+
+def _executar_alvo(funcao, kwargs, target):
+    return funcao(target=target, **kwargs)
+
+def executar_por_alvo(funcao, targets, kwargs_por_alvo=None, n_processos=1, **kwargs):
+    """
+    Aplica `funcao(target=..., **kwargs)` a cada target, em sequência ou em um
+    pool de `n_processos` processos. Os resultados voltam na ordem de `targets`.
+
+    kwargs_por_alvo: dict {target: dict} com argumentos específicos de cada target.
+    """
+    kwargs_por_alvo = kwargs_por_alvo or {}
+    tarefas = [(dict(kwargs, **kwargs_por_alvo.get(t, {})), t) for t in targets]
+
+    if n_processos is None or n_processos <= 1 or len(targets) <= 1:
+        return [_executar_alvo(funcao, kw, t) for kw, t in tarefas]
+
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    # "spawn" evita fork de um processo com threads (servidor do Streamlit)
+    contexto = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(int(n_processos), len(targets)), mp_context=contexto) as pool:
+        futuros = [pool.submit(_executar_alvo, funcao, kw, t) for kw, t in tarefas]
+        return [futuro.result() for futuro in futuros]
+
+def run_analysis_pipeline(df, independent_cols, dependent_cols, termos_interacao, termos_quadraticos, n_processos=1,
+                          selecao="pvalor", cronometro=None):
     """
     Executa o pipeline completo de análise para todas as variáveis dependentes.
-    Retorna um dicionário estruturado contendo todos os resultados para o LLM.
+    Retorna um dicionário {target: resultado} para o LLM, em que cada resultado
+    é o de `analisar_variavel` (o mesmo do app) mais o "artefato" do modelo
+    reduzido, quando houver.
+    n_processos: com valor > 1, cada variável é analisada em um pool de processos.
+    selecao: "pvalor" ou um modo stepwise ("backward", "forward", "hierarquico").
+    cronometro: Cronometro opcional que recebe o tempo do ajuste em lote e das
+    etapas de cada target (que também ficam em "tempos" de cada resultado).
     """
     resultados_llm = {}
     
     # 1. Preparar a lista completa de termos para o modelo polinomial completo
-    full_features = independent_cols.copy()
-    
-    # Adicionar termos de interação
-    if termos_interacao:
-        full_features.extend([f"{col1}:{col2}" for i, col1 in enumerate(independent_cols) for col2 in independent_cols[i+1:]])
-    
-    # Adicionar termos quadráticos
-    if termos_quadraticos:
-        full_features.extend([f"I({col}**2)" for col in independent_cols])
+    full_features = gerar_termos_modelo(
+        independent_cols, interacoes=termos_interacao, quadraticos=termos_quadraticos
+    )
 
-    # 2. Executar o pipeline para cada variável dependente
-    for target in dependent_cols:
-        
-        # Etapa A: Modelo Polinomial Completo
-        modelo_completo, anova_completa = ajustar_modelo(df, target, full_features)
-        
-        if modelo_completo is None:
-            resultados_llm[target] = {
-                "mensagem": "Modelo completo não pôde ser ajustado."
-            }
-            continue
+    # Etapa A: Modelo Polinomial Completo de todas as respostas
+    # (uma matriz de desenho e uma fatoração compartilhadas; ANOVA Tipo 2 em lote)
+    with medir(cronometro, "ajuste_lote", n_linhas=len(df), n_termos=len(full_features) + 1,
+               n_respostas=len(dependent_cols)):
+        lote_completo = ajustar_ols_em_lote(df, dependent_cols, full_features)
 
-        # Etapa B: Seleção de Features Significativas (Pareto)
-        significantes, insignificantes, anova_pareto = selecionar_features_significativas(modelo_completo, p_thresh=0.10)
-        
-        # 3. Estrutura de Saída
-        resultado_target = {
-            "target": target,
-            # Informações de Pareto para o LLM
-            "pareto": {
-                "significativo": significantes,
-                "insignificante": insignificantes,
-                "anova_completa": anova_completa.fillna(np.nan).to_dict("index")
-            }
-        }
-        
-        # 4. Ajuste do Modelo Reduzido (se houver features significativas)
-        if significantes:
-            # Remove o Intercept da lista de features para o ajuste
-            features_reduzidas = [f for f in significantes if f != 'Intercept']
-            
-            # Se a única coisa significativa for o Intercept, não ajustamos
-            if not features_reduzidas:
-                resultados_llm[target] = resultado_target
-                continue
-            
-            # Ajustar modelo reduzido
-            modelo_reduzido, anova_reduzida = ajustar_modelo(df, target, features_reduzidas)
-            
-            # Avaliar o Modelo (Métricas R2, LoF, F_reg)
-            metricas, anova_completa_final, params_summary = avaliar_modelo_anova(modelo_reduzido, df, target, alpha=0.10)
-            
-            # Executar Desejabilidade
-            desejabilidade_result = run_global_desejabilidade_if_applicable(
-                modelo_reduzido,
-                df,
-                target,
-                d_interval=(0.65, 0.85), # Parâmetros fixos
-                n_points=15,
-            )
+    # 2. Executar o pipeline para cada variável dependente (em sequência ou em paralelo)
+    if lote_completo is None:
+        return {target: {"mensagem": "Modelo completo não pôde ser ajustado."} for target in dependent_cols}
 
-            # Consolidar Resultados
-            resultado_target.update({
-                "modelo_formula": modelo_reduzido.model.formula,
-                "modelo_params": params_summary,
-                "metricas": metricas,
-                "anova_completa": anova_completa_final, # ANOVA completa do modelo reduzido
-                "desejabilidade": desejabilidade_result
-            })
-
-        # Adicionar o resultado ao dicionário final
+    # Mesma análise por target do app (desejabilidade com os parâmetros padrão)
+    analises = executar_por_alvo(
+        analisar_variavel,
+        dependent_cols,
+        kwargs_por_alvo={t: {"anova_completa": lote_completo.anova[t]} for t in dependent_cols},
+        n_processos=n_processos,
+        df=df,
+        selecao=selecao,
+    )
+    for target, analise in zip(dependent_cols, analises):
+        resultado_target = dict(analise.resultado)
+        if analise.artefato is not None:
+            # Artefato para pontuação posterior (o lote o grava em <nome>.modelos.json)
+            resultado_target["artefato"] = analise.artefato
         resultados_llm[target] = resultado_target
-        
+        if cronometro is not None:
+            cronometro.incorporar(resultado_target.get("tempos"))
+
     return resultados_llm
\ No newline at end of file
@@ -0,0 +1,107 @@
+# src/artefatos.py
+
+import json
+import os
+
+import numpy as np
+
+
+# ==============================================================================
+# ARTEFATOS DOS MODELOS REDUZIDOS (JSON, sem statsmodels)
+# ==============================================================================
+
+# Identificação do formato; a versão muda quando os campos mudam de significado
+FORMATO_ARTEFATOS = "lyra-modelos"
+VERSAO_ARTEFATOS = 1
+
+# Campos obrigatórios de cada modelo
+CAMPOS_MODELO = ("target", "termos", "coeficientes", "covariancia", "desejabilidade", "search_spaces")
+
+
+def criar_artefato(modelo, target, L, T, direcao="higher", alvo=None, s=1.0, t=1.0, search_spaces=None):
+    """
+    Artefato serializável de um modelo reduzido ajustado.
+
+    Guarda o necessário para pontuar novas condições sem o objeto do
+    statsmodels nem o dataset: termos (nomes de exog_names), coeficientes,
+    matriz de covariância dos coeficientes (para o erro-padrão da predição),
+    limites L/T e forma da desejabilidade e a faixa observada de cada
+    variável-base (`search_spaces`: {variavel: [min, max]}).
+    """
+    espacos = {v: [float(e[0]), float(e[1])] for v, e in (search_spaces or {}).items()}
+    return {
+        "target": target,
+        "termos": list(modelo.model.exog_names),
+        "coeficientes": [float(c) for c in np.asarray(modelo.params, dtype=float)],
+        "covariancia": np.asarray(modelo.cov_params(), dtype=float).tolist(),
+        "gl_residuo": float(modelo.df_resid),
+        "r2": float(modelo.rsquared),
+        "desejabilidade": {
+            "L": float(L),
+            "T": float(T),
+            "direcao": direcao,
+            "alvo": None if alvo is None else float(alvo),
+            "s": float(s),
+            "t": float(t),
+        },
+        "search_spaces": espacos,
+    }
+
+
+def validar_artefato(artefato):
+    """Levanta ValueError se faltar algum campo ou se as dimensões não baterem."""
+    faltando = [c for c in CAMPOS_MODELO if c not in artefato]
+    if faltando:
+        raise ValueError(f"Artefato de modelo incompleto; faltam os campos {faltando}.")
+    n = len(artefato["termos"])
+    if len(artefato["coeficientes"]) != n or np.shape(artefato["covariancia"]) != (n, n):
+        raise ValueError(
+            f"Artefato de '{artefato['target']}' inconsistente: {n} termos, "
+            f"{len(artefato['coeficientes'])} coeficientes e covariância {np.shape(artefato['covariancia'])}."
+        )
+
+
+def conteudo_artefatos(artefatos, arquivo=None, hash_arquivo=None):
+    """
+    Conteúdo do arquivo de artefatos (lista de dicts de `criar_artefato`);
+    `arquivo` e `hash_arquivo` identificam o dataset de origem.
+    """
+    return {
+        "formato": FORMATO_ARTEFATOS,
+        "versao": VERSAO_ARTEFATOS,
+        "arquivo": arquivo,
+        "hash": hash_arquivo,
+        "modelos": list(artefatos),
+    }
+
+
+def salvar_artefatos(artefatos, caminho, arquivo=None, hash_arquivo=None):
+    """Grava os artefatos em um único JSON, com escrita atômica; retorna o caminho."""
+    conteudo = conteudo_artefatos(artefatos, arquivo, hash_arquivo)
+    os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+    temporario = caminho + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as fp:
+        json.dump(conteudo, fp, indent=2, ensure_ascii=False)
+    os.replace(temporario, caminho)
+    return caminho
+
+
+def carregar_artefatos(caminho):
+    """
+    Lê um arquivo de artefatos e retorna {target: artefato}, na ordem gravada.
+    Levanta ValueError se o formato ou a versão não forem reconhecidos.
+    """
+    with open(caminho, encoding="utf-8") as fp:
+        conteudo = json.load(fp)
+    if conteudo.get("formato") != FORMATO_ARTEFATOS:
+        raise ValueError(f"'{caminho}' não é um arquivo de modelos do LYRA.")
+    if conteudo.get("versao") != VERSAO_ARTEFATOS:
+        raise ValueError(
+            f"Versão de artefatos não suportada em '{caminho}': "
+            f"{conteudo.get('versao')} (esperada {VERSAO_ARTEFATOS})."
+        )
+    modelos = {}
+    for artefato in conteudo.get("modelos", []):
+        validar_artefato(artefato)
+        modelos[artefato["target"]] = artefato
+    return modelos
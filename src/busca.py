@@ -0,0 +1,387 @@
+# src/busca.py
+
+import heapq
+import numpy as np
+
+
+# ==============================================================================
+# BUSCA EM GRADE POR BLOCOS (memória constante)
+# ==============================================================================
+
+TAMANHO_BLOCO_PADRAO = 65536
+
+# Máximo de pontos da grade completa (n_points ** n_variaveis)
+MAX_PONTOS_GRADE = 2_000_000
+
+
+class MelhoresK:
+    """
+    Mantém os k melhores pontos vistos até o momento em um heap mínimo limitado.
+
+    Empates na pontuação são resolvidos pelo menor identificador (ordem da grade).
+    Com k=None, todos os pontos oferecidos são mantidos.
+    """
+
+    def __init__(self, k):
+        self.k = None if k is None else int(k)
+        self._heap = []
+
+    def oferecer(self, pontuacoes, ids, linhas):
+        """Oferece um bloco de candidatos (arrays alinhados) ao heap."""
+        if len(pontuacoes) == 0 or self.k == 0:
+            return
+        ordem = np.lexsort((ids, -pontuacoes))
+        if self.k is not None:
+            ordem = ordem[: self.k]
+        for i in ordem:
+            item = (float(pontuacoes[i]), -int(ids[i]), linhas[i])
+            if self.k is None or len(self._heap) < self.k:
+                heapq.heappush(self._heap, item)
+            elif item[:2] > self._heap[0][:2]:
+                heapq.heapreplace(self._heap, item)
+            else:
+                # O bloco está ordenado: os próximos candidatos também não entram
+                break
+
+    def resultado(self):
+        """Retorna (pontuacoes, linhas) em ordem decrescente de pontuação."""
+        itens = sorted(self._heap, key=lambda it: it[:2], reverse=True)
+        pontuacoes = np.array([it[0] for it in itens], dtype=float)
+        linhas = [it[2] for it in itens]
+        return pontuacoes, linhas
+
+
+def pontos_por_variavel(n_points, n_variaveis, max_pontos=MAX_PONTOS_GRADE):
+    """
+    Maior número de pontos por variável (≤ n_points, mínimo 2) cuja grade
+    completa não passa de `max_pontos`; com muitos fatores a grade cresce
+    exponencialmente e precisa ser mais esparsa.
+    """
+    n = int(n_points)
+    if n_variaveis <= 0 or max_pontos is None:
+        return n
+    while n > 2 and n ** n_variaveis > max_pontos:
+        n -= 1
+    return n
+
+
+def grades_de_busca(search_spaces):
+    """Converte {var: (min, max, n)} nos eixos `np.linspace` de cada variável."""
+    return [np.linspace(vmin, vmax, int(n)) for (vmin, vmax, n) in search_spaces.values()]
+
+
+def iterar_grade_em_blocos(search_spaces, tamanho_bloco=TAMANHO_BLOCO_PADRAO):
+    """
+    Percorre o produto cartesiano das grades em blocos de tamanho fixo.
+
+    Gera tuplas (ids, X), em que `ids` são os índices lineares dos pontos na
+    grade completa (mesma ordem de `itertools.product`) e `X` é um array
+    contíguo (n_bloco, n_variaveis).
+    """
+    grids = grades_de_busca(search_spaces)
+    if not grids:
+        return
+    forma = tuple(len(g) for g in grids)
+    total = int(np.prod(forma, dtype=np.int64))
+    tamanho_bloco = max(1, int(tamanho_bloco))
+
+    for inicio in range(0, total, tamanho_bloco):
+        ids = np.arange(inicio, min(inicio + tamanho_bloco, total), dtype=np.int64)
+        coords = np.unravel_index(ids, forma)
+        X = np.empty((len(ids), len(grids)), dtype=float)
+        for j, (g, c) in enumerate(zip(grids, coords)):
+            X[:, j] = g[c]
+        yield ids, X
+
+
+def buscar_em_grade(search_spaces, avaliar, d_interval, top_k=50, tamanho_bloco=TAMANHO_BLOCO_PADRAO):
+    """
+    Avalia a grade completa em blocos, mantendo apenas os top-k pontos dentro
+    do intervalo de desejabilidade.
+
+    avaliar: função que recebe X (n_bloco, n_variaveis) e retorna uma tupla
+        (desejabilidade (n_bloco,), colunas_extras (n_bloco, n_extras)).
+
+    Retorna um dicionário com:
+        "X": array (m, n_variaveis) dos melhores pontos;
+        "extras": array (m, n_extras);
+        "desejabilidade": array (m,), em ordem decrescente;
+        "n_no_intervalo": total de pontos da grade dentro do intervalo;
+        "n_avaliacoes": total de pontos avaliados.
+    """
+    d_low, d_high = d_interval
+    melhores = MelhoresK(top_k)
+    n_no_intervalo = 0
+    n_avaliacoes = 0
+    n_vars = len(search_spaces)
+    n_extras = 0
+
+    for ids, X in iterar_grade_em_blocos(search_spaces, tamanho_bloco):
+        d, extras = avaliar(X)
+        d = np.asarray(d, dtype=float)
+        extras = np.asarray(extras, dtype=float).reshape(len(X), -1)
+        n_extras = extras.shape[1]
+        n_avaliacoes += len(X)
+
+        mask = (d >= d_low) & (d <= d_high)
+        n_sel = int(mask.sum())
+        if not n_sel:
+            continue
+        n_no_intervalo += n_sel
+        linhas = np.hstack([X[mask], extras[mask]])
+        melhores.oferecer(d[mask], ids[mask], linhas)
+
+    d_top, linhas = melhores.resultado()
+    linhas = np.array(linhas, dtype=float).reshape(len(d_top), n_vars + n_extras)
+    return {
+        "X": linhas[:, :n_vars],
+        "extras": linhas[:, n_vars:],
+        "desejabilidade": d_top,
+        "n_no_intervalo": n_no_intervalo,
+        "n_avaliacoes": n_avaliacoes,
+    }
+
+
+# ==============================================================================
+# BUSCA EM GRADE ADAPTATIVA (refinamento progressivo das melhores células)
+# ==============================================================================
+
+# Avaliações do modelo permitidas na busca adaptativa (grade inicial incluída)
+MAX_AVALIACOES_ADAPTATIVA = 200_000
+
+# Melhores pontos refinados a cada nível
+N_CELULAS_PADRAO = 8
+
+# Passo final, como fração da faixa de cada variável
+TOLERANCIA_ADAPTATIVA = 1e-6
+
+# Acima de 3^k vizinhos por célula, o refinamento usa só os vizinhos axiais
+MAX_VIZINHOS_CELULA = 2187
+
+
+def _limites(search_spaces):
+    lim = np.array([(vmin, vmax) for (vmin, vmax, _) in search_spaces.values()], dtype=float)
+    return lim[:, 0], lim[:, 1] - lim[:, 0]
+
+
+def _pontuacao_de_refino(d, d_low, d_high):
+    """
+    Ordena candidatos a refinamento: dentro do intervalo vale a própria
+    desejabilidade; fora dele, menos a distância até o intervalo.
+    """
+    return np.where(d < d_low, d - d_low, np.where(d > d_high, d_high - d, d))
+
+
+def _deslocamentos(n_vars):
+    """Vizinhos de uma célula: {-1, 0, 1}^k ou, com k grande, ±1 em cada eixo."""
+    if 3 ** n_vars <= MAX_VIZINHOS_CELULA:
+        return np.array(np.meshgrid(*[(-1, 0, 1)] * n_vars, indexing="ij"), dtype=np.int64).reshape(n_vars, -1).T
+    eixos = np.vstack([np.eye(n_vars, dtype=np.int64), -np.eye(n_vars, dtype=np.int64)])
+    return np.vstack([np.zeros((1, n_vars), dtype=np.int64), eixos])
+
+
+def buscar_em_grade_adaptativa(
+    search_spaces,
+    avaliar,
+    d_interval,
+    top_k=50,
+    n_celulas=N_CELULAS_PADRAO,
+    tolerancia=TOLERANCIA_ADAPTATIVA,
+    max_avaliacoes=MAX_AVALIACOES_ADAPTATIVA,
+    tamanho_bloco=TAMANHO_BLOCO_PADRAO,
+):
+    """
+    Busca em grade do grosso para o fino.
+
+    Começa pela grade de `search_spaces` (n pontos por variável, reduzidos se
+    ocuparem mais da metade de `max_avaliacoes`). A cada nível, os
+    `n_celulas` melhores pontos avaliados até então (maior desejabilidade
+    dentro do intervalo ou, fora dele, mais próximos do intervalo) têm a
+    vizinhança avaliada com metade do passo do nível anterior. Para quando o
+    passo fica abaixo de `tolerancia` (fração da faixa), quando o orçamento
+    de avaliações acaba ou quando nenhum ponto novo surge.
+
+    Os pontos ficam em uma rede inteira da resolução final, o que evita
+    reavaliar pontos já vistos. `avaliar` segue o contrato de `buscar_em_grade`.
+
+    Retorna o dicionário de `buscar_em_grade`, mais "n_niveis" (refinamentos
+    feitos) e "resolucao" (passo final como fração da faixa).
+    """
+    d_low, d_high = d_interval
+    n_vars = len(search_spaces)
+    lo, largura = _limites(search_spaces)
+    n_inicial = max(2, max(int(n) for (_, _, n) in search_spaces.values()))
+    n_inicial = pontos_por_variavel(n_inicial, n_vars, max(2 ** n_vars, int(max_avaliacoes) // 2))
+
+    # Rede inteira: o nível L tem passo 2^(L_max - L); a escala S cobre [0, 1]
+    passos_grosso = n_inicial - 1
+    n_niveis_max = max(0, min(50, int(np.ceil(np.log2(1.0 / (passos_grosso * tolerancia))))))
+    escala = passos_grosso * 2 ** n_niveis_max
+
+    melhores = MelhoresK(top_k)
+    vistos = set()
+    Q_todos, notas_todas = [], []
+    estado = {"n_avaliacoes": 0, "n_no_intervalo": 0, "n_extras": 0}
+
+    def avaliar_pontos(Q, limite):
+        # Descarta pontos já vistos (mantendo a ordem, isto é, os vizinhos dos
+        # melhores centros primeiro) e avalia no máximo `limite` novos, em blocos
+        Q = np.ascontiguousarray(Q, dtype=np.int64)
+        bytes_q, largura_linha = Q.tobytes(), Q.shape[1] * Q.itemsize
+        chaves = [bytes_q[i:i + largura_linha] for i in range(0, len(bytes_q), largura_linha)]
+        novos = [i for i, chave in enumerate(chaves) if chave not in vistos and not vistos.add(chave)]
+        if len(novos) > limite:
+            vistos.difference_update(chaves[i] for i in novos[limite:])
+            novos = novos[:limite]
+        if not novos:
+            return 0
+        Q = Q[novos]
+        for inicio in range(0, len(Q), max(1, int(tamanho_bloco))):
+            Qb = Q[inicio:inicio + int(tamanho_bloco)]
+            X = lo + (Qb / escala) * largura
+            d, extras = avaliar(X)
+            d = np.asarray(d, dtype=float)
+            extras = np.asarray(extras, dtype=float).reshape(len(X), -1)
+            estado["n_extras"] = extras.shape[1]
+            ids = np.arange(estado["n_avaliacoes"], estado["n_avaliacoes"] + len(X), dtype=np.int64)
+            estado["n_avaliacoes"] += len(X)
+
+            mask = (d >= d_low) & (d <= d_high)
+            if mask.any():
+                estado["n_no_intervalo"] += int(mask.sum())
+                melhores.oferecer(d[mask], ids[mask], np.hstack([X[mask], extras[mask]]))
+            Q_todos.append(Qb)
+            notas_todas.append(_pontuacao_de_refino(d, d_low, d_high))
+        return len(Q)
+
+    # Nível 0: grade grossa
+    eixo = np.arange(n_inicial, dtype=np.int64) * 2 ** n_niveis_max
+    grade = np.array(np.meshgrid(*[eixo] * n_vars, indexing="ij"), dtype=np.int64).reshape(n_vars, -1).T
+    avaliar_pontos(grade, int(max_avaliacoes))
+
+    deslocamentos = _deslocamentos(n_vars)
+    n_niveis = 0
+    for nivel in range(1, n_niveis_max + 1):
+        restante = int(max_avaliacoes) - estado["n_avaliacoes"]
+        if restante <= 0:
+            break
+        Q = np.vstack(Q_todos)
+        notas = np.concatenate(notas_todas)
+        Q_todos[:], notas_todas[:] = [Q], [notas]
+
+        # Melhores pontos (empates: ordem de avaliação) e vizinhos com o novo passo
+        n_centros = max(1, min(int(n_celulas), restante // len(deslocamentos), len(Q)))
+        # (ordena só os candidatos com nota >= a n_centros-ésima maior, não todos os pontos)
+        corte = np.partition(notas, len(notas) - n_centros)[len(notas) - n_centros]
+        candidatos = np.flatnonzero(~(notas < corte))
+        centros = Q[candidatos[np.lexsort((candidatos, -notas[candidatos]))[:n_centros]]]
+        passo = 2 ** (n_niveis_max - nivel)
+        vizinhos = (centros[:, None, :] + deslocamentos[None, :, :] * passo).reshape(-1, n_vars)
+        vizinhos = np.clip(vizinhos, 0, escala)
+        n_niveis = nivel
+        if not avaliar_pontos(vizinhos, restante):
+            break
+
+    d_top, linhas = melhores.resultado()
+    linhas = np.array(linhas, dtype=float).reshape(len(d_top), n_vars + estado["n_extras"])
+    return {
+        "X": linhas[:, :n_vars],
+        "extras": linhas[:, n_vars:],
+        "desejabilidade": d_top,
+        "n_no_intervalo": estado["n_no_intervalo"],
+        "n_avaliacoes": estado["n_avaliacoes"],
+        "n_niveis": n_niveis,
+        "n_inicial": n_inicial,
+        "resolucao": 2 ** (n_niveis_max - n_niveis) / escala,
+    }
+
+
+# ==============================================================================
+# BUSCA POR OTIMIZAÇÃO CONTÍNUA (multistart com gradiente analítico)
+# ==============================================================================
+
+N_INICIOS_PADRAO = 64
+
+
+def _selecionar_distintos(U, pontuacoes, tol):
+    """
+    Seleciona, em ordem decrescente de pontuação, pontos que distem mais de
+    `tol` (norma infinito, coordenadas normalizadas) dos já escolhidos.
+    """
+    escolhidos = []
+    for i in np.lexsort((np.arange(len(pontuacoes)), -pontuacoes)):
+        if all(np.max(np.abs(U[i] - U[j])) > tol for j in escolhidos):
+            escolhidos.append(i)
+    return np.array(escolhidos, dtype=int)
+
+
+def buscar_por_otimizacao(
+    search_spaces,
+    prever,
+    gradiente,
+    pontuar,
+    alvos_y,
+    escala,
+    d_interval,
+    top_k=50,
+    n_inicios=N_INICIOS_PADRAO,
+    semente=0,
+    tol_distintos=0.01,
+):
+    """
+    Otimização local limitada (L-BFGS-B) a partir de múltiplos pontos iniciais
+    (hipercubo latino) no espaço de busca.
+
+    Cada partida minimiza min_i (ŷ(x) - y*_i)² / escala², em que y*_i são as
+    respostas com desejabilidade igual ao limite superior do intervalo
+    (`alvos_y`); assim o ótimo é o ponto de maior desejabilidade ainda dentro
+    do intervalo.
+
+    prever(X) → ŷ (n,); gradiente(X) → ∂ŷ/∂x (n, n_variaveis);
+    pontuar(ŷ) → desejabilidade (n,).
+
+    Retorna o mesmo dicionário de `buscar_em_grade`, com os ótimos distintos
+    dentro do intervalo em "X".
+    """
+    from scipy.optimize import minimize
+    from scipy.stats import qmc
+
+    d_low, d_high = d_interval
+    lo, largura = _limites(search_spaces)
+    n_vars = len(lo)
+    alvos_y = np.asarray(alvos_y, dtype=float)
+    escala = float(escala) if escala else 1.0
+    n_avaliacoes = 0
+
+    def objetivo(u):
+        nonlocal n_avaliacoes
+        n_avaliacoes += 1
+        x = (lo + u * largura)[None, :]
+        yhat = prever(x)[0]
+        desvios = yhat - alvos_y
+        i = int(np.argmin(np.abs(desvios)))
+        valor = (desvios[i] / escala) ** 2
+        grad = 2.0 * desvios[i] / escala ** 2 * gradiente(x)[0] * largura
+        return valor, grad
+
+    inicios = qmc.LatinHypercube(d=n_vars, seed=semente).random(int(n_inicios))
+    U = np.empty_like(inicios)
+    for i, u0 in enumerate(inicios):
+        res = minimize(objetivo, u0, jac=True, method="L-BFGS-B", bounds=[(0.0, 1.0)] * n_vars)
+        U[i] = np.clip(res.x, 0.0, 1.0)
+
+    X = lo + U * largura
+    yhat = prever(X)
+    d = np.asarray(pontuar(yhat), dtype=float)
+    n_avaliacoes += len(X)
+
+    mask = (d >= d_low) & (d <= d_high)
+    distintos = np.flatnonzero(mask)[_selecionar_distintos(U[mask], d[mask], tol_distintos)]
+    sel = distintos if top_k is None else distintos[:top_k]
+    return {
+        "X": X[sel],
+        "extras": yhat[sel][:, None],
+        "desejabilidade": d[sel],
+        "n_no_intervalo": int(len(distintos)),
+        "n_avaliacoes": n_avaliacoes,
+    }
@@ -0,0 +1,123 @@
+# src/cache.py
+
+import hashlib
+
+import pandas as pd
+import streamlit as st
+
+from src.analysis_pipeline import (
+    analisar_variavel,
+    executar_por_alvo,
+    figura_pareto,
+    figura_pareto_multipla,
+    figura_para_png,
+)
+from src.ingestao import carregar_com_cache, hash_conteudo
+from src.ols_lote import ajustar_ols_em_lote
+
+
+# ==============================================================================
+# CACHE DA APLICAÇÃO (chaveado pelo hash do conteúdo do arquivo)
+# ==============================================================================
+
+# Limites de entradas (o Streamlit descarta as menos usadas recentemente)
+MAX_DATASETS = 8
+MAX_LOTES = 32
+MAX_ANALISES = 64
+MAX_IMAGENS = 128
+
+
+@st.cache_data(max_entries=MAX_DATASETS, show_spinner=False)
+def _carregar_dados_em_cache(hash_arquivo, nome, _conteudo, n_independentes=3):
+    # `_conteudo` não entra na chave: o hash já identifica o arquivo.
+    # Fora da memória do Streamlit, o cache colunar em disco evita reabrir o arquivo.
+    df, independentes, dependentes, _ = carregar_com_cache(
+        _conteudo, nome, hash_arquivo, n_independentes=n_independentes
+    )
+    return df, independentes, dependentes
+
+
+def carregar_dados(arquivo, n_independentes=3):
+    """
+    Carrega e limpa o dataset reaproveitando o resultado de arquivos já lidos.
+    n_independentes: quantas colunas após 'Ensaio' são fatores.
+
+    Retorna (df, independent_cols, dependent_cols, hash_arquivo).
+    """
+    conteudo = arquivo.getvalue()
+    hash_arquivo = hash_conteudo(conteudo)
+    df, independentes, dependentes = _carregar_dados_em_cache(
+        hash_arquivo, arquivo.name, conteudo, int(n_independentes)
+    )
+    return df, independentes, dependentes, hash_arquivo
+
+
+@st.cache_resource(max_entries=MAX_LOTES, show_spinner=False)
+def ajustar_lote_em_cache(hash_arquivo, targets, features, _df):
+    """`ajustar_ols_em_lote` memoizado por (hash do arquivo, targets, features)."""
+    return ajustar_ols_em_lote(_df, list(targets), list(features))
+
+
+@st.cache_resource(max_entries=MAX_ANALISES, show_spinner=False)
+def analisar_variaveis_em_cache(hash_arquivo, targets, features, parametros, _df, _lote, _n_processos=1,
+                                selecao="pvalor"):
+    """
+    `analisar_variavel` para todos os targets (modelos reduzidos, ANOVAs,
+    métricas e desejabilidade), memoizado por (hash do arquivo, targets,
+    termos do modelo completo, parâmetros, método de seleção). `features` é a
+    tupla de termos do lote `_lote` (que não entra na chave): sem ela, mudar a
+    ordem das interações devolveria análises do modelo anterior.
+    `parametros` é uma tupla de pares
+    (nome, valor) repassada à desejabilidade; o par opcional
+    ("alvos", ((target, alvo), ...)) vira o `alvo` de cada target (direção
+    "target"). Com `_n_processos` > 1 os targets rodam em paralelo.
+    """
+    targets = list(targets)
+    parametros = dict(parametros)
+    alvos = dict(parametros.pop("alvos", ()))
+    return executar_por_alvo(
+        analisar_variavel,
+        targets,
+        kwargs_por_alvo={
+            t: {
+                "anova_completa": _lote.anova[t],
+                "parametros_desejabilidade": dict(parametros, alvo=alvos[t]) if t in alvos else parametros,
+            }
+            for t in targets
+        },
+        n_processos=_n_processos,
+        df=_df,
+        selecao=selecao,
+    )
+
+
+def hash_anova(anova):
+    """Hash SHA-256 (hex) do conteúdo de uma tabela ANOVA (índice, colunas e valores)."""
+    h = hashlib.sha256()
+    h.update(repr(list(anova.columns)).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(anova, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+@st.cache_data(max_entries=MAX_IMAGENS, show_spinner=False)
+def _pareto_png_em_cache(hash_tabela, target, alpha, _anova):
+    return figura_para_png(figura_pareto(_anova, target, alpha))
+
+
+def pareto_png(anova, target, alpha=0.1):
+    """
+    PNG do gráfico de Pareto, memoizado pelo conteúdo da ANOVA, target e alpha:
+    reruns com a mesma tabela não redesenham nem rasterizam a figura.
+    """
+    return _pareto_png_em_cache(hash_anova(anova), target, float(alpha), anova)
+
+
+@st.cache_data(max_entries=MAX_IMAGENS, show_spinner=False)
+def _pareto_multiplo_png_em_cache(hashes, alpha, _anovas):
+    return figura_para_png(figura_pareto_multipla(_anovas, alpha))
+
+
+def pareto_multiplo_png(anovas, alpha=0.1):
+    """PNG com um painel de Pareto por target (dict {target: ANOVA}), memoizado por conteúdo."""
+    hashes = tuple((target, hash_anova(anova)) for target, anova in anovas.items())
+    return _pareto_multiplo_png_em_cache(hashes, float(alpha), anovas)
@@ -0,0 +1,117 @@
+# src/cache_llm.py
+
+import hashlib
+import json
+import os
+import threading
+
+
+# ==============================================================================
+# CACHE PERSISTENTE DE RESPOSTAS DO LLM (LRU limitado por tamanho em disco)
+# ==============================================================================
+
+# Diretório e limite padrão (sobrescrevíveis por variáveis de ambiente)
+DIRETORIO_PADRAO = os.getenv("LYRA_CACHE_LLM_DIR", os.path.join(".lyra_cache", "llm"))
+MAX_BYTES_PADRAO = int(float(os.getenv("LYRA_CACHE_LLM_MAX_MB", "100")) * 1024 * 1024)
+
+
+def cache_desativado():
+    """True quando a variável de ambiente LYRA_SEM_CACHE_LLM desativa o cache."""
+    return os.getenv("LYRA_SEM_CACHE_LLM", "").strip().lower() in ("1", "true", "sim", "yes")
+
+
+def configuracao_do_modelo(modelo_llm):
+    """Nome do modelo e parâmetros de geração que alteram a resposta."""
+    return {
+        "classe": type(modelo_llm).__name__,
+        "modelo": getattr(modelo_llm, "model", None),
+        "temperature": getattr(modelo_llm, "temperature", None),
+        "max_output_tokens": getattr(modelo_llm, "max_output_tokens", None),
+    }
+
+
+def chave_da_requisicao(messages, modelo_llm):
+    """
+    Hash SHA-256 das mensagens formatadas (tipo e conteúdo) somado ao nome do
+    modelo e às configurações de geração.
+    """
+    conteudo = {
+        "mensagens": [[getattr(m, "type", type(m).__name__), m.content] for m in messages],
+        "configuracao": configuracao_do_modelo(modelo_llm),
+    }
+    serializado = json.dumps(conteudo, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(serializado.encode("utf-8")).hexdigest()
+
+
+class CacheRespostasLLM:
+    """
+    Respostas do LLM em disco, uma por arquivo `<chave>.json`.
+
+    A data de modificação marca o último uso: cada acerto a renova e, após cada
+    gravação, os arquivos menos usados recentemente são removidos até o total
+    ficar abaixo de `max_bytes`.
+    """
+
+    def __init__(self, diretorio=DIRETORIO_PADRAO, max_bytes=MAX_BYTES_PADRAO):
+        self.diretorio = diretorio
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+
+    def _caminho(self, chave):
+        return os.path.join(self.diretorio, chave + ".json")
+
+    def obter(self, chave):
+        """Texto da resposta armazenada, ou None se não houver."""
+        caminho = self._caminho(chave)
+        try:
+            with open(caminho, encoding="utf-8") as fp:
+                texto = json.load(fp)["resposta"]
+            os.utime(caminho)
+        except (OSError, ValueError, KeyError):
+            return None
+        return texto
+
+    def gravar(self, chave, texto):
+        """Armazena a resposta (escrita atômica) e aplica o limite de tamanho."""
+        with self._lock:
+            os.makedirs(self.diretorio, exist_ok=True)
+            caminho = self._caminho(chave)
+            temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temporario, "w", encoding="utf-8") as fp:
+                json.dump({"resposta": texto}, fp, ensure_ascii=False)
+            os.replace(temporario, caminho)
+            self._remover_excedentes()
+
+    def _remover_excedentes(self):
+        arquivos = []
+        for nome in os.listdir(self.diretorio):
+            if not nome.endswith(".json"):
+                continue
+            try:
+                info = os.stat(os.path.join(self.diretorio, nome))
+            except OSError:
+                continue
+            arquivos.append((info.st_mtime, info.st_size, nome))
+
+        total = sum(tamanho for _, tamanho, _ in arquivos)
+        for _, tamanho, nome in sorted(arquivos):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.diretorio, nome))
+            except OSError:
+                continue
+            total -= tamanho
+
+    def limpar(self):
+        """Remove todas as respostas armazenadas."""
+        with self._lock:
+            if not os.path.isdir(self.diretorio):
+                return
+            for nome in os.listdir(self.diretorio):
+                if nome.endswith(".json"):
+                    os.remove(os.path.join(self.diretorio, nome))
+
+
+# Instância compartilhada pelo módulo do LLM
+cache_respostas = CacheRespostasLLM()
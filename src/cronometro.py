@@ -0,0 +1,84 @@
+# src/cronometro.py
+
+import io
+import os
+import time
+from contextlib import contextmanager, nullcontext
+
+
+# ==============================================================================
+# TEMPOS POR ETAPA E PERFIL (cProfile) DA EXECUÇÃO
+# ==============================================================================
+
+# Diretório dos perfis gravados pelo app (sobrescrevível por LYRA_PERFIS_DIR)
+DIRETORIO_PERFIS = os.getenv("LYRA_PERFIS_DIR", os.path.join(".lyra_cache", "perfis"))
+
+
+class Cronometro:
+    """
+    Coleta intervalos de tempo das etapas de uma execução.
+
+    Cada registro é um dict {"etapa", "target", "duracao_s", ...detalhes}
+    (tamanho da grade, número de linhas etc.), serializável em JSON. Etapas
+    podem ser aninhadas; os registros entram na lista ao terminar.
+    """
+
+    def __init__(self):
+        self.registros = []
+
+    @contextmanager
+    def medir(self, etapa, target=None, **detalhes):
+        """Mede o bloco `with`; o dict retornado aceita detalhes calculados dentro dele."""
+        registro = {"etapa": etapa, "target": target, "duracao_s": None, **detalhes}
+        inicio = time.perf_counter()
+        try:
+            yield registro
+        finally:
+            registro["duracao_s"] = time.perf_counter() - inicio
+            self.registros.append(registro)
+
+    def incorporar(self, registros):
+        """Acrescenta registros coletados em outro lugar (ex.: processos de trabalho)."""
+        self.registros.extend(registros or [])
+
+    def totais(self):
+        """Tempo total por etapa, na ordem da primeira ocorrência."""
+        totais = {}
+        for registro in self.registros:
+            totais[registro["etapa"]] = totais.get(registro["etapa"], 0.0) + registro["duracao_s"]
+        return totais
+
+
+def medir(cronometro, etapa, target=None, **detalhes):
+    """`cronometro.medir(...)`, ou um bloco sem medição se `cronometro` for None."""
+    if cronometro is None:
+        return nullcontext(dict(detalhes))
+    return cronometro.medir(etapa, target, **detalhes)
+
+
+def iniciar_perfil():
+    """Inicia um cProfile.Profile para toda a execução."""
+    import cProfile
+
+    perfil = cProfile.Profile()
+    perfil.enable()
+    return perfil
+
+
+def salvar_perfil(perfil, diretorio=DIRETORIO_PERFIS, nome=None):
+    """Encerra o perfil e grava o arquivo .pstats; retorna o caminho."""
+    perfil.disable()
+    os.makedirs(diretorio, exist_ok=True)
+    nome = nome or time.strftime("lyra_%Y%m%d_%H%M%S.pstats")
+    caminho = os.path.join(diretorio, nome)
+    perfil.dump_stats(caminho)
+    return caminho
+
+
+def resumo_perfil(caminho, n_linhas=25, ordem="cumulative"):
+    """Texto com as `n_linhas` funções mais custosas de um arquivo .pstats."""
+    import pstats
+
+    saida = io.StringIO()
+    pstats.Stats(caminho, stream=saida).strip_dirs().sort_stats(ordem).print_stats(n_linhas)
+    return saida.getvalue()
@@ -0,0 +1,115 @@
+# src/desejabilidade.py
+
+import numpy as np
+
+
+# ==============================================================================
+# FUNÇÕES DE DESEJABILIDADE VETORIZADAS (Derringer–Suich)
+# ==============================================================================
+
+DIRECOES = ("higher", "lower", "target")
+
+
+def _validar_direcao(direction):
+    if direction not in DIRECOES:
+        raise ValueError(
+            f"Direção de desejabilidade inválida: '{direction}'. "
+            f"Use uma de {DIRECOES}."
+        )
+
+
+def alvo_padrao(L, T, alvo):
+    """Retorna o alvo da desejabilidade bilateral (ponto médio de [L, T] por padrão)."""
+    if alvo is None:
+        return (L + T) / 2.0
+    return float(alvo)
+
+
+def respostas_com_desejabilidade(d, L, T, s=1.0, direction="higher", alvo=None, t=1.0):
+    """
+    Inverte a desejabilidade: retorna os valores de resposta y com
+    desejabilidade igual a `d` (dois valores no caso "target", um nos demais).
+    """
+    _validar_direcao(direction)
+    L = float(L)
+    T = float(T)
+    d = float(np.clip(d, 0.0, 1.0))
+
+    def fracao(expoente):
+        return d ** (1.0 / expoente) if expoente > 0 else 1.0
+
+    if direction == "higher":
+        return [L + (T - L) * fracao(s)]
+    if direction == "lower":
+        return [T - (T - L) * fracao(s)]
+    alvo = alvo_padrao(L, T, alvo)
+    return [L + (alvo - L) * fracao(s), T - (T - alvo) * fracao(t)]
+
+
+def desejabilidade_array(y, L, T, s=1.0, direction="higher", alvo=None, t=1.0):
+    """
+    Desejabilidade de Derringer–Suich (0..1) calculada sobre um array inteiro.
+
+    direction:
+        "higher" → maximizar: 0 abaixo de L, 1 acima de T, ((y - L) / (T - L)) ** s entre eles.
+        "lower"  → minimizar: 1 abaixo de L, 0 acima de T, ((T - y) / (T - L)) ** s entre eles.
+        "target" → bilateral: 1 em `alvo`, 0 fora de [L, T];
+                   ((y - L) / (alvo - L)) ** s à esquerda e ((T - y) / (T - alvo)) ** t à direita.
+    s, t: expoentes de forma (t é usado apenas no lado direito do caso "target").
+    """
+    _validar_direcao(direction)
+    y = np.asarray(y, dtype=float)
+    L = float(L)
+    T = float(T)
+
+    if T == L:
+        return np.zeros_like(y)
+
+    if direction == "higher":
+        z = np.power(np.clip((y - L) / (T - L), 0.0, 1.0), s)
+        return np.where(y < L, 0.0, np.where(y > T, 1.0, z))
+
+    if direction == "lower":
+        z = np.power(np.clip((T - y) / (T - L), 0.0, 1.0), s)
+        return np.where(y > T, 0.0, np.where(y < L, 1.0, z))
+
+    # direction == "target"
+    alvo = alvo_padrao(L, T, alvo)
+    if not (L <= alvo <= T):
+        raise ValueError(f"O alvo ({alvo}) deve estar dentro de [L, T] = [{L}, {T}].")
+
+    if alvo > L:
+        esquerda = np.power(np.clip((y - L) / (alvo - L), 0.0, 1.0), s)
+    else:
+        esquerda = np.ones_like(y)
+    if T > alvo:
+        direita = np.power(np.clip((T - y) / (T - alvo), 0.0, 1.0), t)
+    else:
+        direita = np.ones_like(y)
+    d = np.where(y <= alvo, esquerda, direita)
+    d = np.where((y < L) | (y > T), 0.0, d)
+    # Preserva NaN de entradas inválidas (np.where com comparações NaN cai no ramo direito)
+    return np.where(np.isnan(y), np.nan, d)
+
+
+def desejabilidade_global(d_individuais, pesos=None):
+    """
+    Combina desejabilidades individuais por média geométrica ponderada.
+
+    d_individuais: array (n_pontos, n_respostas).
+    pesos: um peso não negativo por resposta (default: pesos iguais).
+    Qualquer desejabilidade individual nula (com peso > 0) zera a global.
+    """
+    d = np.asarray(d_individuais, dtype=float)
+    if d.ndim == 1:
+        d = d[:, None]
+    w = np.ones(d.shape[1]) if pesos is None else np.asarray(pesos, dtype=float)
+    if w.shape != (d.shape[1],) or np.any(w < 0) or w.sum() <= 0:
+        raise ValueError("Os pesos devem ser não negativos, um por resposta, com soma positiva.")
+    w = w / w.sum()
+
+    with np.errstate(divide="ignore"):
+        log_d = np.log(d)
+    # Respostas com peso nulo não participam (evita 0 * -inf = nan)
+    log_d[:, w == 0] = 0.0
+    return np.exp(log_d @ w)
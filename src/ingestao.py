@@ -0,0 +1,128 @@
+# src/ingestao.py
+
+import hashlib
+import io
+import json
+import os
+import shutil
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from src.analysis_pipeline import load_and_clean_data, separar_variaveis
+
+
+# ==============================================================================
+# CACHE COLUNAR EM DISCO DOS DADOS INGERIDOS (um .npy por coluna)
+# ==============================================================================
+
+# Diretório do cache (sobrescrevível pela variável de ambiente LYRA_CACHE_DADOS_DIR)
+DIRETORIO_PADRAO = os.getenv("LYRA_CACHE_DADOS_DIR", os.path.join(".lyra_cache", "dados"))
+
+# Versão do formato: mudar ao alterar a limpeza dos dados invalida o cache antigo
+VERSAO_FORMATO = 2
+
+NOME_METADADOS = "metadados.json"
+NOME_INDICE = "indice.npy"
+
+
+def hash_conteudo(conteudo):
+    """Hash SHA-256 (hex) do conteúdo binário de um arquivo."""
+    return hashlib.sha256(conteudo).hexdigest()
+
+
+class _ArquivoEmMemoria(io.BytesIO):
+    """BytesIO com atributo `name`, como o objeto do st.file_uploader."""
+
+    def __init__(self, conteudo, name):
+        super().__init__(conteudo)
+        self.name = name
+
+
+def _diretorio_do_hash(hash_arquivo, diretorio):
+    return os.path.join(diretorio, f"v{VERSAO_FORMATO}", hash_arquivo)
+
+
+def salvar_tabela(hash_arquivo, df, diretorio=DIRETORIO_PADRAO):
+    """
+    Grava a tabela limpa como um .npy por coluna, mais o índice e os metadados
+    (nomes das colunas). A escrita é feita em um
+    diretório temporário renomeado ao final, para que leitores concorrentes
+    nunca vejam uma entrada incompleta.
+    """
+    destino = _diretorio_do_hash(hash_arquivo, diretorio)
+    if os.path.isdir(destino):
+        return destino
+    temporario = f"{destino}.{uuid.uuid4().hex}.tmp"
+    os.makedirs(temporario)
+    try:
+        for i, coluna in enumerate(df.columns):
+            np.save(os.path.join(temporario, f"{i}.npy"), np.ascontiguousarray(df[coluna].to_numpy()))
+        np.save(os.path.join(temporario, NOME_INDICE), df.index.to_numpy())
+        metadados = {
+            "versao": VERSAO_FORMATO,
+            "colunas": [str(c) for c in df.columns],
+            "n_linhas": int(len(df)),
+        }
+        with open(os.path.join(temporario, NOME_METADADOS), "w", encoding="utf-8") as fp:
+            json.dump(metadados, fp, ensure_ascii=False)
+        try:
+            os.replace(temporario, destino)
+        except OSError:
+            # Outro processo gravou a mesma entrada primeiro
+            shutil.rmtree(temporario, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(temporario, ignore_errors=True)
+        raise
+    return destino
+
+
+def carregar_tabela(hash_arquivo, diretorio=DIRETORIO_PADRAO):
+    """
+    Lê uma tabela do cache com as colunas mapeadas em memória (np.load com
+    mmap_mode="c": cópia-na-escrita, o arquivo em disco nunca é alterado).
+    Retorna o DataFrame ou None se o hash não estiver no cache.
+    """
+    origem = _diretorio_do_hash(hash_arquivo, diretorio)
+    try:
+        with open(os.path.join(origem, NOME_METADADOS), encoding="utf-8") as fp:
+            metadados = json.load(fp)
+        colunas = {
+            nome: np.asarray(np.load(os.path.join(origem, f"{i}.npy"), mmap_mode="c"))
+            for i, nome in enumerate(metadados["colunas"])
+        }
+        indice = np.load(os.path.join(origem, NOME_INDICE))
+    except (OSError, ValueError, KeyError):
+        return None
+    df = pd.DataFrame(colunas, index=pd.Index(indice), copy=False)
+    return df
+
+
+def carregar_com_cache(conteudo, nome, hash_arquivo=None, diretorio=DIRETORIO_PADRAO, n_independentes=3):
+    """
+    Carrega e limpa um arquivo (bytes + nome) usando o cache colunar: arquivos
+    já vistos são lidos do disco sem reabrir o .xlsx/.csv; os demais passam
+    por `load_and_clean_data` e são gravados no cache. A separação entre
+    independentes (`n_independentes` colunas após 'Ensaio') e dependentes é
+    refeita a cada leitura, então a mesma entrada serve a qualquer número de fatores.
+
+    Retorna (df, independentes, dependentes, hash_arquivo); df é None se a
+    leitura falhar (nada é gravado nesse caso).
+    """
+    if hash_arquivo is None:
+        hash_arquivo = hash_conteudo(conteudo)
+
+    df = carregar_tabela(hash_arquivo, diretorio)
+    if df is not None:
+        independentes, dependentes = separar_variaveis(df, n_independentes)
+        return df, independentes, dependentes, hash_arquivo
+
+    df, independentes, dependentes = load_and_clean_data(_ArquivoEmMemoria(conteudo, nome), n_independentes)
+    if df is not None:
+        try:
+            salvar_tabela(hash_arquivo, df, diretorio)
+        except OSError:
+            # Cache indisponível (ex.: disco somente leitura): segue sem ele
+            pass
+    return df, independentes, dependentes, hash_arquivo
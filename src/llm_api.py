@@ -1,134 +1,402 @@
 # src/llm_api.py
 
-import json
+import asyncio
 import os
+import threading
 from dotenv import load_dotenv
 
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.messages import HumanMessage, SystemMessage
-from langchain_core.exceptions import OutputParserException 
-
-# Importa a exceção correta do Google para capturar erros de API
-from google.api_core.exceptions import GoogleAPICallError 
+# langchain e o SDK do Google são importados sob demanda (no primeiro relatório)
+from src.cache_llm import cache_respostas, cache_desativado, chave_da_requisicao
+from src.prompt_compacto import codificar_analises, ORCAMENTO_TOKENS_PADRAO
 
 load_dotenv() 
 
-# Carrega a chave de API do Gemini da variável de ambiente GOOGLE_API_KEY
-api_key_gemini = os.getenv("GOOGLE_API_KEY") 
+# Cliente do Gemini, criado no primeiro uso por get_llm()
+_llm = None
+_llm_lock = threading.Lock()
 
-# Inicializa o modelo do Gemini com as configurações de contexto longo
-llm = ChatGoogleGenerativeAI(
-    # Modelo atual recomendado para velocidade e contexto longo
-    model="gemini-2.5-flash", 
-    google_api_key=api_key_gemini,
-    # Define o limite máximo de tokens de saída para o relatório detalhado (25.000)
-    max_output_tokens=25000, 
-    # Temperatura baixa (0.2) para garantir que a saída seja técnica e pouco criativa
-    temperature=0.2 
-)
 
-def generate_final_prompt(analises):
+def get_llm():
+    """
+    Retorna o cliente do Gemini, criado de forma preguiçosa e thread-safe no
+    primeiro uso. Retorna None se a inicialização falhar (geralmente por falta
+    da chave de API); nesse caso, a criação é tentada de novo na próxima chamada.
+    """
+    global _llm
+    if _llm is None:
+        with _llm_lock:
+            if _llm is None:
+                try:
+                    from langchain_google_genai import ChatGoogleGenerativeAI
+
+                    # Inicializa o modelo do Gemini com as configurações de contexto longo
+                    _llm = ChatGoogleGenerativeAI(
+                        # Modelo atual recomendado para velocidade e contexto longo
+                        model="gemini-2.5-flash", 
+                        # Carrega a chave de API do Gemini da variável de ambiente GOOGLE_API_KEY
+                        google_api_key=os.getenv("GOOGLE_API_KEY"),
+                        # Define o limite máximo de tokens de saída para o relatório detalhado (25.000)
+                        max_output_tokens=25000, 
+                        # Temperatura baixa (0.2) para garantir que a saída seja técnica e pouco criativa
+                        temperature=0.2 
+                    )
+                except Exception:
+                    return None
+    return _llm
+
+# Persona do Agente Inteligente LYRA
+MENSAGEM_SISTEMA = "Você é um assistente especializado em análise de dados e estatística. Sua tarefa é gerar relatórios técnicos detalhados com base em análises de variância (ANOVA) e modelos de regressão."
+
+# Regras de formatação do relatório (compartilhadas pelo modo único e pelo modo por variável)
+REGRAS_FORMATACAO = """\
+REGRAS DE FORMATAÇÃO (obrigatórias):
+
+Uma seção por variável: "### Análise: <variável>".
+
+Sumário (em linha única) com: R², Significativo?, Preditivo (LoF)?.
+
+Mapear de metricas: "R2 (%)", "Significativo", "Predicao Ajustada". Se ausente, "Não informado".
+
+Tabela ANOVA por termo (se houver anova_completa), com colunas:
+Termo | Soma dos Quadrados | gl | F | p-valor | Significativo?
+
+Mapear nomes possíveis: sum_sq→Soma dos Quadrados; df→gl; F→F; PR(>F) ou pvalue→p-valor.
+
+Significativo? = p-valor <= 0.10.
+
+Limitar a no MÁXIMO 8 linhas mais relevantes (se houver mais).
+
+Seleção de features:
+
+Se pareto.significativo estiver vazio/inexistente: escrever a linha
+"Não foram encontradas features significativas para <variável>. Nenhum modelo foi gerado."
+e PULAR Fórmula/Métricas/Desejabilidade para esta variável.
+
+Se selecao.caminho existir (seleção stepwise), citar o método (selecao.metodo) e listar em uma linha os termos removidos/incluídos, na ordem, com seus p-valores.
+
+Fórmula do modelo (somente se houver modelo; coeficientes em "coeficientes"):
+
+Mostrar fórmula em uma **única linha legível**, utilizando o **bloco de código `inline`** (``` `fórmula` ```) ou, preferencialmente, o bloco de código simples (` ``` `) para destacar a equação:
+```
+Y = Intercepto + (coef_1 * Termo_1) + ...
+```
+
+Se desejabilidade.modelo_funcao_py existir, exibir bloco de código com essa função.
+
+Métricas do modelo (se metricas existir): tabela compacta com
+R2 (%), R2_max (%), F_reg, F_tab_reg, F_lof, F_tab_lof, Significativo, Predicao Ajustada.
+
+Desejabilidade (se bloco desejabilidade existir):
+
+Se aplica for false/ausente: imprimir apenas mensagem.
+
+Se aplica for true:
+a) Mostrar mensagem.
+b) Se houver, listar "Espaços de busca" em tabela: Variável | min | max | n.
+c) Se houver, exibir blocos de código de modelo_funcao_py e desejabilidade_funcao_py.
+d) [CENÁRIOS OTIMIZADOS] **NÃO exiba a tabela com o top 20.** Em vez disso, analise a lista de "resultados" (que já está ordenada por Desejabilidade) e **apresente 3 cenários de otimização distintos**, priorizando os melhores índices de desejabilidade em cada categoria:
+
+    1. **Cenário Econômico (Baixo Custo):** Selecione o ponto com **maior desejabilidade** que utilize os **menores valores** de tempo de processo/energia (ex: `Tempo_Ultrassom_min` e `Tempo_shaker_min`).
+
+    2. **Cenário Intermediário:** Selecione o ponto com **desejabilidade máxima** que possua valores de entrada (tempo/temperatura) dentro da **faixa média** dos "Espaços de busca".
+
+    3. **Cenário de Alta Performance (Alto Custo):** Selecione o ponto com **desejabilidade máxima** que utilize os **maiores valores** de fatores de custo/tempo.
+
+NUNCA inventar valores/colunas. Manter nomes exatamente como no JSON.
+"""
+
+# Explica ao modelo o formato compacto do JSON (ver src/prompt_compacto.py)
+NOTA_FORMATO_COMPACTO = "Listas de linhas (ANOVA, resultados) estão em formato colunar: {coluna: [valores]}, na ordem original."
+
+def generate_final_prompt(analises, orcamento_tokens=ORCAMENTO_TOKENS_PADRAO):
     """
     Cria o prompt dinâmico completo, estruturando a SystemMessage e a HumanMessage
     com as regras detalhadas de formatação para o relatório estatístico.
+
+    As análises são serializadas uma única vez, em JSON compacto limitado a
+    `orcamento_tokens` (tokens estimados); o template resultante já contém os
+    dados e não tem variáveis a preencher.
     """
-    # Converte o dicionário de análises para uma string JSON formatada
-    json_analises = json.dumps(analises, indent=2)
+    from langchain_core.prompts import ChatPromptTemplate
+    from langchain_core.messages import HumanMessage, SystemMessage
+
+    # Converte as análises para JSON compacto (uma única serialização)
+    json_analises = codificar_analises(analises, orcamento_tokens=orcamento_tokens)
     
     # Define a persona e as instruções do Agente Inteligente LYRA
     prompt_template = ChatPromptTemplate.from_messages([
-        SystemMessage(content="Você é um assistente especializado em análise de dados e estatística. Sua tarefa é gerar relatórios técnicos detalhados com base em análises de variância (ANOVA) e modelos de regressão."),
+        SystemMessage(content=MENSAGEM_SISTEMA),
         HumanMessage(content=f"""
                 Gere um relatório analítico e técnico em português, com uma linguagem clara e precisa, consolidando as análises estatísticas a seguir.
                 Aqui estão os resultados das análises, em formato JSON:
                 ```json
                 {json_analises}
                 ```
-                REGRAS DE FORMATAÇÃO (obrigatórias):
+                {NOTA_FORMATO_COMPACTO}
 
-                Uma seção por variável: "### Análise: <variável>".
+                {REGRAS_FORMATACAO}
+        """)
+    ])
+                    
+    return prompt_template
 
-                Sumário (em linha única) com: R², Significativo?, Preditivo (LoF)?.
 
-                Mapear de metricas: "R2 (%)", "Significativo", "Predicao Ajustada". Se ausente, "Não informado".
+def _mensagem_de_erro(e, contexto=""):
+    """Mensagem exibida ao usuário para uma exceção da chamada ao LLM."""
+    from langchain_core.exceptions import OutputParserException
+    from google.api_core.exceptions import GoogleAPICallError
 
-                Tabela ANOVA por termo (se houver anova_completa), com colunas:
-                Termo | Soma dos Quadrados | gl | F | p-valor | Significativo?
+    # Erros de comunicação com a API (ex: 404, cota excedida, chave inválida)
+    if isinstance(e, GoogleAPICallError):
+        return f"Erro na API do Google (Gemini){contexto}: {e}"
+    # Erros de parsing do LangChain (se a saída não for texto simples, por exemplo)
+    if isinstance(e, OutputParserException):
+        return f"Erro de formatação/parsing da saída{contexto}: {e}"
+    return f"Erro desconhecido ao conectar com a IA{contexto}: {e}"
 
-                Mapear nomes possíveis: sum_sq→Soma dos Quadrados; df→gl; F→F; PR(>F) ou pvalue→p-valor.
 
-                Significativo? = p-valor <= 0.10.
+def _modelo_ou_erro(llm_modelo):
+    """(chat model, None) ou (None, mensagem) se o Gemini não pôde ser inicializado."""
+    modelo_llm = get_llm() if llm_modelo is None else llm_modelo
+    if not modelo_llm or (llm_modelo is None and not modelo_llm.client):
+        return None, "Erro: O modelo de linguagem não foi inicializado. Verifique a chave de API."
+    return modelo_llm, None
 
-                Limitar a no MÁXIMO 8 linhas mais relevantes (se houver mais).
 
-                Seleção de features:
+def gerar_relatorio(prompt_template, usar_cache=True, llm_modelo=None):
+    """
+    Envia o prompt formatado ao modelo e retorna (texto, erro): em caso de
+    sucesso, erro é None; em caso de falha, texto é None e erro traz a
+    mensagem para o usuário. O status nunca é deduzido do conteúdo do texto
+    (um relatório pode citar "Erro puro" da ANOVA).
 
-                Se pareto.significativo estiver vazio/inexistente: escrever a linha
-                "Não foram encontradas features significativas para <variável>. Nenhum modelo foi gerado."
-                e PULAR Fórmula/Métricas/Desejabilidade para esta variável.
+    Com `usar_cache`, respostas para as mesmas mensagens e configurações do
+    modelo são reaproveitadas do cache em disco (LYRA_SEM_CACHE_LLM=1 desativa).
+    llm_modelo: chat model alternativo (padrão: o Gemini do módulo).
+    """
+    modelo_llm, erro = _modelo_ou_erro(llm_modelo)
+    if erro:
+        return None, erro
 
-                Fórmula do modelo (somente se houver modelo):
+    try:
+        # Formata o prompt com os dados da análise (converte o template em mensagens de Chat)
+        messages = prompt_template.format_messages()
 
-                Mostrar fórmula em uma **única linha legível**, utilizando o **bloco de código `inline`** (``` `fórmula` ```) ou, preferencialmente, o bloco de código simples (` ``` `) para destacar a equação:
-                ```
-                Y = Intercepto + (coef_1 * Termo_1) + ...
-                ```
+        # Reaproveita a resposta de uma requisição idêntica, se houver
+        chave = None
+        if usar_cache and not cache_desativado():
+            chave = chave_da_requisicao(messages, modelo_llm)
+            em_cache = cache_respostas.obter(chave)
+            if em_cache is not None:
+                return em_cache, None
 
-                Se desejabilidade.modelo_funcao_py existir, exibir bloco de código com essa função.
+        response = modelo_llm.invoke(messages)
+    except Exception as e:
+        return None, _mensagem_de_erro(e)
 
-                Métricas do modelo (se metricas existir): tabela compacta com
-                R2 (%), R2_max (%), F_reg, F_tab_reg, F_lof, F_tab_lof, Significativo, Predicao Ajustada.
+    if not response or not response.content:
+        return None, "Erro: A resposta da LLM está vazia."
+    if chave is not None:
+        cache_respostas.gravar(chave, response.content)
+    return response.content, None
 
-                Desejabilidade (se bloco desejabilidade existir):
 
-                Se aplica for false/ausente: imprimir apenas mensagem.
+def get_llm_response(prompt_template, analises_data, usar_cache=True):
+    """
+    Envia o prompt formatado para o modelo Gemini e trata erros de API.
+    O prompt de `generate_final_prompt` já contém as análises; `analises_data`
+    é mantido por compatibilidade.
 
-                Se aplica for true:
-                a) Mostrar mensagem.
-                b) Se houver, listar "Espaços de busca" em tabela: Variável | min | max | n.
-                c) Se houver, exibir blocos de código de modelo_funcao_py e desejabilidade_funcao_py.
-                d) [CENÁRIOS OTIMIZADOS] **NÃO exiba a tabela com o top 20.** Em vez disso, analise a lista de "resultados" (que já está ordenada por Desejabilidade) e **apresente 3 cenários de otimização distintos**, priorizando os melhores índices de desejabilidade em cada categoria:
-                    
-                    1. **Cenário Econômico (Baixo Custo):** Selecione o ponto com **maior desejabilidade** que utilize os **menores valores** de tempo de processo/energia (ex: `Tempo_Ultrassom_min` e `Tempo_shaker_min`).
-                    
-                    2. **Cenário Intermediário:** Selecione o ponto com **desejabilidade máxima** que possua valores de entrada (tempo/temperatura) dentro da **faixa média** dos "Espaços de busca".
-                    
-                    3. **Cenário de Alta Performance (Alto Custo):** Selecione o ponto com **desejabilidade máxima** que utilize os **maiores valores** de fatores de custo/tempo.
+    Retorna o relatório ou a mensagem de erro; para saber se houve falha sem
+    inspecionar o texto, use `gerar_relatorio`.
+    """
+    texto, erro = gerar_relatorio(prompt_template, usar_cache=usar_cache)
+    return texto if erro is None else erro
 
-                NUNCA inventar valores/colunas. Manter nomes exatamente como no JSON.
-        """)
-    ])
-                    
-    return prompt_template
 
+class RelatorioEmStreaming:
+    """
+    Relatório gerado em streaming (`llm.stream`), iterável trecho a trecho
+    para exibição progressiva (ex.: `st.write_stream`).
 
-def get_llm_response(prompt_template, analises_data):
+    Ao fim da iteração, `texto` tem o relatório recebido e `erro` a mensagem
+    de falha (ou None). A mensagem de erro também é entregue como último
+    trecho, para aparecer na tela. Um acerto no cache entrega o relatório
+    inteiro de uma vez; um relatório completo é gravado no cache ao final.
     """
-    Envia o prompt formatado para o modelo Gemini e trata erros de API.
+
+    def __init__(self, prompt_template, usar_cache=True, llm_modelo=None):
+        self.prompt_template = prompt_template
+        self.usar_cache = usar_cache
+        self.llm_modelo = llm_modelo
+        self.texto = ""
+        self.erro = None
+
+    def __iter__(self):
+        modelo_llm, self.erro = _modelo_ou_erro(self.llm_modelo)
+        if self.erro:
+            yield self.erro
+            return
+
+        partes = []
+        try:
+            messages = self.prompt_template.format_messages()
+
+            chave = None
+            if self.usar_cache and not cache_desativado():
+                chave = chave_da_requisicao(messages, modelo_llm)
+                em_cache = cache_respostas.obter(chave)
+                if em_cache is not None:
+                    self.texto = em_cache
+                    yield em_cache
+                    return
+
+            for chunk in modelo_llm.stream(messages):
+                texto = chunk.content if isinstance(chunk.content, str) else ""
+                if texto:
+                    partes.append(texto)
+                    yield texto
+        except Exception as e:
+            self.erro = _mensagem_de_erro(e)
+        finally:
+            self.texto = "".join(partes) or self.texto
+
+        if self.erro is None and not partes:
+            self.erro = "Erro: A resposta da LLM está vazia."
+        if self.erro is not None:
+            # Após um relatório parcial, o erro vem em um novo parágrafo
+            yield f"\n\n{self.erro}" if partes else self.erro
+        elif chave is not None:
+            cache_respostas.gravar(chave, self.texto)
+
+
+def stream_llm_response(prompt_template, analises_data=None, usar_cache=True, llm_modelo=None):
     """
-    # Verifica se a inicialização do LLM falhou (geralmente por falta da chave de API)
-    if not llm or not llm.client:
-        return "Erro: O modelo de linguagem não foi inicializado. Verifique a chave de API."
-    
-    try:
-        # Formata o prompt com os dados da análise (converte o template em mensagens de Chat)
-        messages = prompt_template.format_messages(json_analises=json.dumps(analises_data, indent=2))
-        
-        # Invoca o modelo e retorna a resposta
-        response = llm.invoke(messages)
-        
-        if response:
-            return response.content
+    Versão em streaming de `get_llm_response`: retorna um `RelatorioEmStreaming`
+    (iterável com os trechos; `erro` indica a falha ao fim da iteração).
+    """
+    return RelatorioEmStreaming(prompt_template, usar_cache=usar_cache, llm_modelo=llm_modelo)
+
+
+# ==============================================================================
+# RELATÓRIO POR VARIÁVEL (chamadas assíncronas concorrentes)
+# ==============================================================================
+
+# Número padrão de seções geradas ao mesmo tempo
+MAX_CONCORRENCIA_PADRAO = 4
+
+
+def _analises_por_variavel(analises):
+    """
+    Normaliza as análises em uma lista [(variavel, analise)], na ordem original.
+    Aceita a lista do app (itens com "variavel") ou o dicionário {target: ...}
+    de `run_analysis_pipeline`.
+    """
+    if isinstance(analises, dict):
+        return list(analises.items())
+    return [(a.get("variavel", a.get("target", f"variavel_{i + 1}")), a) for i, a in enumerate(analises)]
+
+
+def generate_section_messages(variavel, analise, orcamento_tokens=ORCAMENTO_TOKENS_PADRAO):
+    """
+    Mensagens de chat para gerar somente a seção de uma variável,
+    sob as mesmas regras de formatação do relatório completo.
+    """
+    from langchain_core.messages import HumanMessage, SystemMessage
+
+    json_analise = codificar_analises(analise, orcamento_tokens=orcamento_tokens)
+    return [
+        SystemMessage(content=MENSAGEM_SISTEMA),
+        HumanMessage(content=f"""
+Gere APENAS a seção "### Análise: {variavel}" de um relatório analítico e técnico em português, com uma linguagem clara e precisa.
+Não escreva introdução, conclusão geral nem seções de outras variáveis: esta seção será unida às demais.
+Aqui estão os resultados da análise desta variável, em formato JSON:
+```json
+{json_analise}
+```
+{NOTA_FORMATO_COMPACTO}
+
+{REGRAS_FORMATACAO}"""),
+    ]
+
+
+async def _gerar_secao(modelo_llm, semaforo, variavel, analise, usar_cache=True,
+                       orcamento_tokens=ORCAMENTO_TOKENS_PADRAO):
+    """Gera a seção de uma variável; retorna (texto, erro)."""
+    messages = generate_section_messages(variavel, analise, orcamento_tokens)
+    chave = None
+    if usar_cache and not cache_desativado():
+        chave = chave_da_requisicao(messages, modelo_llm)
+        em_cache = cache_respostas.obter(chave)
+        if em_cache is not None:
+            return em_cache, None
+
+    async with semaforo:
+        try:
+            response = await modelo_llm.ainvoke(messages)
+        except Exception as e:
+            return None, _mensagem_de_erro(e, f" na seção '{variavel}'")
+    if not response or not response.content:
+        return None, f"Erro: A resposta da LLM está vazia na seção '{variavel}'."
+    if chave is not None:
+        cache_respostas.gravar(chave, response.content)
+    return response.content, None
+
+
+def _nota_de_falha(variavel, erro):
+    """Seção que substitui, no relatório, a de uma variável que não pôde ser gerada."""
+    return f"### Análise: {variavel}\n\n> **Seção não gerada.** {erro}"
+
+
+async def get_llm_response_por_variavel_async(analises, llm_modelo=None, max_concorrencia=MAX_CONCORRENCIA_PADRAO,
+                                              usar_cache=True, orcamento_tokens=ORCAMENTO_TOKENS_PADRAO):
+    """
+    Gera uma seção por variável com chamadas `ainvoke` concorrentes (no máximo
+    `max_concorrencia` simultâneas) e une as seções na ordem das análises.
+
+    llm_modelo: qualquer chat model do LangChain (padrão: o Gemini do módulo);
+    permite testar o modo com um modelo falso local.
+    usar_cache: reaproveita seções idênticas do cache em disco.
+    orcamento_tokens: limite (estimado) do JSON de cada seção.
+
+    Retorna (texto, erros). Uma seção que falha não descarta as demais: o
+    texto traz as seções geradas e, no lugar de cada variável que falhou, uma
+    nota com o erro; `erros` lista as mensagens (vazia se tudo deu certo).
+    Se nada pôde ser gerado (modelo não inicializado, sem análises), texto é None.
+    """
+    modelo_llm, erro = _modelo_ou_erro(llm_modelo)
+    if erro:
+        return None, [erro]
+
+    itens = _analises_por_variavel(analises)
+    if not itens:
+        return None, ["AVISO: Não há análises para gerar o relatório."]
+
+    semaforo = asyncio.Semaphore(max(1, int(max_concorrencia)))
+    secoes = await asyncio.gather(
+        *(
+            _gerar_secao(modelo_llm, semaforo, variavel, analise, usar_cache, orcamento_tokens)
+            for variavel, analise in itens
+        )
+    )
+
+    partes = []
+    erros = []
+    for (variavel, _), (texto, erro) in zip(itens, secoes):
+        if erro:
+            erros.append(erro)
+            partes.append(_nota_de_falha(variavel, erro))
         else:
-            return "Erro: A resposta da LLM está vazia."
-            
-    # Captura erros de comunicação com a API (ex: 404, cota excedida, chave inválida)
-    except GoogleAPICallError as e:
-        return f"Erro na API do Google (Gemini): {e}"
-    # Captura erros de parsing do LangChain (se a saída não for texto simples, por exemplo)
-    except OutputParserException as e:
-        return f"Erro de formatação/parsing da saída: {e}"
-    # Captura qualquer outra exceção genérica
-    except Exception as e:
-        return f"Erro desconhecido ao conectar com a IA: {e}"
\ No newline at end of file
+            partes.append(texto.strip())
+    return "\n\n".join(partes), erros
+
+
+def get_llm_response_por_variavel(analises, llm_modelo=None, max_concorrencia=MAX_CONCORRENCIA_PADRAO,
+                                  usar_cache=True, orcamento_tokens=ORCAMENTO_TOKENS_PADRAO):
+    """Versão síncrona de `get_llm_response_por_variavel_async` (para o app e o lote); retorna (texto, erros)."""
+    return asyncio.run(
+        get_llm_response_por_variavel_async(
+            analises, llm_modelo=llm_modelo, max_concorrencia=max_concorrencia,
+            usar_cache=usar_cache, orcamento_tokens=orcamento_tokens,
+        )
+    )
@@ -0,0 +1,304 @@
+# src/lote.py
+"""
+Processamento em lote (sem Streamlit) de um diretório de planejamentos.
+
+Uso:
+    python -m src.lote data/ --saida reports/lote/ --processos 4
+
+Para cada arquivo .xlsx/.csv do diretório, grava `<nome>.json` com os
+resultados de `run_analysis_pipeline`, `<nome>.md` com o relatório do LLM e
+`<nome>.modelos.json` com os artefatos dos modelos reduzidos (pontuação de
+novas condições com `python -m src.pontuacao`, sem reajustar).
+Arquivos cujo hash de conteúdo não mudou desde a última execução são pulados
+(o manifesto fica em `<saida>/.lyra_manifesto.json`). O JSON traz também os
+tempos de cada etapa ("tempos"); `--perfil` grava um perfil cProfile da execução.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from src.analysis_pipeline import run_analysis_pipeline
+from src.artefatos import salvar_artefatos
+from src.cronometro import Cronometro, iniciar_perfil, salvar_perfil
+from src.ingestao import carregar_com_cache, hash_conteudo
+
+
+# ==============================================================================
+# CONFIGURAÇÃO
+# ==============================================================================
+
+EXTENSOES = (".xlsx", ".csv")
+NOME_MANIFESTO = ".lyra_manifesto.json"
+
+# Subdiretório próprio: não sobrescreve os relatórios escritos à mão em reports/
+SAIDA_PADRAO = os.path.join("reports", "lote")
+
+
+def _serializavel(obj):
+    """Conversor `default` do json.dump para tipos NumPy/pandas."""
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, np.floating):
+        return float(obj)
+    if isinstance(obj, np.bool_):
+        return bool(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    return str(obj)
+
+
+def listar_arquivos(diretorio):
+    """Arquivos de planejamento do diretório, em ordem alfabética."""
+    return sorted(
+        os.path.join(diretorio, nome)
+        for nome in os.listdir(diretorio)
+        if nome.lower().endswith(EXTENSOES) and not nome.startswith(("~$", "."))
+    )
+
+
+def carregar_manifesto(saida):
+    caminho = os.path.join(saida, NOME_MANIFESTO)
+    if not os.path.exists(caminho):
+        return {}
+    with open(caminho, encoding="utf-8") as fp:
+        return json.load(fp)
+
+
+def salvar_manifesto(saida, manifesto):
+    # Escrita atômica: um manifesto truncado faria todos os arquivos serem reprocessados
+    caminho = os.path.join(saida, NOME_MANIFESTO)
+    temporario = caminho + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as fp:
+        json.dump(manifesto, fp, indent=2, ensure_ascii=False, sort_keys=True)
+    os.replace(temporario, caminho)
+
+
+def _saidas(saida, caminho):
+    base = os.path.splitext(os.path.basename(caminho))[0]
+    return (
+        os.path.join(saida, base + ".json"),
+        os.path.join(saida, base + ".md"),
+        os.path.join(saida, base + ".modelos.json"),
+    )
+
+
+def esta_atualizado(entrada, hash_arquivo, com_relatorio, n_independentes=3):
+    """
+    True se o manifesto registra o mesmo hash (e o mesmo número de fatores)
+    e as saídas ainda existem.
+    """
+    if not entrada or entrada.get("hash") != hash_arquivo:
+        return False
+    if entrada.get("n_independentes", 3) != n_independentes:
+        return False
+    saidas = [entrada.get("json"), entrada.get("modelos")]
+    if com_relatorio:
+        saidas.append(entrada.get("relatorio"))
+    return all(s and os.path.exists(s) for s in saidas)
+
+
+# ==============================================================================
+# PROCESSAMENTO DE UM ARQUIVO
+# ==============================================================================
+
+def processar_arquivo(caminho, saida, hash_arquivo, com_relatorio=True,
+                      termos_interacao=True, termos_quadraticos=True, por_variavel=False,
+                      usar_cache_llm=True, n_independentes=3):
+    """
+    Executa carregamento, pipeline de análise e (opcionalmente) o relatório do
+    LLM para um arquivo (com `por_variavel`, uma seção por variável gerada
+    em chamadas concorrentes). Retorna a entrada do manifesto; em caso de falha,
+    a entrada traz "erro" e o hash não é registrado. `n_independentes` é o
+    número de fatores (colunas após 'Ensaio'). Os tempos das etapas vão para o
+    JSON ("tempos") e os totais por etapa, com o do relatório, para a entrada.
+    """
+    caminho_json, caminho_md, caminho_modelos = _saidas(saida, caminho)
+    entrada = {"arquivo": caminho}
+    cronometro = Cronometro()
+
+    with cronometro.medir("carregamento") as registro:
+        with open(caminho, "rb") as fp:
+            conteudo = fp.read()
+        df, independentes, dependentes, _ = carregar_com_cache(
+            conteudo, caminho, hash_arquivo, n_independentes=n_independentes
+        )
+        registro["n_linhas"] = 0 if df is None else len(df)
+    if df is None:
+        entrada["erro"] = "Falha ao carregar o arquivo (estrutura inesperada)."
+        return entrada
+
+    with cronometro.medir("pipeline", n_respostas=len(dependentes)):
+        resultados = run_analysis_pipeline(
+            df, independentes, dependentes, termos_interacao, termos_quadraticos, cronometro=cronometro
+        )
+    # Artefatos dos modelos em arquivo próprio (fora do JSON de resultados)
+    artefatos = [r.pop("artefato") for r in resultados.values() if "artefato" in r]
+    salvar_artefatos(artefatos, caminho_modelos, os.path.basename(caminho), hash_arquivo)
+    entrada["modelos"] = caminho_modelos
+
+    # Ida e volta em JSON: o mesmo conteúdo do arquivo é enviado ao LLM
+    resultados = json.loads(json.dumps(resultados, default=_serializavel))
+    with open(caminho_json, "w", encoding="utf-8") as fp:
+        json.dump(
+            {
+                "arquivo": os.path.basename(caminho),
+                "hash": hash_arquivo,
+                "resultados": resultados,
+                "tempos": cronometro.registros,
+            },
+            fp, indent=2, ensure_ascii=False, default=_serializavel,
+        )
+    entrada["json"] = caminho_json
+
+    if com_relatorio:
+        from src.llm_api import generate_final_prompt, gerar_relatorio, get_llm_response_por_variavel
+
+        with cronometro.medir("relatorio_llm", por_variavel=por_variavel):
+            if por_variavel:
+                resposta, erros = get_llm_response_por_variavel(resultados, usar_cache=usar_cache_llm)
+            else:
+                resposta, erro = gerar_relatorio(generate_final_prompt(resultados), usar_cache=usar_cache_llm)
+                erros = [erro] if erro else []
+        if resposta is not None:
+            # Um relatório parcial (seções com falha) é gravado, mas o arquivo
+            # fica com erro no manifesto e será refeito na próxima execução
+            with open(caminho_md, "w", encoding="utf-8") as fp:
+                fp.write(resposta)
+            entrada["relatorio"] = caminho_md
+        if erros:
+            entrada["erro"] = "; ".join(erros)
+            return entrada
+
+    entrada["hash"] = hash_arquivo
+    entrada["n_independentes"] = n_independentes
+    entrada["tempos"] = cronometro.totais()
+    return entrada
+
+
+# ==============================================================================
+# PROCESSAMENTO DO DIRETÓRIO
+# ==============================================================================
+
+def processar_diretorio(diretorio, saida, n_processos=1, com_relatorio=True, forcar=False,
+                        por_variavel=False, usar_cache_llm=True, n_independentes=3, log=print):
+    """
+    Processa todos os planejamentos de `diretorio` (em paralelo com
+    `n_processos` > 1), pulando os que não mudaram. O manifesto é salvo após
+    cada arquivo concluído, para que uma interrupção não perca o progresso.
+
+    Retorna um dicionário {"processados": [...], "pulados": [...], "erros": {...}}.
+    """
+    os.makedirs(saida, exist_ok=True)
+    manifesto = carregar_manifesto(saida)
+    resumo = {"processados": [], "pulados": [], "erros": {}}
+
+    pendentes = []
+    for caminho in listar_arquivos(diretorio):
+        nome = os.path.basename(caminho)
+        with open(caminho, "rb") as fp:
+            hash_arquivo = hash_conteudo(fp.read())
+        if not forcar and esta_atualizado(manifesto.get(nome), hash_arquivo, com_relatorio, n_independentes):
+            resumo["pulados"].append(nome)
+            log(f"[pulado] {nome} (sem alterações)")
+        else:
+            pendentes.append((caminho, hash_arquivo))
+
+    def registrar(caminho, entrada):
+        nome = os.path.basename(caminho)
+        if "erro" in entrada:
+            resumo["erros"][nome] = entrada["erro"]
+            # Sem hash no manifesto: o arquivo será refeito na próxima execução
+            log(f"[erro] {nome}: {entrada['erro']}")
+        else:
+            resumo["processados"].append(nome)
+            log(f"[ok] {nome}")
+        manifesto[nome] = entrada
+        salvar_manifesto(saida, manifesto)
+
+    if n_processos is None or n_processos <= 1 or len(pendentes) <= 1:
+        for caminho, hash_arquivo in pendentes:
+            try:
+                entrada = processar_arquivo(
+                    caminho, saida, hash_arquivo, com_relatorio,
+                    por_variavel=por_variavel, usar_cache_llm=usar_cache_llm,
+                    n_independentes=n_independentes,
+                )
+            except Exception as e:
+                entrada = {"arquivo": caminho, "erro": f"{type(e).__name__}: {e}"}
+            registrar(caminho, entrada)
+        return resumo
+
+    contexto = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(int(n_processos), len(pendentes)), mp_context=contexto) as pool:
+        futuros = {
+            pool.submit(
+                processar_arquivo, caminho, saida, hash_arquivo, com_relatorio,
+                por_variavel=por_variavel, usar_cache_llm=usar_cache_llm,
+                n_independentes=n_independentes,
+            ): caminho
+            for caminho, hash_arquivo in pendentes
+        }
+        for futuro in as_completed(futuros):
+            caminho = futuros[futuro]
+            try:
+                entrada = futuro.result()
+            except Exception as e:
+                entrada = {"arquivo": caminho, "erro": f"{type(e).__name__}: {e}"}
+            registrar(caminho, entrada)
+    return resumo
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m src.lote",
+        description="Analisa em lote todos os planejamentos (.xlsx/.csv) de um diretório.",
+    )
+    parser.add_argument("diretorio", help="Diretório com os arquivos de planejamento.")
+    parser.add_argument("--saida", default=SAIDA_PADRAO,
+                        help=f"Diretório dos JSONs e relatórios (padrão: {SAIDA_PADRAO}).")
+    parser.add_argument("--processos", type=int, default=os.cpu_count() or 1,
+                        help="Número de arquivos processados em paralelo.")
+    parser.add_argument("--sem-relatorio", action="store_true",
+                        help="Grava apenas os JSONs, sem chamar o LLM.")
+    parser.add_argument("--por-variavel", action="store_true",
+                        help="Gera o relatório em seções por variável, com chamadas concorrentes ao LLM.")
+    parser.add_argument("--sem-cache-llm", action="store_true",
+                        help="Ignora o cache de respostas do LLM e sempre chama a API.")
+    parser.add_argument("--fatores", type=int, default=3,
+                        help="Número de variáveis independentes após a coluna 'Ensaio' (padrão: 3).")
+    parser.add_argument("--perfil", default=None,
+                        help="Grava um perfil cProfile (.pstats) da execução neste arquivo "
+                             "(só o processo principal; use com --processos 1).")
+    parser.add_argument("--forcar", action="store_true",
+                        help="Reprocessa todos os arquivos, mesmo sem alterações.")
+    args = parser.parse_args(argv)
+
+    perfil = iniciar_perfil() if args.perfil else None
+    resumo = processar_diretorio(
+        args.diretorio,
+        args.saida,
+        n_processos=args.processos,
+        com_relatorio=not args.sem_relatorio,
+        forcar=args.forcar,
+        por_variavel=args.por_variavel,
+        usar_cache_llm=not args.sem_cache_llm,
+        n_independentes=args.fatores,
+    )
+    if perfil is not None:
+        caminho = salvar_perfil(perfil, os.path.dirname(os.path.abspath(args.perfil)), os.path.basename(args.perfil))
+        print(f"Perfil gravado em {caminho}")
+    print(
+        f"{len(resumo['processados'])} processado(s), "
+        f"{len(resumo['pulados'])} pulado(s), {len(resumo['erros'])} com erro."
+    )
+    return 1 if resumo["erros"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+# src/modelo_compilado.py
+
+import ast
+import numpy as np
+
+
+# ==============================================================================
+# AVALIADOR COMPILADO DE TERMOS POLINOMIAIS
+# ==============================================================================
+
+def _fatores_da_expressao(expr):
+    """
+    Converte a expressão interna de um termo I(...) em {variavel: potencia}.
+
+    Aceita apenas produtos e potências inteiras de variáveis (ex.: "x ** 2",
+    "x * y"). Qualquer outra construção gera ValueError.
+    """
+    try:
+        arvore = ast.parse(expr, mode="eval").body
+    except SyntaxError as e:
+        raise ValueError(f"Expressão de termo inválida: '{expr}'") from e
+
+    fatores = {}
+
+    def visitar(no, expoente):
+        if isinstance(no, ast.Name):
+            fatores[no.id] = fatores.get(no.id, 0) + expoente
+        elif isinstance(no, ast.BinOp) and isinstance(no.op, ast.Mult):
+            visitar(no.left, expoente)
+            visitar(no.right, expoente)
+        elif (
+            isinstance(no, ast.BinOp)
+            and isinstance(no.op, ast.Pow)
+            and isinstance(no.right, ast.Constant)
+            and isinstance(no.right.value, int)
+            and not isinstance(no.right.value, bool)
+            and no.right.value >= 0
+        ):
+            visitar(no.left, expoente * no.right.value)
+        else:
+            raise ValueError(f"Termo não suportado pelo avaliador compilado: '{expr}'")
+
+    visitar(arvore, 1)
+    return fatores
+
+
+def analisar_termo(nome):
+    """
+    Converte o nome de um termo do modelo (exog_names) em {variavel: potencia}.
+
+    Exemplos: "Intercept" → {}, "x" → {"x": 1}, "I(x ** 2)" → {"x": 2},
+    "a:b" → {"a": 1, "b": 1}.
+    """
+    if nome == "Intercept":
+        return {}
+    fatores = {}
+    for parte in nome.split(":"):
+        parte = parte.strip()
+        if parte.startswith("I(") and parte.endswith(")"):
+            sub = _fatores_da_expressao(parte[2:-1])
+        elif parte.isidentifier():
+            sub = {parte: 1}
+        else:
+            raise ValueError(f"Termo não suportado pelo avaliador compilado: '{nome}'")
+        for var, pot in sub.items():
+            fatores[var] = fatores.get(var, 0) + pot
+    return fatores
+
+
+class ModeloCompilado:
+    """
+    Predição de um modelo polinomial sem patsy nem eval.
+
+    Construído uma única vez a partir dos nomes dos termos e dos coeficientes;
+    cada termo vira uma lista de (índice da variável-base, potência) e a
+    predição é um único produto matriz–vetor.
+    """
+
+    def __init__(self, termos, coeficientes):
+        self.termos = list(termos)
+        self.coeficientes = np.ascontiguousarray(coeficientes, dtype=float)
+        if len(self.termos) != len(self.coeficientes):
+            raise ValueError("O número de termos e de coeficientes deve ser igual.")
+
+        fatores = [analisar_termo(nome) for nome in self.termos]
+        self.base_vars = sorted({var for f in fatores for var in f})
+        posicao = {var: j for j, var in enumerate(self.base_vars)}
+        self._indices = [
+            tuple((posicao[var], pot) for var, pot in f.items() if pot > 0)
+            for f in fatores
+        ]
+
+    @classmethod
+    def de_modelo(cls, modelo):
+        """Compila um resultado OLS do statsmodels (usa exog_names e params)."""
+        return cls(modelo.model.exog_names, np.asarray(modelo.params, dtype=float))
+
+    def matriz_desenho(self, X):
+        """
+        Constrói a matriz de desenho (n, n_termos) a partir de X (n, n_base),
+        com colunas na ordem de `self.base_vars`.
+        """
+        X = np.asarray(X, dtype=float)
+        D = np.empty((X.shape[0], len(self._indices)), dtype=float)
+        for j, fatores in enumerate(self._indices):
+            if not fatores:
+                D[:, j] = 1.0
+                continue
+            col, pot = fatores[0]
+            D[:, j] = X[:, col] if pot == 1 else np.power(X[:, col], pot)
+            for col, pot in fatores[1:]:
+                D[:, j] *= X[:, col] if pot == 1 else np.power(X[:, col], pot)
+        return D
+
+    def predict(self, X):
+        """Predições para X (n, n_base) em um único produto matriz–vetor."""
+        return self.matriz_desenho(X) @ self.coeficientes
+
+    def gradiente(self, X):
+        """
+        Gradiente analítico da predição em relação às variáveis-base.
+
+        Retorna um array (n, n_base) com ∂ŷ/∂x_j em cada ponto de X.
+        """
+        X = np.asarray(X, dtype=float)
+        G = np.zeros((X.shape[0], len(self.base_vars)), dtype=float)
+        for coef, fatores in zip(self.coeficientes, self._indices):
+            if coef == 0.0:
+                continue
+            for k, (col_k, pot_k) in enumerate(fatores):
+                # d/dx_k (x_k^p_k · Π x_i^p_i) = p_k · x_k^(p_k-1) · Π x_i^p_i
+                derivada = coef * pot_k * (np.power(X[:, col_k], pot_k - 1) if pot_k > 1 else 1.0)
+                for i, (col, pot) in enumerate(fatores):
+                    if i != k:
+                        derivada = derivada * (X[:, col] if pot == 1 else np.power(X[:, col], pot))
+                G[:, col_k] += derivada
+        return G
+
+    def montar_base(self, colunas, padroes=None, n=None):
+        """
+        Monta X (n, n_base) a partir de um mapeamento {variavel: array}.
+
+        Variáveis ausentes recebem o valor de `padroes` (ex.: média no dataset)
+        ou 0.0 quando não houver padrão.
+        """
+        padroes = padroes or {}
+        if n is None:
+            n = len(next(iter(colunas.values()))) if colunas else 1
+        X = np.empty((n, len(self.base_vars)), dtype=float)
+        for j, var in enumerate(self.base_vars):
+            if var in colunas:
+                X[:, j] = colunas[var]
+            else:
+                X[:, j] = padroes.get(var, 0.0)
+        return X
+
+    def prever_colunas(self, colunas, padroes=None):
+        """Predições a partir de um mapeamento {variavel: array}."""
+        return self.predict(self.montar_base(colunas, padroes))
@@ -0,0 +1,197 @@
+# src/ols_lote.py
+
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+
+# ==============================================================================
+# AJUSTE OLS EM LOTE (uma fatoração para todas as respostas)
+# ==============================================================================
+
+@dataclass
+class ResultadoOLSLote:
+    """
+    Resultados OLS de várias respostas que compartilham a mesma matriz de desenho.
+
+    DataFrames de parâmetros são indexados por termo (colunas = targets);
+    estatísticas por resposta são Series indexadas por target. `anova` guarda a
+    ANOVA Tipo 2 de cada target, no mesmo formato de `sm.stats.anova_lm(typ=2)`.
+    """
+    termos: list
+    targets: list
+    params: pd.DataFrame
+    bse: pd.DataFrame
+    tvalues: pd.DataFrame
+    pvalues: pd.DataFrame
+    fittedvalues: pd.DataFrame
+    resid: pd.DataFrame
+    ssr: pd.Series
+    rsquared: pd.Series
+    rsquared_adj: pd.Series
+    fvalue: pd.Series
+    f_pvalue: pd.Series
+    df_model: int
+    df_resid: int
+    normalized_cov_params: pd.DataFrame
+    anova: dict = field(default_factory=dict)
+
+
+def matriz_desenho(df, features):
+    """
+    Matriz de desenho (n, p) e nomes das colunas para os termos de `features`,
+    construída uma única vez pelo mesmo motor de fórmulas do statsmodels.
+    """
+    from statsmodels.formula.api import ols
+
+    features = [f for f in features if f != 'Intercept']
+    # A resposta é irrelevante para o desenho; usa-se uma coluna auxiliar constante
+    aux = "_lyra_resposta_"
+    dados = df.assign(**{aux: 0.0})
+    modelo = ols(aux + " ~ " + " + ".join(features), data=dados)
+    return np.asarray(modelo.exog, dtype=float), list(modelo.exog_names)
+
+
+def _fatores_do_termo(nome):
+    return frozenset(parte.strip() for parte in nome.split(":"))
+
+
+def _anova_tipo2(termos, params, V, ssr, df_resid):
+    """
+    ANOVA Tipo 2 para todas as respostas de uma vez.
+
+    Replica `anova_lm(typ=2)`: cada termo é testado após todos os demais,
+    exceto os termos de ordem superior que o contêm. A matriz de restrição
+    depende apenas do desenho, então a forma quadrática é montada uma vez por
+    termo e aplicada a todas as colunas de coeficientes.
+    """
+    from scipy import linalg
+    from scipy.stats import f as f_dist
+
+    p = len(termos)
+    indice = {nome: j for j, nome in enumerate(termos)}
+    efeitos = [nome for nome in termos if nome != "Intercept"]
+    fatores = {nome: _fatores_do_termo(nome) for nome in efeitos}
+    scale = ssr / df_resid if df_resid > 0 else np.full_like(ssr, np.nan)
+    eye = np.eye(p)
+
+    linhas = {}
+    for nome in efeitos:
+        contem = [outro for outro in efeitos if fatores[nome] < fatores[outro]]
+        L1 = eye[[indice[nome]] + [indice[o] for o in contem]]
+        if contem:
+            L2 = eye[[indice[o] for o in contem]]
+            orth_compl, _ = linalg.qr(L1 @ V @ L2.T)
+            r = L1.shape[0] - L2.shape[0]
+            L12 = orth_compl[:, -r:].T @ L1
+        else:
+            L12 = L1
+            r = L1.shape[0]
+
+        C = L12 @ V @ L12.T
+        J = np.linalg.matrix_rank(C)
+        M = L12.T @ np.linalg.pinv(C) @ L12
+        # Forma quadrática b' M b para cada resposta (colunas de params)
+        q = np.einsum("ij,ik,kj->j", params, M, params)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            F = q / (scale * J)
+        pval = f_dist.sf(F, J, df_resid)
+        linhas[nome] = (F * r * scale, r, F, pval)
+
+    anovas = []
+    for j in range(params.shape[1]):
+        tabela = pd.DataFrame(
+            [[v[0][j], float(v[1]), v[2][j], v[3][j]] for v in linhas.values()],
+            index=list(linhas),
+            columns=["sum_sq", "df", "F", "PR(>F)"],
+        )
+        tabela.loc["Residual"] = [ssr[j], float(df_resid), np.nan, np.nan]
+        anovas.append(tabela)
+    return anovas
+
+
+def ajustar_ols_em_lote(df, targets, features):
+    """
+    Ajusta o mesmo modelo OLS (termos em `features`) para todas as respostas
+    em `targets` com uma única construção da matriz de desenho e uma única
+    fatoração (QR; SVD/pseudo-inversa quando o desenho é deficiente em posto,
+    como o statsmodels).
+
+    Retorna ResultadoOLSLote, ou None se não houver termos.
+    """
+    from scipy import linalg
+    from scipy.stats import f as f_dist
+    from scipy.stats import t as t_dist
+
+    features = [f for f in features if f != 'Intercept']
+    if not features or not targets:
+        return None
+
+    X, termos = matriz_desenho(df, features)
+    Y = df[list(targets)].to_numpy(dtype=float)
+    if np.isnan(X).any() or np.isnan(Y).any():
+        raise ValueError("O ajuste em lote requer dados sem valores ausentes.")
+
+    n, p = X.shape
+    Q, R = np.linalg.qr(X)
+    posto = np.linalg.matrix_rank(R)
+
+    if posto == p:
+        # Desenho de posto completo: resolve R B = Q'Y para todas as colunas
+        B = linalg.solve_triangular(R, Q.T @ Y)
+        R_inv = linalg.solve_triangular(R, np.eye(p))
+        V = R_inv @ R_inv.T
+    else:
+        # Posto deficiente: solução de norma mínima (mesma do statsmodels, método "pinv")
+        X_pinv = np.linalg.pinv(X, rcond=1e-15)
+        B = X_pinv @ Y
+        V = X_pinv @ X_pinv.T
+
+    ajustados = X @ B
+    residuos = Y - ajustados
+    ssr = np.sum(residuos ** 2, axis=0)
+    centrada = Y - Y.mean(axis=0)
+    sst = np.sum(centrada ** 2, axis=0)
+
+    tem_intercepto = "Intercept" in termos
+    df_model = posto - (1 if tem_intercepto else 0)
+    df_resid = n - posto
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r2 = 1.0 - ssr / sst
+        r2_adj = 1.0 - (n - 1) / df_resid * (1.0 - r2)
+        scale = ssr / df_resid
+        fvalue = ((sst - ssr) / df_model) / scale
+        bse = np.sqrt(np.outer(np.diag(V), scale))
+        tvalues = B / bse
+    f_pvalue = f_dist.sf(fvalue, df_model, df_resid)
+    pvalues = 2.0 * t_dist.sf(np.abs(tvalues), df_resid)
+
+    def por_termo(valores):
+        return pd.DataFrame(valores, index=termos, columns=list(targets))
+
+    def por_target(valores):
+        return pd.Series(valores, index=list(targets))
+
+    anovas = _anova_tipo2(termos, B, V, ssr, df_resid)
+
+    return ResultadoOLSLote(
+        termos=termos,
+        targets=list(targets),
+        params=por_termo(B),
+        bse=por_termo(bse),
+        tvalues=por_termo(tvalues),
+        pvalues=por_termo(pvalues),
+        fittedvalues=pd.DataFrame(ajustados, index=df.index, columns=list(targets)),
+        resid=pd.DataFrame(residuos, index=df.index, columns=list(targets)),
+        ssr=por_target(ssr),
+        rsquared=por_target(r2),
+        rsquared_adj=por_target(r2_adj),
+        fvalue=por_target(fvalue),
+        f_pvalue=por_target(f_pvalue),
+        df_model=int(df_model),
+        df_resid=int(df_resid),
+        normalized_cov_params=pd.DataFrame(V, index=termos, columns=termos),
+        anova=dict(zip(targets, anovas)),
+    )
@@ -0,0 +1,186 @@
+# src/pontuacao.py
+"""
+Pontuação em lote de novas condições com os modelos salvos, sem statsmodels
+e sem reajustar nada.
+
+Uso:
+    python -m src.pontuacao reports/lote/planejamento.modelos.json condicoes.csv --saida pontuadas.csv
+
+O CSV de condições precisa de uma coluna por variável-base dos modelos (com o
+nome original da planilha ou o nome limpo). É lido em blocos de
+`--bloco` linhas e, para cada resposta, são gravados a predição
+(`<resposta>_previsto`), o erro-padrão da predição média
+(`<resposta>_erro_padrao`) e a desejabilidade (`<resposta>_desejabilidade`);
+com duas ou mais respostas, também a desejabilidade global. A coluna
+`fora_da_faixa` marca condições fora da faixa observada no planejamento
+(extrapolação).
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from src.analysis_pipeline import clean_name
+from src.artefatos import carregar_artefatos
+from src.desejabilidade import desejabilidade_array, desejabilidade_global
+from src.modelo_compilado import ModeloCompilado
+
+
+# ==============================================================================
+# CONFIGURAÇÃO
+# ==============================================================================
+
+# Linhas do CSV lidas e pontuadas por vez
+TAMANHO_BLOCO_PONTUACAO = 100_000
+
+
+class ModeloPontuacao:
+    """
+    Artefato de modelo compilado para pontuação vetorizada: predição por
+    produto matriz–vetor, erro-padrão pela covariância dos coeficientes e
+    desejabilidade com os limites salvos.
+    """
+
+    def __init__(self, artefato):
+        self.target = artefato["target"]
+        self.compilado = ModeloCompilado(artefato["termos"], artefato["coeficientes"])
+        self.covariancia = np.asarray(artefato["covariancia"], dtype=float)
+        self.desejabilidade = artefato["desejabilidade"]
+        self.search_spaces = artefato["search_spaces"]
+
+    @property
+    def base_vars(self):
+        return self.compilado.base_vars
+
+    def pontuar(self, colunas, n):
+        """
+        Predição, erro-padrão da predição média e desejabilidade de `n` pontos
+        dados por {variavel: array}.
+        """
+        D = self.compilado.matriz_desenho(self.compilado.montar_base(colunas, n=n))
+        yhat = D @ self.compilado.coeficientes
+        # Var(ŷ) = d' Σ d para cada linha d da matriz de desenho
+        erro_padrao = np.sqrt(np.maximum(np.einsum("ij,jk,ik->i", D, self.covariancia, D), 0.0))
+        p = self.desejabilidade
+        d = desejabilidade_array(
+            yhat, p["L"], p["T"], p["s"], direction=p["direcao"], alvo=p["alvo"], t=p["t"]
+        )
+        return yhat, erro_padrao, d
+
+
+def preparar_modelos(artefatos, respostas=None):
+    """
+    Compila os artefatos ({target: artefato}, ver `carregar_artefatos`).
+    respostas: subconjunto de targets a pontuar (padrão: todos).
+    """
+    if respostas:
+        desconhecidas = [r for r in respostas if r not in artefatos]
+        if desconhecidas:
+            raise ValueError(f"Respostas sem modelo salvo: {desconhecidas}. Disponíveis: {list(artefatos)}.")
+        artefatos = {r: artefatos[r] for r in respostas}
+    return [ModeloPontuacao(a) for a in artefatos.values()]
+
+
+def _colunas_de_entrada(tabela, variaveis):
+    """{variavel: array} lendo cada variável pelo nome limpo ou original."""
+    por_nome_limpo = {clean_name(c): c for c in tabela.columns}
+    colunas = {}
+    faltando = []
+    for v in variaveis:
+        coluna = v if v in tabela.columns else por_nome_limpo.get(v)
+        if coluna is None:
+            faltando.append(v)
+        else:
+            colunas[v] = pd.to_numeric(tabela[coluna], errors="coerce").to_numpy(dtype=float)
+    if faltando:
+        raise ValueError(f"Colunas ausentes nas condições: {faltando}.")
+    return colunas
+
+
+def pontuar_tabela(tabela, modelos, pesos=None):
+    """
+    Pontua um DataFrame de condições com os modelos de `preparar_modelos`.
+    Retorna a tabela com as colunas de predição, erro-padrão, desejabilidade,
+    desejabilidade global (com 2+ modelos) e `fora_da_faixa`.
+    """
+    variaveis = sorted({v for m in modelos for v in m.base_vars})
+    colunas = _colunas_de_entrada(tabela, variaveis)
+    n = len(tabela)
+
+    saida = {}
+    desejabilidades = []
+    for modelo in modelos:
+        yhat, erro_padrao, d = modelo.pontuar(colunas, n)
+        saida[f"{modelo.target}_previsto"] = yhat
+        saida[f"{modelo.target}_erro_padrao"] = erro_padrao
+        saida[f"{modelo.target}_desejabilidade"] = d
+        desejabilidades.append(d)
+    if len(modelos) > 1:
+        saida["desejabilidade_global"] = desejabilidade_global(np.column_stack(desejabilidades), pesos)
+
+    fora = np.zeros(n, dtype=bool)
+    for modelo in modelos:
+        for v, (vmin, vmax) in modelo.search_spaces.items():
+            if v in colunas:
+                fora |= (colunas[v] < vmin) | (colunas[v] > vmax)
+    saida["fora_da_faixa"] = fora
+
+    resultado = tabela.reset_index(drop=True).copy()
+    for nome, valores in saida.items():
+        resultado[nome] = valores
+    return resultado
+
+
+def pontuar_csv(entrada, saida, modelos, tamanho_bloco=TAMANHO_BLOCO_PONTUACAO, sep=",", pesos=None):
+    """
+    Pontua um CSV de condições em blocos de `tamanho_bloco` linhas, gravando
+    cada bloco em `saida` assim que pontuado (a memória não depende do
+    tamanho do arquivo). Retorna {"n_linhas", "n_blocos", "n_fora_da_faixa"}.
+    """
+    resumo = {"n_linhas": 0, "n_blocos": 0, "n_fora_da_faixa": 0}
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, "w", encoding="utf-8", newline="") as fp:
+        for bloco in pd.read_csv(entrada, sep=sep, chunksize=int(tamanho_bloco)):
+            pontuado = pontuar_tabela(bloco, modelos, pesos)
+            pontuado.to_csv(fp, index=False, header=resumo["n_blocos"] == 0, sep=sep)
+            resumo["n_linhas"] += len(pontuado)
+            resumo["n_blocos"] += 1
+            resumo["n_fora_da_faixa"] += int(pontuado["fora_da_faixa"].sum())
+    return resumo
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pontua condições (CSV) com os modelos salvos do LYRA.")
+    parser.add_argument("modelos", help="Arquivo <nome>.modelos.json gravado pelo lote ou pelo app.")
+    parser.add_argument("condicoes", help="CSV com uma coluna por variável-base.")
+    parser.add_argument("--saida", required=True, help="CSV de saída com as colunas pontuadas.")
+    parser.add_argument("--respostas", default=None,
+                        help="Respostas a pontuar, separadas por vírgula (padrão: todas).")
+    parser.add_argument("--bloco", type=int, default=TAMANHO_BLOCO_PONTUACAO,
+                        help=f"Linhas lidas por vez (padrão: {TAMANHO_BLOCO_PONTUACAO}).")
+    parser.add_argument("--sep", default=",", help="Separador do CSV (padrão: ',').")
+    args = parser.parse_args(argv)
+
+    try:
+        respostas = [r.strip() for r in args.respostas.split(",")] if args.respostas else None
+        modelos = preparar_modelos(carregar_artefatos(args.modelos), respostas)
+        if not modelos:
+            print("Nenhum modelo no arquivo de artefatos.", file=sys.stderr)
+            return 1
+        resumo = pontuar_csv(args.condicoes, args.saida, modelos, tamanho_bloco=args.bloco, sep=args.sep)
+    except ValueError as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 1
+
+    print(
+        f"{resumo['n_linhas']} condição(ões) pontuada(s) em {resumo['n_blocos']} bloco(s) "
+        f"com {len(modelos)} modelo(s); {resumo['n_fora_da_faixa']} fora da faixa do planejamento."
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
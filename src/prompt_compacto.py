@@ -0,0 +1,195 @@
+# src/prompt_compacto.py
+
+import copy
+import json
+import math
+
+
+# ==============================================================================
+# CODIFICAÇÃO COMPACTA DAS ANÁLISES PARA O PROMPT (com orçamento de tokens)
+# ==============================================================================
+
+# Algarismos significativos dos números enviados ao LLM
+DIGITOS_PADRAO = 4
+
+# Orçamento padrão (tokens estimados) do JSON de análises no prompt
+ORCAMENTO_TOKENS_PADRAO = 30000
+
+# Campos de cada análise que as regras de formatação nunca usam (tempos de
+# execução, artefato do modelo etc., que ficam só nos JSONs e no app). Valem só
+# no nível da análise e no bloco "desejabilidade": colunas e termos com os
+# mesmos nomes, mais abaixo, são mantidos.
+CAMPOS_DESCARTADOS = {"modelo_reduzido_summary", "tempos", "artefato"}
+CAMPOS_DESCARTADOS_DESEJABILIDADE = {
+    "modelo_funcao_numpy", "verificacao_exportacao", "n_avaliacoes", "n_no_intervalo",
+}
+
+# P-valores vão com precisão total: arredondados, valores perto do corte
+# (p_thresh) poderiam trocar de lado
+CAMPOS_P_VALOR = {"PR(>F)", "p_valor", "p_valores"}
+
+# Listas de pontos da desejabilidade
+CAMPOS_RESULTADOS = ("resultados",)
+
+# Código gerado, removido por último (primeiro a desejabilidade, depois o modelo)
+CAMPOS_CODIGO = ("desejabilidade_funcao_py", "modelo_funcao_py")
+
+# Etapas de corte: máximo de linhas de desejabilidade e de termos da ANOVA
+LIMITES_LINHAS = (20, 10, 5)
+MAX_LINHAS_ANOVA = 8
+
+
+def estimar_tokens(texto):
+    """Estimativa de tokens (~4 caracteres por token)."""
+    return math.ceil(len(texto) / 4)
+
+
+def arredondar(valor, digitos=DIGITOS_PADRAO):
+    """
+    Arredonda um float para `digitos` algarismos significativos (NaN/inf → None);
+    com digitos=None, o valor é mantido.
+    """
+    if not math.isfinite(valor):
+        return None
+    if digitos is None:
+        return float(valor)
+    if valor == 0:
+        return 0.0
+    return float(f"{valor:.{digitos}g}")
+
+
+def _para_colunas(linhas):
+    """
+    Lista de linhas planas (dicts de escalares com as mesmas chaves) →
+    {coluna: [valores]}; None se não aplicável.
+    """
+    if not linhas or not all(isinstance(linha, dict) for linha in linhas):
+        return None
+    if any(isinstance(v, (dict, list)) for linha in linhas for v in linha.values()):
+        return None
+    chaves = list(linhas[0])
+    if any(list(linha) != chaves for linha in linhas[1:]):
+        return None
+    return {chave: [linha[chave] for linha in linhas] for chave in chaves}
+
+
+def _compactar(obj, digitos):
+    """Arredonda floats (exceto p-valores) e converte listas de linhas em colunas."""
+    if isinstance(obj, bool) or obj is None or isinstance(obj, (int, str)):
+        return obj
+    if isinstance(obj, float):
+        return arredondar(obj, digitos)
+    if isinstance(obj, dict):
+        return {
+            str(k): _compactar(v, None if k in CAMPOS_P_VALOR else digitos)
+            for k, v in obj.items()
+        }
+    if isinstance(obj, (list, tuple)):
+        itens = [_compactar(v, digitos) for v in obj]
+        colunas = _para_colunas(itens)
+        return itens if colunas is None else colunas
+    # Tipos NumPy e afins
+    if hasattr(obj, "item"):
+        return _compactar(obj.item(), digitos)
+    return str(obj)
+
+
+def _sem_campos_descartados(analise):
+    """Cópia rasa de uma análise sem os campos não usados pelas regras."""
+    if not isinstance(analise, dict):
+        return analise
+    enxuta = {k: v for k, v in analise.items() if k not in CAMPOS_DESCARTADOS}
+    if isinstance(enxuta.get("desejabilidade"), dict):
+        enxuta["desejabilidade"] = {
+            k: v for k, v in enxuta["desejabilidade"].items() if k not in CAMPOS_DESCARTADOS_DESEJABILIDADE
+        }
+    return enxuta
+
+
+def _descartar_campos(analises):
+    """
+    Aplica `_sem_campos_descartados` a cada análise: aceita uma análise, a
+    lista do app ou o dicionário {target: análise} de `run_analysis_pipeline`.
+    """
+    if isinstance(analises, dict) and "variavel" not in analises:
+        return {k: _sem_campos_descartados(v) for k, v in analises.items()}
+    if isinstance(analises, (list, tuple)):
+        return [_sem_campos_descartados(a) for a in analises]
+    return _sem_campos_descartados(analises)
+
+
+def _p_valor(linha):
+    p = linha.get("PR(>F)") if isinstance(linha, dict) else None
+    return p if isinstance(p, (int, float)) and math.isfinite(p) else math.inf
+
+
+def _limitar_anova(tabela, n):
+    """Mantém os `n` termos de menor p-valor (na ordem original), sem a linha Residual."""
+    if not isinstance(tabela, list):
+        return tabela
+    linhas = [l for l in tabela if not (isinstance(l, dict) and l.get("term") == "Residual")]
+    if len(linhas) <= n:
+        return tabela
+    mantidos = sorted(range(len(linhas)), key=lambda i: _p_valor(linhas[i]))[:n]
+    return [linhas[i] for i in sorted(mantidos)]
+
+
+def _aplicar(obj, funcao):
+    """Aplica `funcao(dict)` a todos os dicionários aninhados (in place)."""
+    if isinstance(obj, dict):
+        funcao(obj)
+        for v in obj.values():
+            _aplicar(v, funcao)
+    elif isinstance(obj, list):
+        for v in obj:
+            _aplicar(v, funcao)
+
+
+def _etapas_de_corte():
+    """Reduções sucessivas do conteúdo, da menos para a mais agressiva."""
+    def limitar_anova(d):
+        for chave in ("anova_completa",):
+            if chave in d:
+                d[chave] = _limitar_anova(d[chave], MAX_LINHAS_ANOVA)
+
+    yield limitar_anova
+
+    for limite in LIMITES_LINHAS:
+        def limitar_linhas(d, limite=limite):
+            for chave in CAMPOS_RESULTADOS:
+                if isinstance(d.get(chave), list):
+                    d[chave] = d[chave][:limite]
+        yield limitar_linhas
+
+    for chave in CAMPOS_CODIGO:
+        def remover_codigo(d, chave=chave):
+            d.pop(chave, None)
+        yield remover_codigo
+
+
+def codificar_analises(analises, digitos=DIGITOS_PADRAO, orcamento_tokens=ORCAMENTO_TOKENS_PADRAO):
+    """
+    Serializa as análises em JSON compacto para o prompt, uma única vez.
+
+    Números são arredondados a `digitos` algarismos significativos, listas de
+    linhas viram colunas e campos não usados pelas regras são descartados.
+    Se a estimativa de tokens passar de `orcamento_tokens`, o conteúdo é
+    reduzido em etapas (ANOVA limitada aos termos mais relevantes, menos
+    pontos de desejabilidade e, por fim, sem os códigos gerados) até caber
+    ou até esgotar as etapas. As análises originais não são alteradas.
+    """
+    def serializar(obj):
+        return json.dumps(_compactar(obj, digitos), ensure_ascii=False, separators=(",", ":"))
+
+    analises = _descartar_campos(analises)
+    texto = serializar(analises)
+    if orcamento_tokens is None or estimar_tokens(texto) <= orcamento_tokens:
+        return texto
+
+    reduzidas = copy.deepcopy(analises)
+    for etapa in _etapas_de_corte():
+        _aplicar(reduzidas, etapa)
+        texto = serializar(reduzidas)
+        if estimar_tokens(texto) <= orcamento_tokens:
+            break
+    return texto
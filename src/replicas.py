@@ -0,0 +1,103 @@
+# src/replicas.py
+
+import threading
+import weakref
+from dataclasses import dataclass
+
+import numpy as np
+
+
+# ==============================================================================
+# ÍNDICE DE RÉPLICAS DO PLANEJAMENTO (erro puro e falta de ajuste vetorizados)
+# ==============================================================================
+
+@dataclass(frozen=True)
+class IndiceReplicas:
+    """
+    Estrutura de réplicas de um dataset para um subconjunto de variáveis:
+    ensaios com as mesmas condições (ex.: pontos centrais repetidos) formam
+    um grupo. `codigos[i]` é o grupo do ensaio i (grupos em ordem crescente das
+    condições, como no `groupby`) e `tamanhos[g]` o número de ensaios do grupo g.
+    """
+    variaveis: tuple
+    codigos: np.ndarray
+    tamanhos: np.ndarray
+
+    @property
+    def n(self):
+        return len(self.codigos)
+
+    @property
+    def n_grupos(self):
+        return len(self.tamanhos)
+
+    @property
+    def gl_erro_puro(self):
+        """Graus de liberdade do erro puro (N - número de grupos)."""
+        return self.n - self.n_grupos
+
+    def gl_falta_de_ajuste(self, n_parametros):
+        """Graus de liberdade da falta de ajuste de um modelo com `n_parametros`."""
+        return self.n_grupos - int(n_parametros)
+
+
+def construir_indice(df, variaveis):
+    """
+    Códigos inteiros dos grupos de réplicas de `df` nas colunas `variaveis`.
+    Cada coluna é fatorada separadamente e os códigos são combinados e
+    recomprimidos a cada passo, sem montar uma matriz com as colunas.
+    """
+    variaveis = tuple(variaveis)
+    codigos = np.zeros(len(df), dtype=np.int64)
+    for v in variaveis:
+        _, c = np.unique(df[v].to_numpy(), return_inverse=True)
+        _, codigos = np.unique(codigos * (int(c.max(initial=0)) + 1) + c.ravel(), return_inverse=True)
+    codigos = np.asarray(codigos, dtype=np.int64).ravel()
+    tamanhos = np.bincount(codigos)
+    return IndiceReplicas(variaveis=variaveis, codigos=codigos, tamanhos=tamanhos)
+
+
+# Índices por dataset (referência fraca ao DataFrame) e por subconjunto de variáveis
+_indices = {}
+_lock = threading.Lock()
+
+
+def _descartar(ref):
+    # Remove só a entrada desta referência: o id já pode ser de outro DataFrame
+    for i, entrada in list(_indices.items()):
+        if entrada[0] is ref:
+            _indices.pop(i, None)
+
+
+def indice_de_replicas(df, variaveis):
+    """
+    `construir_indice` memoizado por dataset e subconjunto de variáveis: a
+    estrutura de réplicas é a mesma para todas as respostas e modelos que
+    usam as mesmas variáveis. Supõe que o DataFrame não é alterado no lugar.
+    """
+    chave = tuple(sorted(variaveis))
+    with _lock:
+        entrada = _indices.get(id(df))
+        # Um id reutilizado por outro DataFrame não reaproveita a entrada antiga
+        if entrada is None or entrada[0]() is not df:
+            entrada = (weakref.ref(df, _descartar), {})
+            _indices[id(df)] = entrada
+        por_variaveis = entrada[1]
+        if chave not in por_variaveis:
+            por_variaveis[chave] = construir_indice(df, chave)
+        return por_variaveis[chave]
+
+
+def somas_erro_puro_e_falta_de_ajuste(indice, y, y_ajustado):
+    """
+    Somas dos quadrados do erro puro (SSPE) e da falta de ajuste (SSLoF) de
+    uma resposta: y e y_ajustado são arrays (n,), observados e preditos pelo
+    modelo. As médias por grupo vêm de um `np.bincount`.
+    """
+    y = np.asarray(y, dtype=float)
+    y_ajustado = np.asarray(y_ajustado, dtype=float)
+    medias = np.bincount(indice.codigos, weights=y, minlength=indice.n_grupos) / indice.tamanhos
+    medias_por_ensaio = medias[indice.codigos]
+    SSPE = float(np.sum((y - medias_por_ensaio) ** 2))
+    SSLoF = float(np.sum((medias_por_ensaio - y_ajustado) ** 2))
+    return SSPE, SSLoF
@@ -0,0 +1,222 @@
+# src/stepwise.py
+
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from src.modelo_compilado import analisar_termo
+from src.ols_lote import matriz_desenho
+
+
+# ==============================================================================
+# SELEÇÃO STEPWISE COM ATUALIZAÇÕES INCREMENTAIS DO AJUSTE
+# ==============================================================================
+
+# Modos aceitos por `selecionar_termos_stepwise`
+MODOS_STEPWISE = ("backward", "forward", "hierarquico")
+
+# Termos cujo complemento de Schur (relativo) fica abaixo disto são colineares
+TOLERANCIA_COLINEAR = 1e-10
+
+
+@dataclass
+class ResultadoStepwise:
+    """
+    Resultado da seleção stepwise de um target.
+
+    `termos` são os termos mantidos (sem o Intercept), na ordem do desenho;
+    `p_valores` traz o p-valor (teste t) de cada termo no modelo final;
+    `caminho` lista os passos na ordem em que ocorreram, cada um como
+    {"passo", "acao", "termo", "p_valor"}.
+    """
+    modo: str
+    termos: list
+    p_valores: dict
+    caminho: list = field(default_factory=list)
+
+
+def _fatores(nome):
+    """{variável: potência} de um termo; sem o avaliador compilado, cada parte de a:b conta 1."""
+    try:
+        return analisar_termo(nome)
+    except ValueError:
+        return {parte.strip(): 1 for parte in nome.split(":")}
+
+
+def _contido(menor, maior):
+    """True se o termo `menor` é marginal a `maior` (ex.: x em x:z ou em I(x**2))."""
+    return menor != maior and all(maior.get(v, 0) >= p for v, p in menor.items())
+
+
+class _AjusteIncremental:
+    """
+    Ajuste OLS de um subconjunto de colunas do desenho, mantido pela inversa
+    da matriz de Gram (X'X)⁻¹ do subconjunto ativo.
+
+    Incluir ou excluir uma coluna atualiza a inversa pelo complemento de Schur
+    em O(p²), sem refazer a fatoração. As colunas são normalizadas (norma 1),
+    o que não altera estatísticas t e p-valores e melhora o condicionamento.
+    """
+
+    def __init__(self, X, y):
+        escala = np.linalg.norm(X, axis=0)
+        escala[escala == 0] = 1.0
+        self.X = X / escala
+        self.y = y
+        self.gram = self.X.T @ self.X
+        self.Xty = self.X.T @ y
+        self.n = len(y)
+        self.ativos = []
+        self.G = np.empty((0, 0))
+
+    def df_resid(self):
+        return self.n - len(self.ativos)
+
+    def coeficientes(self):
+        return self.G @ self.Xty[self.ativos]
+
+    def rss(self, beta):
+        residuos = self.y - self.X[:, self.ativos] @ beta
+        return float(residuos @ residuos)
+
+    def incluir(self, j):
+        """Inclui a coluna j; retorna False (sem alterar nada) se ela for colinear às ativas."""
+        b = self.gram[self.ativos, j]
+        u = self.G @ b
+        s = self.gram[j, j] - b @ u
+        if s <= TOLERANCIA_COLINEAR * self.gram[j, j]:
+            return False
+        k = len(self.ativos)
+        G = np.empty((k + 1, k + 1))
+        G[:k, :k] = self.G + np.outer(u, u) / s
+        G[:k, k] = G[k, :k] = -u / s
+        G[k, k] = 1.0 / s
+        self.G = G
+        self.ativos.append(j)
+        return True
+
+    def excluir(self, j):
+        """Exclui a coluna j (downdate da inversa pelo complemento de Schur)."""
+        k = self.ativos.index(j)
+        manter = [i for i in range(len(self.ativos)) if i != k]
+        g = self.G[manter, k]
+        self.G = self.G[np.ix_(manter, manter)] - np.outer(g, g) / self.G[k, k]
+        del self.ativos[k]
+
+    def p_valores(self):
+        """P-valores (teste t bilateral) dos coeficientes das colunas ativas."""
+        from scipy.stats import t as t_dist
+
+        df_resid = self.df_resid()
+        beta = self.coeficientes()
+        escala = self.rss(beta) / df_resid
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = beta / np.sqrt(np.diag(self.G) * escala)
+        return 2.0 * t_dist.sf(np.abs(t), df_resid)
+
+    def p_valores_de_entrada(self, candidatos):
+        """
+        P-valor de cada coluna candidata se fosse incluída sozinha no ajuste
+        atual (teste t parcial), calculado para todas sem ajustá-las.
+        """
+        from scipy.stats import t as t_dist
+
+        beta = self.coeficientes()
+        rss = self.rss(beta)
+        B = self.gram[np.ix_(self.ativos, candidatos)]
+        U = self.G @ B
+        s = np.diag(self.gram)[candidatos] - np.sum(B * U, axis=0)
+        r = self.Xty[candidatos] - B.T @ beta
+        df_resid = self.df_resid() - 1
+        with np.errstate(divide="ignore", invalid="ignore"):
+            reducao = r ** 2 / s
+            t2 = reducao / ((rss - reducao) / df_resid)
+        p = 2.0 * t_dist.sf(np.sqrt(np.abs(t2)), df_resid)
+        # Candidatas colineares às ativas não podem entrar
+        p[s <= TOLERANCIA_COLINEAR * np.diag(self.gram)[candidatos]] = np.nan
+        return p
+
+
+def selecionar_termos_stepwise(df, target, features, modo="backward", alpha=0.10):
+    """
+    Seleção stepwise dos termos de `features` para o target.
+
+    modo:
+        "backward": parte do modelo completo e remove, um por vez, o termo de
+            maior p-valor enquanto ele for > alpha;
+        "forward": parte só do Intercept e inclui, um por vez, o termo de menor
+            p-valor de entrada enquanto ele for <= alpha;
+        "hierarquico": backward que só remove termos sem termos de ordem
+            superior ativos que os contenham (x fica enquanto houver x:z ou I(x**2)).
+
+    O desenho é montado uma única vez; cada passo atualiza o ajuste de forma
+    incremental em vez de reajustar o modelo. Retorna ResultadoStepwise.
+    """
+    if modo not in MODOS_STEPWISE:
+        raise ValueError(f"Modo de seleção inválido: '{modo}'. Use um de {MODOS_STEPWISE}.")
+
+    X, nomes = matriz_desenho(df, features)
+    y = df[target].to_numpy(dtype=float)
+    ajuste = _AjusteIncremental(X, y)
+    efeitos = [j for j, nome in enumerate(nomes) if nome != "Intercept"]
+    fatores = {j: _fatores(nomes[j]) for j in efeitos}
+    caminho = []
+
+    def registrar(acao, j, p):
+        caminho.append({
+            "passo": len(caminho) + 1,
+            "acao": acao,
+            "termo": nomes[j],
+            "p_valor": None if not np.isfinite(p) else float(p),
+        })
+
+    if "Intercept" in nomes:
+        ajuste.incluir(nomes.index("Intercept"))
+
+    if modo == "forward":
+        while ajuste.df_resid() > 1:
+            candidatos = [j for j in efeitos if j not in ajuste.ativos]
+            if not candidatos:
+                break
+            p = ajuste.p_valores_de_entrada(candidatos)
+            if np.all(np.isnan(p)):
+                break
+            melhor = int(np.nanargmin(p))
+            if p[melhor] > alpha:
+                break
+            ajuste.incluir(candidatos[melhor])
+            registrar("incluido", candidatos[melhor], p[melhor])
+    else:
+        for j in efeitos:
+            if not ajuste.incluir(j):
+                registrar("colinear", j, np.nan)
+        if ajuste.df_resid() <= 0:
+            raise ValueError(
+                f"O modelo completo de '{target}' não tem graus de liberdade residuais "
+                "para a seleção stepwise."
+            )
+
+        while True:
+            p = dict(zip(ajuste.ativos, ajuste.p_valores()))
+            elegiveis = [j for j in ajuste.ativos if j in fatores]
+            if modo == "hierarquico":
+                elegiveis = [
+                    j for j in elegiveis
+                    if not any(_contido(fatores[j], fatores[o]) for o in ajuste.ativos if o in fatores)
+                ]
+            if not elegiveis:
+                break
+            pior = max(elegiveis, key=lambda j: np.nan_to_num(p[j], nan=np.inf))
+            if p[pior] <= alpha:
+                break
+            ajuste.excluir(pior)
+            registrar("removido", pior, p[pior])
+
+    p_finais = dict(zip(ajuste.ativos, ajuste.p_valores())) if ajuste.df_resid() > 0 else {}
+    selecionados = [j for j in efeitos if j in ajuste.ativos]
+    return ResultadoStepwise(
+        modo=modo,
+        termos=[nomes[j] for j in selecionados],
+        p_valores={nomes[j]: float(p_finais[j]) for j in selecionados if j in p_finais},
+        caminho=caminho,
+    )
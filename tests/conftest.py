@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Permite `pytest` a partir de qualquer diretório (importa src/ e benchmarks/)
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from src.busca import buscar_em_grade, buscar_em_grade_adaptativa
+
+
+OTIMO = np.array([0.3712, 0.6180, 0.1414, 0.7071])
+
+
+def _espacos(n_vars, n_points=7):
+    return {f"x{i}": (0.0, 1.0, n_points) for i in range(n_vars)}
+
+
+def _avaliador(n_vars, chamadas):
+    def avaliar(X):
+        chamadas.append(len(X))
+        d = 1.0 - np.sum((X - OTIMO[:n_vars]) ** 2, axis=1)
+        return d, X[:, :1]
+    return avaliar
+
+
+@pytest.mark.parametrize("n_vars,max_avaliacoes", [(2, 100), (3, 1000), (4, 5000)])
+def test_adaptativa_nao_passa_do_orcamento(n_vars, max_avaliacoes):
+    chamadas = []
+    busca = buscar_em_grade_adaptativa(
+        _espacos(n_vars), _avaliador(n_vars, chamadas), (0.0, 1.0), max_avaliacoes=max_avaliacoes
+    )
+    assert sum(chamadas) == busca["n_avaliacoes"] <= max_avaliacoes
+
+
+def test_adaptativa_refina_alem_da_grade():
+    grade = buscar_em_grade(_espacos(3), _avaliador(3, []), (0.0, 1.0), top_k=5)
+    adaptativa = buscar_em_grade_adaptativa(_espacos(3), _avaliador(3, []), (0.0, 1.0), top_k=5)
+    assert adaptativa["desejabilidade"][0] > grade["desejabilidade"][0]
+    np.testing.assert_allclose(adaptativa["X"][0], OTIMO[:3], atol=1e-4)
+    # Os melhores pontos são distintos (nenhum ponto é avaliado duas vezes)
+    assert len({tuple(x) for x in adaptativa["X"]}) == len(adaptativa["X"])
@@ -0,0 +1,81 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.planejamentos import gerar_planejamento
+from src.analysis_pipeline import (
+    _make_model_function_code,
+    _make_model_function_code_vetorizado,
+    _prepare_design_df_from_base,
+    ajustar_modelo,
+    gerar_termos_modelo,
+    verificar_modelo_exportado,
+)
+
+
+TARGET = "Resposta_1"
+
+
+def _ajustar(tipo, n_fatores, ordem_interacao=2):
+    df = gerar_planejamento(tipo, n_fatores, replicas=2, n_respostas=1, ruido=0.05, semente=1)
+    fatores = [c for c in df.columns if c.startswith("Fator_")]
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        modelo, _ = ajustar_modelo(df, TARGET, gerar_termos_modelo(fatores, ordem_interacao=ordem_interacao))
+    return modelo, df, fatores
+
+
+def _executar(codigo, nome):
+    escopo = {}
+    exec(codigo, escopo)
+    return escopo[nome]
+
+
+def _predicao_patsy(modelo, df, pontos):
+    return np.asarray(modelo.predict(_prepare_design_df_from_base(pd.DataFrame(pontos), modelo, df)), dtype=float)
+
+
+# Fator_1 / Fator_10 / Fator_11 cobrem nomes que são prefixos uns dos outros
+@pytest.mark.parametrize("tipo,n_fatores,ordem", [("ccd", 3, 3), ("bbd", 4, 2), ("ccd", 11, 2)])
+def test_escalar_vetorizado_e_patsy_concordam(tipo, n_fatores, ordem):
+    modelo, df, fatores = _ajustar(tipo, n_fatores, ordem)
+    escalar = _executar(_make_model_function_code(TARGET, modelo), f"modelo_{TARGET}")
+    vetorizado = _executar(_make_model_function_code_vetorizado(TARGET, modelo), f"modelo_{TARGET}_vetorizado")
+
+    rng = np.random.default_rng(0)
+    pontos = {f: rng.uniform(df[f].min(), df[f].max(), 100) for f in fatores}
+    esperado = _predicao_patsy(modelo, df, pontos)
+
+    obtido_escalar = np.array([escalar({f: pontos[f][i] for f in fatores}) for i in range(100)])
+    np.testing.assert_allclose(obtido_escalar, esperado, rtol=1e-10, atol=1e-10)
+    np.testing.assert_allclose(vetorizado(pontos), esperado, rtol=1e-10, atol=1e-10)
+    np.testing.assert_allclose(vetorizado(pd.DataFrame(pontos)), esperado, rtol=1e-10, atol=1e-10)
+
+
+@pytest.mark.parametrize("tipo,n_fatores,ordem", [("ccd", 3, 3), ("bbd", 4, 2)])
+def test_gradiente_exportado_bate_com_diferencas_finitas(tipo, n_fatores, ordem):
+    modelo, df, fatores = _ajustar(tipo, n_fatores, ordem)
+    gradiente = _executar(_make_model_function_code_vetorizado(TARGET, modelo), f"gradiente_modelo_{TARGET}")
+
+    rng = np.random.default_rng(1)
+    pontos = {f: rng.uniform(df[f].min(), df[f].max(), 20) for f in fatores}
+    g = gradiente(pontos)
+    for f in fatores:
+        h = 1e-4 * float(df[f].max() - df[f].min())
+        mais = dict(pontos, **{f: pontos[f] + h})
+        menos = dict(pontos, **{f: pontos[f] - h})
+        diferenca = (_predicao_patsy(modelo, df, mais) - _predicao_patsy(modelo, df, menos)) / (2 * h)
+        np.testing.assert_allclose(g[f], diferenca, rtol=1e-5, atol=1e-6)
+
+
+def test_verificacao_aponta_equivalencia():
+    modelo, df, _ = _ajustar("ccd", 3)
+    verificacao = verificar_modelo_exportado(
+        modelo, TARGET, df,
+        _make_model_function_code(TARGET, modelo),
+        _make_model_function_code_vetorizado(TARGET, modelo),
+    )
+    assert verificacao["equivalente"]
+    assert verificacao["erro_max_gradiente"] < 1e-10
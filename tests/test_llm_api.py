@@ -0,0 +1,118 @@
+import re
+import threading
+import time
+
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.prompts import ChatPromptTemplate
+
+from src.llm_api import gerar_relatorio, get_llm_response_por_variavel, stream_llm_response
+
+
+# Relatório válido que cita o "Erro puro" da ANOVA (não pode ser tomado por falha)
+RELATORIO = "### Análise: y\n\nA falta de ajuste foi testada contra o erro puro.\n\nErro puro: SQ = 1,2 com 2 GL."
+
+
+def _prompt():
+    return ChatPromptTemplate.from_messages([("human", "Gere o relatório.")])
+
+
+class ModeloComFalha(FakeListChatModel):
+    """Chat model falso que falha na chamada."""
+
+    def _call(self, *args, **kwargs):
+        raise RuntimeError("cota excedida")
+
+
+def test_gerar_relatorio_nao_deduz_falha_do_texto():
+    texto, erro = gerar_relatorio(_prompt(), usar_cache=False, llm_modelo=FakeListChatModel(responses=[RELATORIO]))
+    assert erro is None
+    assert texto == RELATORIO
+
+
+def test_gerar_relatorio_retorna_erro_explicito():
+    texto, erro = gerar_relatorio(_prompt(), usar_cache=False, llm_modelo=ModeloComFalha(responses=["x"]))
+    assert texto is None
+    assert "cota excedida" in erro
+
+
+def test_stream_sinaliza_sucesso_pelo_atributo_erro():
+    relatorio = stream_llm_response(_prompt(), usar_cache=False, llm_modelo=FakeListChatModel(responses=[RELATORIO]))
+    assert "".join(relatorio) == RELATORIO
+    assert relatorio.erro is None
+    assert relatorio.texto == RELATORIO
+
+
+def test_stream_interrompido_mantem_parcial_e_erro():
+    modelo = FakeListChatModel(responses=[RELATORIO], error_on_chunk_number=5)
+    relatorio = stream_llm_response(_prompt(), usar_cache=False, llm_modelo=modelo)
+    trechos = list(relatorio)
+    assert relatorio.erro is not None
+    assert relatorio.texto == RELATORIO[:5]
+    assert trechos[-1] == f"\n\n{relatorio.erro}"
+
+
+# ==============================================================================
+# RELATÓRIO POR VARIÁVEL
+# ==============================================================================
+
+TRAVA = threading.Lock()
+VARIAVEIS = ["y1", "y2", "y3", "y4"]
+
+
+class ModeloPorVariavel(FakeListChatModel):
+    """
+    Chat model falso que responde conforme a variável pedida na mensagem,
+    registra o pico de chamadas simultâneas e falha nas variáveis de `falhas`.
+    """
+
+    falhas: tuple = ()
+    atrasos: dict = {}
+    ativas: int = 0
+    pico: int = 0
+
+    def _call(self, messages, *args, **kwargs):
+        variavel = re.search(r"### Análise: (\S+)\"", messages[-1].content).group(1)
+        with TRAVA:
+            self.ativas += 1
+            self.pico = max(self.pico, self.ativas)
+        try:
+            time.sleep(self.atrasos.get(variavel, 0.02))
+            if variavel in self.falhas:
+                raise RuntimeError(f"cota excedida em {variavel}")
+            return f"### Análise: {variavel}\n\nErro puro de {variavel} sem falta de ajuste."
+        finally:
+            with TRAVA:
+                self.ativas -= 1
+
+
+def _analises():
+    return [{"variavel": v, "anova_completa": [{"termo": "Erro puro", "PR(>F)": None}]} for v in VARIAVEIS]
+
+
+def test_por_variavel_respeita_ordem_e_concorrencia():
+    # A primeira variável é a mais lenta: a ordem do texto não é a de conclusão
+    atrasos = {v: 0.02 * (len(VARIAVEIS) - i) for i, v in enumerate(VARIAVEIS)}
+    modelo = ModeloPorVariavel(responses=["x"], atrasos=atrasos)
+    texto, erros = get_llm_response_por_variavel(_analises(), llm_modelo=modelo, max_concorrencia=2, usar_cache=False)
+    assert erros == []
+    assert re.findall(r"### Análise: (\S+)", texto) == VARIAVEIS
+    assert modelo.pico == 2
+
+
+def test_por_variavel_mantem_secoes_quando_uma_falha():
+    modelo = ModeloPorVariavel(responses=["x"], falhas=("y2",))
+    texto, erros = get_llm_response_por_variavel(_analises(), llm_modelo=modelo, max_concorrencia=4, usar_cache=False)
+    assert len(erros) == 1 and "y2" in erros[0] and "cota excedida" in erros[0]
+    secoes = texto.split("### Análise: ")[1:]
+    assert [s.split()[0] for s in secoes] == VARIAVEIS
+    for variavel, secao in zip(VARIAVEIS, secoes):
+        if variavel == "y2":
+            assert "Seção não gerada" in secao
+        else:
+            assert f"Erro puro de {variavel}" in secao
+
+
+def test_por_variavel_sem_analises():
+    texto, erros = get_llm_response_por_variavel([], llm_modelo=FakeListChatModel(responses=["x"]), usar_cache=False)
+    assert texto is None
+    assert erros and erros[0].startswith("AVISO:")
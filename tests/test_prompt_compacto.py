@@ -0,0 +1,47 @@
+import json
+
+from src.prompt_compacto import codificar_analises
+
+
+def _analise():
+    # Fator chamado "tempos" (nome de um campo descartado) e p-valor logo acima do corte de 0,10
+    return {
+        "variavel": "y",
+        "pareto": {"significativo": ["tempos"], "nao_significativo": ["x"]},
+        "anova_completa": [
+            {"term": "tempos", "sum_sq": 12.345678, "df": 1.0, "F": 30.123456, "PR(>F)": 0.00012345678},
+            {"term": "x", "sum_sq": 1.2345678, "df": 1.0, "F": 2.9876543, "PR(>F)": 0.10004},
+        ],
+        "modelo_reduzido_summary": "OLS Regression Results ...",
+        "tempos": [{"etapa": "selecao", "segundos": 0.01}],
+        "artefato": {"termos": ["Intercept", "tempos"]},
+        "desejabilidade": {
+            "aplica": True,
+            "modelo_funcao_numpy": "def f(): ...",
+            "verificacao_exportacao": {"equivalente": True},
+            "resultados": [{"tempos": 1.23456789, "y": 9.87654321, "desejabilidade": 0.8}],
+        },
+    }
+
+
+def test_descarta_campos_so_no_nivel_da_analise():
+    for analises in (_analise(), [_analise()], {"y": _analise()}):
+        texto = codificar_analises(analises, orcamento_tokens=None)
+        assert "OLS Regression" not in texto
+        assert "segundos" not in texto
+        assert "Intercept" not in texto
+        assert "modelo_funcao_numpy" not in texto and "verificacao_exportacao" not in texto
+        # A coluna "tempos" dos resultados da desejabilidade continua no prompt
+        assert '"tempos":[1.235]' in texto
+
+
+def test_p_valores_com_precisao_total():
+    dados = json.loads(codificar_analises(_analise(), orcamento_tokens=None))
+    assert dados["anova_completa"]["PR(>F)"] == [0.00012345678, 0.10004]
+    assert dados["anova_completa"]["F"] == [30.12, 2.988]
+
+
+def test_nao_altera_as_analises():
+    analise = _analise()
+    codificar_analises(analise, orcamento_tokens=50)
+    assert analise == _analise()
@@ -0,0 +1,57 @@
+import gc
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from src import replicas
+from src.replicas import construir_indice, indice_de_replicas, somas_erro_puro_e_falta_de_ajuste
+
+
+def _df(semente, n=12):
+    rng = np.random.default_rng(semente)
+    return pd.DataFrame({"a": rng.integers(0, 3, n), "b": rng.integers(0, 2, n), "y": rng.normal(size=n)})
+
+
+def _mesmo_indice(obtido, esperado):
+    np.testing.assert_array_equal(obtido.codigos, esperado.codigos)
+    np.testing.assert_array_equal(obtido.tamanhos, esperado.tamanhos)
+
+
+def test_id_reutilizado_nao_devolve_indice_antigo():
+    # Entrada deixada por outro DataFrame sob o id do atual (ex.: id reaproveitado)
+    antigo, atual = _df(0), _df(1, n=8)
+    indice_antigo = construir_indice(antigo, ("a", "b"))
+    replicas._indices[id(atual)] = (weakref.ref(antigo), {("a", "b"): indice_antigo})
+    try:
+        _mesmo_indice(indice_de_replicas(atual, ["b", "a"]), construir_indice(atual, ("a", "b")))
+    finally:
+        replicas._indices.pop(id(atual), None)
+
+
+def test_dataframes_recriados_usam_o_proprio_indice():
+    # DataFrames criados e descartados em sequência tendem a reutilizar o mesmo id
+    for semente in range(20):
+        df = _df(semente, n=6 + semente % 5)
+        _mesmo_indice(indice_de_replicas(df, ["a", "b"]), construir_indice(df, ("a", "b")))
+        del df
+        gc.collect()
+
+
+def test_entrada_removida_com_o_dataframe():
+    df = _df(0)
+    indice_de_replicas(df, ["a"])
+    i = id(df)
+    assert i in replicas._indices
+    del df
+    gc.collect()
+    assert i not in replicas._indices
+
+
+def test_somas_batem_com_groupby():
+    df = _df(3, n=30)
+    ajustado = df["y"].to_numpy() * 0.5
+    sspe, sslof = somas_erro_puro_e_falta_de_ajuste(construir_indice(df, ("a", "b")), df["y"], ajustado)
+    medias = df.groupby(["a", "b"])["y"].transform("mean").to_numpy()
+    np.testing.assert_allclose(sspe, np.sum((df["y"].to_numpy() - medias) ** 2))
+    np.testing.assert_allclose(sslof, np.sum((medias - ajustado) ** 2))